@@ -2,10 +2,22 @@
 # exit on error
 set -o errexit
 
-pip install -r requirements.txt
+pip install -r requirements.txt -r requirements-build.txt
 
-# สั่งรวบรวมไฟล์ Static (CSS/JS)
+# build CSS ของ Tailwind จาก theme/static_src (minify + เหลือเฉพาะ class ที่ใช้ใน template)
+# ใช้ Tailwind standalone CLI จาก requirements-build.txt ไม่ต้องมี Node.js
+# (เหมือน `npm run build --prefix theme/static_src`) ถ้า build ไม่ผ่าน errexit จะหยุด deploy
+# Vercel ไม่ได้รัน build.sh แต่ใช้ไฟล์ที่ commit ไว้ แก้ template แล้วต้อง build แล้ว commit styles.css ด้วย
+tailwindcss-bin -i theme/static_src/src/styles.css -o theme/static/css/dist/styles.css --minify
+
+# ทุก class ใน template ต้องมีใน CSS ที่เพิ่ง build
+python manage.py check_tailwind_classes
+
+# สั่งรวบรวมไฟล์ Static (CSS/JS) ตั้งชื่อตาม hash + บีบอัด .br/.gz ไว้ล่วงหน้า (WhiteNoise)
 python manage.py collectstatic --no-input
 
+# ขนาดไฟล์หลังบีบอัดต้องไม่เกินงบ (STATIC_BUDGETS ใน config/settings.py)
+python manage.py check_static_budget
+
 # สั่ง Migrate Database (สร้างตาราง)
-python manage.py migrate
\ No newline at end of file
+python manage.py migrate
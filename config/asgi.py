@@ -1,7 +1,22 @@
-# config/asgi.py
+"""
+ASGI config for config project.
+
+ใช้ตัวนี้เมื่อต้องการแชทแบบ real-time (SSE) เช่น
+    gunicorn config.asgi:application -k uvicorn.workers.UvicornWorker
+
+For more information on this file, see
+https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+"""
+
 import os
-import django
+
+from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
-django.setup()
 
+application = get_asgi_application()
+
+# compile template ไว้ก่อนรับ request แรก (เปิด/ปิดด้วย settings.TEMPLATE_WARMUP)
+from core.templatecache import warm_templates_on_boot  # noqa: E402
+
+warm_templates_on_boot()
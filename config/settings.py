@@ -1,3 +1,4 @@
+import importlib.util
 import os
 import dj_database_url
 
@@ -50,8 +51,9 @@ INSTALLED_APPS = [
     'django.contrib.contenttypes',
     'django.contrib.sessions',
     'django.contrib.messages',
-    'cloudinary_storage',
     'django.contrib.staticfiles',
+    # ต้องอยู่หลัง staticfiles: static ไม่ได้เก็บบน Cloudinary แล้ว จึงใช้ collectstatic ของ Django (ของ cloudinary_storage อ่าน STATICFILES_STORAGE ที่ถูกยกเลิกไปแล้ว)
+    'cloudinary_storage',
 
     'django.contrib.sites',
 
@@ -60,7 +62,6 @@ INSTALLED_APPS = [
     'allauth.socialaccount',
     'allauth.socialaccount.providers.google',
 
-    'tailwind',
     'crispy_forms',
     'crispy_tailwind',
     'theme',
@@ -75,7 +76,10 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    # 'whitenoise.middleware.WhiteNoiseMiddleware',
+    # เสิร์ฟไฟล์ static ตอบกลับทันทีโดยไม่ผ่าน middleware ตัวอื่น (ดู STORAGES ด้านล่าง)
+    'whitenoise.middleware.WhiteNoiseMiddleware',
+    # วัด query/เวลา ของทุก request (core/instrumentation.py) วางไว้ต้นๆ จะได้นับรวม middleware ที่อยู่ถัดไปด้วย
+    'core.instrumentation.RequestMetricsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -89,6 +93,15 @@ MIDDLEWARE = [
 ROOT_URLCONF = 'config.urls'
 
 import os
+# loader ที่หา template (ลำดับเดียวกับ DIRS + APP_DIRS เดิม)
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+# ตอน deploy ให้ compile template ทุกไฟล์ตั้งแต่ worker เริ่ม (core/templatecache.py)
+# request แรกของ worker ใหม่จะได้ไม่ต้องเสียเวลา parse template เอง
+TEMPLATE_WARMUP = os.environ.get('TEMPLATE_WARMUP', str(not DEBUG)) == 'True'
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -97,7 +110,6 @@ TEMPLATES = [
             os.path.join(BASE_DIR, 'templates', 'allauth'),
             os.path.join(BASE_DIR, 'core', 'templates'),
         ],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.request',
@@ -105,6 +117,11 @@ TEMPLATES = [
                 'django.contrib.messages.context_processors.messages',
                 'core.context_processors.notifications',  # เพิ่ม context processor สำหรับการแจ้งเตือน
             ],
+            # production: parse แต่ละ template ครั้งเดียวแล้วเก็บไว้ในหน่วยความจำของ worker
+            # dev: อ่านไฟล์ใหม่ทุกครั้ง แก้ template แล้วเห็นผลทันที
+            'loaders': TEMPLATE_LOADERS if DEBUG else [
+                ('django.template.loaders.cached.Loader', TEMPLATE_LOADERS),
+            ],
         },
     },
 ]
@@ -116,28 +133,62 @@ WSGI_APPLICATION = 'config.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# === Connection pooling (ตั้งผ่าน environment) ===
+# DB_POOL:
+#   'persistent' (ค่าเริ่มต้น) = แต่ละ worker ใช้ connection เดิมซ้ำได้นาน DB_CONN_MAX_AGE วินาที
+#   'psycopg'   = connection pool ของ psycopg 3 ใน process (ต้องติดตั้ง "psycopg[binary,pool]" แทน psycopg2)
+#                 ขนาด pool ต่อ worker: DB_POOL_MIN_SIZE - DB_POOL_MAX_SIZE (รวมทุก worker ต้องไม่เกิน max_connections)
+#   'pgbouncer' = ต่อผ่าน PgBouncer (หรือ pooler ของ Supabase/Neon) แบบ transaction mode
+#                 ปิด server-side cursor และ prepared statement ที่ใช้ข้าม transaction ไม่ได้
+#   'none'      = เปิด-ปิด connection ทุก request
+# ดูสถานะได้ที่ /health/db/
+DB_POOL = os.environ.get('DB_POOL', 'persistent')
+DB_CONN_MAX_AGE = int(os.environ.get('DB_CONN_MAX_AGE', 600))
+DB_POOL_MIN_SIZE = int(os.environ.get('DB_POOL_MIN_SIZE', 2))
+DB_POOL_MAX_SIZE = int(os.environ.get('DB_POOL_MAX_SIZE', 10))
+DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 10))  # วินาทีที่รอ connection ว่างก่อน error
+
+
+def configure_pooling(database):
+    options = database.setdefault('OPTIONS', {})
+    database['CONN_HEALTH_CHECKS'] = True
+    if DB_POOL == 'psycopg':
+        # Django ไม่ให้ใช้ pool คู่กับ persistent connection
+        database['CONN_MAX_AGE'] = 0
+        options['pool'] = {'min_size': DB_POOL_MIN_SIZE, 'max_size': DB_POOL_MAX_SIZE, 'timeout': DB_POOL_TIMEOUT}
+    elif DB_POOL == 'pgbouncer':
+        database['CONN_MAX_AGE'] = DB_CONN_MAX_AGE
+        database['DISABLE_SERVER_SIDE_CURSORS'] = True
+        if importlib.util.find_spec('psycopg'):
+            # psycopg 3 ใช้ prepared statement อัตโนมัติ ซึ่งพังเมื่อสลับ connection ระหว่าง transaction
+            options['prepare_threshold'] = None
+    elif DB_POOL == 'none':
+        database['CONN_MAX_AGE'] = 0
+    else:
+        database['CONN_MAX_AGE'] = DB_CONN_MAX_AGE
+    return database
+
+
 if 'DATABASE_URL' in os.environ:
     # ✅ กรณีอยู่บน Vercel (Production)
     # มันจะอ่านค่าจาก Environment Variable ที่เราตั้งไว้ใน Vercel
     DATABASES = {
-        'default': dj_database_url.config(
+        'default': configure_pooling(dj_database_url.config(
             default=os.environ.get('DATABASE_URL'),
-            conn_max_age=600,
-            conn_health_checks=True,
             ssl_require=True,
-        )
+        ))
     }
 else:
     # ✅ กรณีอยู่บนเครื่องเรา (Localhost)
     DATABASES = {
-        'default': {
+        'default': configure_pooling({
             'ENGINE': 'django.db.backends.postgresql',
             'NAME': 'haandaibor',
             'USER': 'postgres',      # ชื่อ User ของคุณ
             'PASSWORD': '1234',      # รหัสผ่านของคุณ
             'HOST': 'localhost',
             'PORT': '5432',
-        }
+        })
     }
 
 # #deployment database settings
@@ -221,11 +272,103 @@ SOCIALACCOUNT_PROVIDERS = {
     }
 }
 
-if DEBUG:
+# แอปที่ใช้แค่ตอน dev (tailwind start / auto reload) ไม่โหลดบน server จะได้ start เร็วขึ้น
+# Vercel ไม่ได้ตั้ง RENDER จึงเป็น DEBUG แต่ไม่ต้องใช้แอปพวกนี้ (ทุก request อาจเป็น cold start)
+DEV_APPS_ENABLED = DEBUG and 'VERCEL' not in os.environ
+
+if DEV_APPS_ENABLED:
     # Add django_browser_reload only in DEBUG mode
-    INSTALLED_APPS += ['django_browser_reload']
+    INSTALLED_APPS += ['tailwind', 'django_browser_reload']
     MIDDLEWARE += ['django_browser_reload.middleware.BrowserReloadMiddleware']
 
+# === Real-time chat (SSE) ===
+# InMemoryBroker ใช้ได้กับ ASGI worker ตัวเดียว ถ้ามีหลาย worker ให้เปลี่ยนเป็น RedisBroker
+# TASKS_BACKEND='database' (worker แยก process) ต้องใช้ RedisBroker ด้วย ไม่งั้น system check core.E001 จะไม่ผ่าน
+CHAT_BROKER = os.environ.get('CHAT_BROKER', 'core.broker.InMemoryBroker')
+CHAT_BROKER_URL = os.environ.get('CHAT_BROKER_URL', 'redis://localhost:6379/0')
+
+# === งานเบื้องหลัง (core/jobs.py) ===
+# 'database' = เข้าคิวแล้วรัน `python manage.py run_worker` (ค่าเริ่มต้นบน production ต้องมี worker คู่กับเว็บ)
+# 'immediate' = ทำทันทีหลัง commit ใน request เดียวกัน (ค่าเริ่มต้นตอน dev ไม่ต้องมี worker)
+TASKS_BACKEND = os.environ.get('TASKS_BACKEND', 'immediate' if DEBUG else 'database')
+TASKS_VISIBILITY_TIMEOUT = int(os.environ.get('TASKS_VISIBILITY_TIMEOUT', 300))  # วินาที
+# ไฟล์อัปโหลดที่รอ worker ไปแนบ พักไว้ใน default storage (web กับ worker อยู่คนละเครื่องก็อ่านได้)
+TASKS_STAGING_PREFIX = 'upload_staging/'
+
+ACCOUNT_ADAPTER = 'core.adapters.AccountAdapter'
+
+# รูปย่อของรูปที่อัปโหลด (core/images.py): WEBP หรือ AVIF (ถ้า Pillow รองรับ)
+IMAGE_VARIANT_FORMAT = os.environ.get('IMAGE_VARIANT_FORMAT', 'WEBP')
+
+# === วัดผล request (core/instrumentation.py) ===
+# ผลต่อ request อยู่ใน header Server-Timing, สถิติรวมแยกตาม URL ดูที่ /system/metrics/
+REQUEST_METRICS = os.environ.get('REQUEST_METRICS', 'True') == 'True'
+# header Server-Timing / X-Query-Budget ส่งให้เฉพาะ staff ตั้ง True เพื่อส่งให้ทุกคน (เช่นตอนวัดผลด้วย load test)
+SERVER_TIMING_PUBLIC = os.environ.get('SERVER_TIMING_PUBLIC', 'False') == 'True'
+# จำนวน query สูงสุดต่อ request ถ้าเกินจะ log warning และติด header X-Query-Budget
+QUERY_BUDGET_DEFAULT = int(os.environ.get('QUERY_BUDGET_DEFAULT', 30))
+# งบเฉพาะหน้า (key = ชื่อ URL) ตั้งจากค่าที่วัดได้ด้วย `python manage.py benchmark_urls` เผื่อไว้ 1-2 query
+# ค่าที่วัดคือตอน cache ว่าง (รวม TASKS_BACKEND='database') และ URL ที่มีหลายทางใช้ทางที่หนักที่สุด
+# เทสต์ QueryBudgetTests ตรวจว่าทุก URL ใน core/urls.py มีงบและไม่เกินงบ ถ้าหน้าไหนต้องใช้ query เพิ่มจริงๆ ให้ปรับตัวเลขที่นี่
+QUERY_BUDGETS = {
+    'home': 8,
+    'home-feed': 8,
+    'post-list': 6,
+    'post-create': 7,
+    'post-detail': 13,
+    'post-update': 10,
+    'post-delete': 10,
+    'post-join': 15,
+    'manage-request': 16,  # approve: จองที่ + เพิ่มสมาชิก + เข้าคิวแจ้งเตือน
+    'post-chat': 10,
+    'chat-api-get': 9,
+    'chat-api-send': 9,
+    'profile': 11,
+    'profile-edit': 7,
+    'add-comment': 9,
+    'kick-member': 14,
+    'admin-user-list': 10,
+    'admin-request-metrics': 7,
+    'admin-ban-user': 9,
+    'admin-unban-user': 9,
+    'report-create': 7,
+    'user-report-list': 9,
+    'admin-report-list': 16,  # เปิดครั้งแรกของวันต้องสรุปยอดรายวันลง DailyStat
+    'admin-update-report': 9,
+    'admin-resolve-report': 8,
+    'report-detail': 10,
+    'generate-qr': 7,
+    'generate-qr-batch': 7,
+    'post-payment-qr': 10,
+    'post-bill': 15,
+    'bill-split-api': 5,
+    'health-db': 6,
+    'bill-calculator': 5,
+    'notification-list': 9,
+    'notification-read': 9,
+    'notification-read-all': 8,
+    'leave-party': 12,
+}
+
+# === Cache ===
+# CACHE_URL ไม่ตั้ง = locmem (แยกกันแต่ละ process เหมาะกับ dev)
+#   file:///var/tmp/haandaibor_cache = เก็บเป็นไฟล์ ใช้ร่วมกันทุก worker ในเครื่องเดียว
+#   redis://host:6379/1 = Redis หรือตัวที่ใช้ protocol เดียวกัน (Valkey, KeyDB, Upstash) ต้องติดตั้ง redis เพิ่ม
+# ถ้ามีหลาย worker ควรใช้ cache กลาง ไม่งั้นเลขเวอร์ชันของ fragment (core/fragments.py) จะไม่ตรงกันข้าม worker
+def cache_from_url(url):
+    if url.startswith(('redis://', 'rediss://')):
+        return {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': url}
+    if url.startswith('file://'):
+        return {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': url[len('file://'):]}
+    return {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'haandaibor', 'OPTIONS': {'MAX_ENTRIES': 5000}}
+
+CACHE_URL = os.environ.get('CACHE_URL', '')
+CACHES = {
+    'default': cache_from_url(CACHE_URL),
+    # {% cache %} ใน template ใช้ alias นี้ แยกไปอีกที่ได้ด้วย FRAGMENT_CACHE_URL (รูปแบบเดียวกับ CACHE_URL)
+    'template_fragments': cache_from_url(os.environ.get('FRAGMENT_CACHE_URL', CACHE_URL)),
+}
+
 TAILWIND_APP_NAME = "theme"
 ACCOUNT_EMAIL_REQUIRED = True
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
@@ -237,7 +380,25 @@ SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
 SOCIALACCOUNT_LOGIN_ON_GET = True
 SOCIALACCOUNT_AUTO_SIGNUP = True
 
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+# === Static files (CSS/JS ของเว็บ) ===
+# เสิร์ฟจาก process เองด้วย WhiteNoise ไม่ต้องส่งขึ้น Cloudinary (ไม่มี round trip ตอน collectstatic และตอน cache miss)
+# production: collectstatic ตั้งชื่อไฟล์ตาม hash ของเนื้อหา (styles.3f9a1c0b.css) และบีบอัด .br/.gz ไว้ล่วงหน้า
+#   ไฟล์ที่มี hash ถูก cache แบบ immutable นาน 10 ปี (WhiteNoise ตั้งให้เอง) เนื้อหาเปลี่ยนชื่อไฟล์ก็เปลี่ยน
+#   ติดตั้ง Brotli (requirements.txt) แล้วจะได้ไฟล์ .br ด้วย ไม่งั้นมีแค่ .gz
+# DEBUG (รวม Vercel): ไม่ต้อง collectstatic WhiteNoise อ่านจากโฟลเดอร์ static ของแต่ละแอปตรงๆ
+STATICFILES_BACKEND = (
+    'django.contrib.staticfiles.storage.StaticFilesStorage' if DEBUG
+    else 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+)
+# ขนาดสูงสุดหลัง gzip (bytes) ของไฟล์ที่เราสร้างเอง ตรวจใน build.sh ด้วย `python manage.py check_static_budget`
+STATIC_BUDGETS = {
+    'css/dist/styles.css': 20 * 1024,
+}
+# class ใน template ที่ไม่ใช่ของ Tailwind (ให้ JavaScript ใช้หา element) `check_tailwind_classes` จะไม่ตรวจ
+TAILWIND_NON_UTILITY_CLASSES = [
+    'payer-checkbox',  # core/bill_calculator.html
+    'pending-upload',  # core/post_chat.html
+]
 
 # ==========================================
 # ✅ ส่วนจัดการ Cloudinary & Media (แก้ใหม่)
@@ -249,27 +410,24 @@ import os
 
 # เช็คว่ารันบน Render หรือไม่
 if 'RENDER' in os.environ:
-    print("--- 🟢 Using Cloudinary for BOTH Media & Static ---")
-    
+    # รูปที่อัปโหลดเก็บบน Cloudinary ส่วน static เสิร์ฟด้วย WhiteNoise
     STORAGES = {
         "default": {
             # เก็บรูปภาพที่อัปโหลด
             "BACKEND": "cloudinary_storage.storage.MediaCloudinaryStorage",
         },
         "staticfiles": {
-            # เก็บไฟล์ CSS/JS ของเว็บ (ใช้ Cloudinary แทน Whitenoise)
-            "BACKEND": "cloudinary_storage.storage.StaticHashedCloudinaryStorage",
+            "BACKEND": STATICFILES_BACKEND,
         },
     }
 else:
-    print("--- 🏠 Using Local File Storage ---")
-    
+    # ใช้ไฟล์ในเครื่อง
     STORAGES = {
         "default": {
             "BACKEND": "django.core.files.storage.FileSystemStorage",
         },
         "staticfiles": {
-            "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
+            "BACKEND": STATICFILES_BACKEND,
         },
     }
     
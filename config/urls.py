@@ -28,6 +28,7 @@ urlpatterns = [
 
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+if settings.DEV_APPS_ENABLED:
     urlpatterns += [
         path("__reload__/", include("django_browser_reload.urls")),
     ]
\ No newline at end of file
@@ -14,4 +14,10 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
 application = get_wsgi_application()
+
+# compile template ไว้ก่อนรับ request แรก (เปิด/ปิดด้วย settings.TEMPLATE_WARMUP)
+from core.templatecache import warm_templates_on_boot  # noqa: E402
+
+warm_templates_on_boot()
+
 app = application
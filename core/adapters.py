@@ -0,0 +1,29 @@
+# core/adapters.py
+from allauth.account.adapter import DefaultAccountAdapter
+from allauth.core import context as allauth_context
+from django.contrib.sites.shortcuts import get_current_site
+
+from .jobs import enqueue
+from .tasks import send_email_message
+
+
+class AccountAdapter(DefaultAccountAdapter):
+    def send_mail(self, template_prefix, email, context):
+        # render อีเมลใน request (ต้องใช้ request/site) แต่ส่งจริงในงานเบื้องหลัง
+        request = allauth_context.request
+        ctx = {
+            'request': request,
+            'email': email,
+            'current_site': get_current_site(request),
+        }
+        ctx.update(context)
+        message = self.render_mail(template_prefix, email, ctx)
+        enqueue(
+            send_email_message,
+            message.subject,
+            message.body,
+            message.from_email,
+            list(message.to),
+            alternatives=[list(alternative) for alternative in getattr(message, 'alternatives', [])],
+            content_subtype=message.content_subtype,
+        )
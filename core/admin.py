@@ -1,8 +1,10 @@
 # core/admin.py
 from django.utils.html import format_html
 from django.contrib import admin
+from django.utils import timezone
 from django.contrib.auth.admin import UserAdmin
-from .models import User, Post, JoinRequest, ChatMessage, ProfileComment, Report
+from .adminstats import invalidate_admin_stats
+from .models import User, Post, JoinRequest, ChatMessage, ProfileComment, Report, BackgroundJob
 
 # 1. ปรับแต่งหน้าจัดการ User (Custom User Admin)
 class CustomUserAdmin(UserAdmin):
@@ -49,10 +51,13 @@ class ReportAdmin(admin.ModelAdmin):
     @admin.action(description='✅ ระบุว่าแก้ไขแล้ว')
     def mark_as_resolved(self, request, queryset):
         queryset.update(status='RESOLVED')
+        # update() ไม่ส่ง post_save
+        invalidate_admin_stats()
 
     @admin.action(description='👀 ระบุว่ารับเรื่องแล้ว')
     def mark_as_acknowledged(self, request, queryset):
         queryset.update(status='ACKNOWLEDGED')
+        invalidate_admin_stats()
     # 2. เพิ่มฟังก์ชันสำหรับแสดงรูปภาพ
     def show_evidence(self, obj):
         if obj.evidence_image:
@@ -62,6 +67,17 @@ class ReportAdmin(admin.ModelAdmin):
     
     show_evidence.short_description = "หลักฐาน" # ชื่อหัวข้อในตาราง
 
+@admin.register(BackgroundJob)
+class BackgroundJobAdmin(admin.ModelAdmin):
+    list_display = ('task', 'status', 'attempts', 'run_at', 'created_at', 'finished_at')
+    list_filter = ('status', 'task')
+    readonly_fields = ('created_at', 'finished_at', 'last_error')
+    actions = ['retry_jobs']
+
+    @admin.action(description='🔁 ส่งงานกลับเข้าคิวอีกครั้ง')
+    def retry_jobs(self, request, queryset):
+        queryset.update(status='PENDING', attempts=0, run_at=timezone.now(), locked_until=None)
+
 # 2. ลงทะเบียน Model เข้ากับ Admin Site
 admin.site.register(User, CustomUserAdmin) # ใช้ Class ที่เราปรับแต่ง
 admin.site.register(Post)
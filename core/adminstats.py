@@ -0,0 +1,123 @@
+# core/adminstats.py
+# ตัวเลขสรุปของหน้า admin (/reports/admin/)
+# - จำนวนเรื่องร้องเรียนทุกสถานะ/หมวดหมู่นับใน query เดียว (GROUP BY status, category) แทนการ COUNT ทีละสถานะ
+# - ยอดรายวันย้อนหลัง (เรื่องร้องเรียนใหม่, ผู้ใช้ใหม่) อ่านจากตาราง DailyStat ที่สรุปไว้ล่วงหน้า
+#   วันที่ผ่านไปแล้วสรุปครั้งเดียว (วันที่ยังขาดจะสรุปให้ตอนเปิดหน้า หรือสั่ง `python manage.py rollup_daily_stats`)
+#   เฉพาะวันนี้ที่นับสดจากตารางจริง
+# - ผลทั้งหมด cache ไว้ ADMIN_STATS_CACHE_TTL วินาที ล้างทันทีเมื่อ Report เปลี่ยน (ดู core/signals.py และ ReportAdmin)
+#   ยอดผู้ใช้ใหม่ของวันนี้จึงช้ากว่าจริงได้ไม่เกิน TTL
+from datetime import datetime, time, timedelta
+
+from django.core.cache import cache
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import DailyStat, Report, User
+
+ADMIN_STATS_CACHE_KEY = 'admin_stats:reports'
+ADMIN_STATS_CACHE_TTL = 300
+SERIES_DAYS = 30
+
+# metric -> (model, field วันที่สร้าง)
+ROLLUP_METRICS = {
+    'reports': (Report, 'created_at'),
+    'users': (User, 'date_joined'),
+}
+
+
+def compute_report_stats():
+    by_status = {code: 0 for code, _ in Report.STATUS_CHOICES}
+    by_category = {code: 0 for code, _ in Report.CATEGORY_CHOICES}
+    rows = Report.objects.order_by().values_list('status', 'category').annotate(n=Count('pk'))
+    for status, category, n in rows:
+        by_status[status] = by_status.get(status, 0) + n
+        by_category[category] = by_category.get(category, 0) + n
+    return {
+        'by_status': by_status,
+        'by_category': by_category,
+        'total': sum(by_status.values()),
+    }
+
+
+def _day_bounds(start, end):
+    # ช่วงเวลาแบบ [start 00:00, end+1 00:00) ใช้ index ของคอลัมน์เวลาได้ (ต่างจาก __date ที่ต้องแปลงทุกแถว)
+    tz = timezone.get_current_timezone()
+    return (
+        timezone.make_aware(datetime.combine(start, time.min), tz),
+        timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min), tz),
+    )
+
+
+def daily_counts(metric, start, end):
+    """{วันที่: จำนวน} ของ metric ในช่วง start..end (รวมปลายทั้งสองข้าง) นับจากตารางจริงใน query เดียว"""
+    model, field = ROLLUP_METRICS[metric]
+    lower, upper = _day_bounds(start, end)
+    rows = (
+        model.objects.filter(**{f'{field}__gte': lower, f'{field}__lt': upper})
+        .annotate(day=TruncDate(field)).order_by().values_list('day').annotate(n=Count('pk'))
+    )
+    return dict(rows)
+
+
+def rollup_daily_stats(start, end, metrics=None):
+    """
+    สรุปยอดรายวันช่วง start..end ลง DailyStat (วันที่ไม่มีข้อมูลบันทึกเป็น 0 จะได้ไม่ต้องสรุปซ้ำ)
+    รันซ้ำได้ แถวเดิมถูกเขียนทับ คืนค่า {metric: {วันที่: จำนวน}}
+    """
+    days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    result = {}
+    rows = []
+    for metric in metrics or ROLLUP_METRICS:
+        counts = daily_counts(metric, start, end)
+        result[metric] = {day: counts.get(day, 0) for day in days}
+        rows.extend(DailyStat(metric=metric, date=day, value=value) for day, value in result[metric].items())
+    DailyStat.objects.bulk_create(
+        rows, update_conflicts=True, unique_fields=['metric', 'date'], update_fields=['value', 'updated_at'],
+    )
+    return result
+
+
+def daily_series(days=SERIES_DAYS):
+    """{metric: [(วันที่, จำนวน), ...]} ย้อนหลัง days วันจนถึงวันนี้ เรียงจากเก่าไปใหม่"""
+    today = timezone.localdate()
+    start = today - timedelta(days=days - 1)
+    yesterday = today - timedelta(days=1)
+
+    stored = {metric: {} for metric in ROLLUP_METRICS}
+    for metric, day, value in DailyStat.objects.filter(date__gte=start, date__lte=yesterday).values_list('metric', 'date', 'value'):
+        if metric in stored:
+            stored[metric][day] = value
+
+    missing = [
+        start + timedelta(days=i) for i in range(days - 1)
+        if any(start + timedelta(days=i) not in values for values in stored.values())
+    ]
+    if missing:
+        for metric, values in rollup_daily_stats(min(missing), yesterday).items():
+            stored[metric].update(values)
+
+    series = {}
+    for metric, values in stored.items():
+        values[today] = daily_counts(metric, today, today).get(today, 0)
+        series[metric] = [(start + timedelta(days=i), values[start + timedelta(days=i)]) for i in range(days)]
+    return series
+
+
+def chart(points):
+    """แปลง [(วันที่, จำนวน)] เป็นแท่งกราฟ (ความสูงเป็น % ของวันที่มากที่สุด) ให้ template วาด"""
+    peak = max((n for _, n in points), default=0) or 1
+    return [{'date': day, 'count': n, 'percent': round(n * 100 / peak)} for day, n in points]
+
+
+def get_admin_stats():
+    stats = cache.get(ADMIN_STATS_CACHE_KEY)
+    if stats is None:
+        stats = compute_report_stats()
+        stats['series'] = daily_series()
+        cache.set(ADMIN_STATS_CACHE_KEY, stats, ADMIN_STATS_CACHE_TTL)
+    return stats
+
+
+def invalidate_admin_stats():
+    cache.delete(ADMIN_STATS_CACHE_KEY)
@@ -0,0 +1,213 @@
+# core/benchmarking.py
+# วัดเวลาและจำนวน query ของ request ผ่าน test Client (ใช้ใน benchmark_scenarios, benchmark_urls และเทสต์งบ query)
+# url_cases() บอกวิธีเรียกทุก URL ใน core/urls.py ด้วยข้อมูลจาก seed_data (เพิ่ม URL ใหม่ต้องเพิ่มที่นี่ด้วย ไม่งั้นเทสต์ไม่ผ่าน)
+# จำนวน query ของ benchmark_urls นับจาก request ที่ cache ว่างทั้งหมด (กรณีแย่สุดที่งบต้องรับได้)
+import math
+import statistics
+import time
+from collections import namedtuple
+from contextlib import contextmanager, nullcontext
+
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.template import engines
+from django.test import Client
+from django.urls import reverse
+
+from .models import JoinRequest, Notification, Report
+from .seeding import seeded_users
+
+
+def percentile(timings, fraction):
+    """percentile แบบ nearest-rank ของ list ที่เรียงแล้ว"""
+    if not timings:
+        return 0
+    return timings[max(0, math.ceil(fraction * len(timings)) - 1)]
+
+
+class QueryCounter:
+    """นับ query ผ่าน execute_wrapper (CaptureQueriesContext ใช้ไม่ได้นอกเทสต์ เพราะ queries_log ถูกล้างทุก request)"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+@contextmanager
+def _rolled_back():
+    """request ที่แก้ข้อมูล (ส่งแชท, ออกจากปาร์ตี้ ฯลฯ) รันใน transaction แล้วย้อนกลับ จะได้วัดซ้ำกับข้อมูลชุดเดิม"""
+    with transaction.atomic():
+        yield
+        transaction.set_rollback(True)
+
+
+def reset_caches():
+    """ล้าง cache ทุก alias (รวม fragment cache) และ template ที่ cached loader compile ไว้"""
+    for cache in caches.all():
+        cache.clear()
+    for engine in engines.all():
+        for loader in getattr(getattr(engine, 'engine', None), 'template_loaders', ()):
+            if hasattr(loader, 'reset'):
+                loader.reset()
+
+
+def measure(client, url, repeat=10, warmup=1, method='get', data=None, content_type=None, rollback=False, cold=False):
+    """
+    เรียก url ซ้ำ repeat รอบ คืนค่า dict: status, queries (ของรอบแรกหลัง warm-up), p50/p95/max/mean (ms)
+    รอบ warm-up ไม่นับเวลา (template/cache ของ worker ใหม่)
+    cold=True ล้าง cache ทั้งหมดก่อนรอบที่นับ query (ไม่งั้น query ที่ถูก cache ไว้จะไม่ถูกนับ)
+    """
+    extra = {'content_type': content_type} if content_type else {}
+
+    def send():
+        with _rolled_back() if rollback else nullcontext():
+            return getattr(client, method)(url, data, **extra)
+
+    for _ in range(warmup):
+        send()
+    if cold:
+        reset_caches()
+
+    queries = QueryCounter()
+    with connection.execute_wrapper(queries):
+        started = time.perf_counter()
+        response = send()
+        timings = [(time.perf_counter() - started) * 1000]
+    for _ in range(repeat - 1):
+        started = time.perf_counter()
+        send()
+        timings.append((time.perf_counter() - started) * 1000)
+
+    timings.sort()
+    return {
+        'url': url,
+        'status': response.status_code,
+        'queries': queries.count,
+        'p50_ms': round(percentile(timings, 0.5), 2),
+        'p95_ms': round(percentile(timings, 0.95), 2),
+        'max_ms': round(timings[-1], 2),
+        'mean_ms': round(statistics.fmean(timings), 2),
+    }
+
+
+def client_for(user=None):
+    client = Client()
+    if user is not None:
+        client.force_login(user)
+    return client
+
+
+# ---------- ทุก URL ใน core/urls.py ----------
+
+# ข้อมูลที่ใช้เรียก URL: โพสต์ที่มีสมาชิกหลายคนและมีคำขอรออนุมัติ, เจ้าของ, สมาชิก, คนนอก, staff ฯลฯ
+Fixture = namedtuple('Fixture', 'post owner member outsider join_request staff report notification')
+# user = ชื่อ field ใน Fixture ที่ใช้ login (None = ไม่ login)
+UrlCase = namedtuple('UrlCase', 'method path user data content_type', defaults=('get', None, None, None))
+
+
+def case_url_name(label):
+    """ชื่อ URL ของ case (URL เดียวที่มีหลายทาง เช่น 'manage-request:approve' ใช้งบของ 'manage-request')"""
+    return label.partition(':')[0]
+
+# URL ที่วัดด้วยวิธีนี้ไม่ได้
+SKIPPED_URLS = {
+    'chat-api-stream': "SSE ค้างเชื่อมต่อไว้ไม่จบ request (ทดสอบแยกใน ChatStreamTests)",
+}
+
+
+def build_fixture():
+    """เลือกข้อมูลจากฐานข้อมูลที่สร้างด้วย seed_data คืนค่า None ถ้ายังไม่มีข้อมูลพอ"""
+    join_request = (
+        JoinRequest.objects.filter(status='PENDING', post__member_count__gt=1, user__username__startswith='seed_')
+        .select_related('post__owner').order_by('-id').first()
+    )
+    staff = seeded_users().filter(is_staff=True).first()
+    report = Report.objects.select_related('reporter').order_by('-id').first()
+    if join_request is None or staff is None or report is None:
+        return None
+    post = join_request.post
+    return Fixture(
+        post=post,
+        owner=post.owner,
+        member=post.members.exclude(pk=post.owner_id).first(),
+        outsider=seeded_users().exclude(joined_posts=post).exclude(joinrequest__post=post).first(),
+        join_request=join_request,
+        staff=staff,
+        report=report,
+        notification=Notification.objects.filter(recipient=post.owner).first(),
+    )
+
+
+def url_cases(f):
+    post, member, report = f.post, f.member, f.report
+    bill = {
+        'people': [f.owner.username, member.username],
+        'items': [{'name': 'ค่าห้อง', 'price': '1200', 'payers': [f.owner.username, member.username]}],
+        'service_charge': True,
+        'vat': True,
+    }
+    return {
+        'home': UrlCase('get', reverse('home'), 'owner'),
+        'home-feed': UrlCase('get', reverse('home-feed'), 'owner'),
+        'post-list': UrlCase('get', f"{reverse('post-list')}?category={post.category}", None),
+        'post-create': UrlCase('get', reverse('post-create'), 'owner'),
+        'post-detail': UrlCase('get', reverse('post-detail', args=[post.pk]), 'owner'),
+        'post-update': UrlCase('get', reverse('post-update', args=[post.pk]), 'owner'),
+        'post-delete': UrlCase('get', reverse('post-delete', args=[post.pk]), 'owner'),
+        'post-join': UrlCase('get', reverse('post-join', args=[post.pk]), 'outsider'),
+        'manage-request': UrlCase('get', reverse('manage-request', args=[f.join_request.pk, 'reject']), 'owner'),
+        'manage-request:approve': UrlCase('get', reverse('manage-request', args=[f.join_request.pk, 'approve']), 'owner'),
+        'post-chat': UrlCase('get', reverse('post-chat', args=[post.pk]), 'member'),
+        'chat-api-get': UrlCase('get', reverse('chat-api-get', args=[post.pk]), 'member'),
+        'chat-api-send': UrlCase('post', reverse('chat-api-send', args=[post.pk]), 'member', {'message': 'ทดสอบ'}),
+        'profile': UrlCase('get', reverse('profile', args=[f.owner.pk]), 'member'),
+        'profile-edit': UrlCase('get', reverse('profile-edit'), 'owner'),
+        'add-comment': UrlCase('post', reverse('add-comment', args=[f.owner.pk]), 'member', {'comment': 'โอนไวมาก'}),
+        'kick-member': UrlCase('get', reverse('kick-member', args=[post.pk, member.pk]), 'owner'),
+        'admin-user-list': UrlCase('get', reverse('admin-user-list'), 'staff'),
+        'admin-request-metrics': UrlCase('get', reverse('admin-request-metrics'), 'staff'),
+        'admin-ban-user': UrlCase('get', reverse('admin-ban-user', args=[member.pk]), 'staff'),
+        'admin-unban-user': UrlCase('get', reverse('admin-unban-user', args=[member.pk]), 'staff'),
+        'report-create': UrlCase('get', reverse('report-create'), 'member'),
+        'user-report-list': UrlCase('get', reverse('user-report-list'), 'staff'),
+        'admin-report-list': UrlCase('get', reverse('admin-report-list'), 'staff'),
+        'admin-update-report': UrlCase('get', reverse('admin-update-report', args=[report.pk, 'RESOLVED']), 'staff'),
+        'admin-resolve-report': UrlCase('get', reverse('admin-resolve-report', args=[report.pk]), 'staff'),
+        'report-detail': UrlCase('get', reverse('report-detail', args=[report.pk]), 'staff'),
+        'generate-qr': UrlCase('get', f"{reverse('generate-qr')}?id=0812345678&amount=100.00&format=svg", 'member'),
+        'generate-qr-batch': UrlCase('post', reverse('generate-qr-batch'), 'member', {
+            'id': '0812345678', 'format': 'svg', 'items': [{'label': 'A', 'amount': '100'}, {'label': 'B', 'amount': '50'}],
+        }, 'application/json'),
+        'post-payment-qr': UrlCase('get', f"{reverse('post-payment-qr', args=[post.pk])}?format=svg", 'owner'),
+        'post-bill': UrlCase('post', reverse('post-bill', args=[post.pk]), 'owner', bill, 'application/json'),
+        'bill-split-api': UrlCase('post', reverse('bill-split-api'), None, bill, 'application/json'),
+        'health-db': UrlCase('get', reverse('health-db'), None),
+        'bill-calculator': UrlCase('get', reverse('bill-calculator'), None),
+        'notification-list': UrlCase('get', reverse('notification-list'), 'owner'),
+        'notification-read': UrlCase('get', reverse('notification-read', args=[f.notification.pk]), 'owner'),
+        'notification-read-all': UrlCase('get', reverse('notification-read-all'), 'owner'),
+        'leave-party': UrlCase('post', reverse('leave-party', args=[post.pk]), 'member'),
+    }
+
+
+def run_url_benchmark(fixture, repeat=10, warmup=1, names=None):
+    """
+    วัดทุก URL ใน url_cases คืนค่า {ชื่อ case: ผลจาก measure()} ทุก request ถูกย้อนกลับ ข้อมูลไม่เปลี่ยน
+    จำนวน query นับตอน cache ว่าง (cold) เวลาวัดจากรอบที่เหลือ
+    """
+    clients = {}
+    results = {}
+    for name, case in url_cases(fixture).items():
+        if names and name not in names and case_url_name(name) not in names:
+            continue
+        if case.user not in clients:
+            clients[case.user] = client_for(getattr(fixture, case.user) if case.user else None)
+        results[name] = measure(
+            clients[case.user], case.path, repeat=repeat, warmup=warmup,
+            method=case.method, data=case.data, content_type=case.content_type, rollback=True, cold=True,
+        )
+        results[name]['method'] = case.method.upper()
+    return results
@@ -0,0 +1,147 @@
+# core/billsplit.py
+# คำนวณการหารบิล (ใช้ทั้งหน้า "ระบบหาร" และบิลที่บันทึกไว้กับโพสต์)
+# - คิดเป็นหน่วยสตางค์ (จำนวนเต็ม) ทั้งหมด ไม่มี float
+# - เศษสตางค์แจกแบบ largest remainder: ผลรวมของทุกคนเท่ากับยอดบิลพอดีเสมอ
+# - รายการที่คนหารชุดเดียวกันจะรวมยอดกันก่อน จึงไม่ต้องวนรายการ x คนหาร ทีละช่อง
+from collections import defaultdict, namedtuple
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from math import lcm
+
+SERVICE_CHARGE_RATE = 10  # เปอร์เซ็นต์
+VAT_RATE = 7  # เปอร์เซ็นต์
+
+MAX_PEOPLE = 100
+MAX_ITEMS = 2000
+MAX_ITEM_PRICE = Decimal('1000000')
+
+
+class BillSplitError(ValueError):
+    pass
+
+
+class BillSplitResult(namedtuple('BillSplitResult', 'subtotal service_charge vat total shares')):
+    """ยอดเงินเป็น Decimal ทศนิยม 2 ตำแหน่ง, shares เป็น list ของ (ชื่อ, ยอดที่ต้องจ่าย) ตามลำดับรายชื่อ"""
+
+    def to_json(self):
+        return {
+            'subtotal': str(self.subtotal),
+            'service_charge': str(self.service_charge),
+            'vat': str(self.vat),
+            'total': str(self.total),
+            'shares': [{'name': name, 'amount': str(amount)} for name, amount in self.shares],
+        }
+
+
+def _to_satang(value):
+    try:
+        amount = Decimal(str(value))
+    except InvalidOperation:
+        raise BillSplitError(f"ราคาไม่ถูกต้อง: {value!r}")
+    if not amount.is_finite() or amount < 0 or amount > MAX_ITEM_PRICE:
+        raise BillSplitError(f"ราคาไม่ถูกต้อง: {value!r}")
+    return int((amount * 100).quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+
+
+def _from_satang(satang):
+    return (Decimal(satang) / 100).quantize(Decimal('0.01'))
+
+
+def _percent_of(satang, percent):
+    # ปัดครึ่งขึ้นเป็นสตางค์ (แบบใบเสร็จร้านอาหาร)
+    return (satang * percent * 2 + 100) // 200
+
+
+def allocate(total, weights):
+    """
+    แบ่ง total (จำนวนเต็ม) ตามสัดส่วน weights โดยผลรวมเท่ากับ total พอดี
+    เศษที่เหลือให้คนที่มีเศษมากสุดก่อน ถ้าเศษเท่ากันให้คนที่อยู่ลำดับก่อน
+    """
+    weight_sum = sum(weights)
+    if weight_sum == 0:
+        return [0] * len(weights)
+    parts = [divmod(total * weight, weight_sum) for weight in weights]
+    shares = [quotient for quotient, _ in parts]
+    leftover = total - sum(shares)
+    by_remainder = sorted(range(len(weights)), key=lambda i: -parts[i][1])
+    for i in by_remainder[:leftover]:
+        shares[i] += 1
+    return shares
+
+
+def parse_bill(data):
+    """ตรวจและแปลง JSON ที่ส่งมาจากหน้าเว็บเป็น (people, items, service_charge, vat)"""
+    if not isinstance(data, dict):
+        raise BillSplitError("รูปแบบข้อมูลไม่ถูกต้อง")
+
+    people = data.get('people')
+    if not isinstance(people, list) or not people:
+        raise BillSplitError("ต้องมีรายชื่ออย่างน้อย 1 คน")
+    if len(people) > MAX_PEOPLE:
+        raise BillSplitError(f"หารได้ไม่เกิน {MAX_PEOPLE} คน")
+    people = [str(name).strip() for name in people]
+    if '' in people or len(set(people)) != len(people):
+        raise BillSplitError("รายชื่อต้องไม่ว่างและไม่ซ้ำกัน")
+
+    items = data.get('items') or []
+    if not isinstance(items, list) or len(items) > MAX_ITEMS:
+        raise BillSplitError(f"มีรายการได้ไม่เกิน {MAX_ITEMS} รายการ")
+    index_of = {name: i for i, name in enumerate(people)}
+    parsed_items = []
+    for item in items:
+        if not isinstance(item, dict) or not isinstance(item.get('payers'), list):
+            raise BillSplitError("รูปแบบรายการไม่ถูกต้อง")
+        try:
+            payers = sorted({index_of[str(name).strip()] for name in item['payers']})
+        except KeyError as e:
+            raise BillSplitError(f"ไม่มีชื่อ {e.args[0]} ในรายชื่อ")
+        if not payers:
+            raise BillSplitError("แต่ละรายการต้องมีคนหารอย่างน้อย 1 คน")
+        parsed_items.append((str(item.get('name', '')), _to_satang(item.get('price')), tuple(payers)))
+
+    return people, parsed_items, bool(data.get('service_charge')), bool(data.get('vat'))
+
+
+def bill_to_json(people, items, service_charge=False, vat=False):
+    """แปลงผลของ parse_bill กลับเป็น JSON (ใช้เก็บลง BillSplit.bill แล้วเปิดมาแก้ต่อในหน้าเว็บ)"""
+    return {
+        'people': people,
+        'items': [
+            {'name': name, 'price': str(_from_satang(price)), 'payers': [people[i] for i in payers]}
+            for name, price, payers in items
+        ],
+        'service_charge': service_charge,
+        'vat': vat,
+    }
+
+
+def split_bill(people, items, service_charge=False, vat=False):
+    """
+    people: รายชื่อ, items: list ของ (ชื่อรายการ, ราคาเป็นสตางค์, tuple index ของคนหาร) จาก parse_bill
+    ค่าบริการคิดจากยอดอาหาร ส่วน VAT คิดจากยอดอาหาร + ค่าบริการ แล้วแบ่งให้แต่ละคนตามสัดส่วนที่กิน
+    """
+    # รวมยอดของรายการที่คนหารชุดเดียวกันก่อน (บิลร้อยรายการส่วนใหญ่มีคนหารไม่กี่แบบ)
+    by_payers = defaultdict(int)
+    for _, price, payers in items:
+        by_payers[payers] += price
+    subtotal = sum(by_payers.values())
+
+    # สัดส่วนของแต่ละคน: คูณด้วย lcm ของจำนวนคนหาร จะได้เป็นจำนวนเต็มไม่มีเศษ
+    scale = lcm(*(len(payers) for payers in by_payers)) if by_payers else 1
+    weights = [0] * len(people)
+    for payers, amount in by_payers.items():
+        per_person = amount * scale // len(payers)
+        for i in payers:
+            weights[i] += per_person
+
+    service = _percent_of(subtotal, SERVICE_CHARGE_RATE) if service_charge else 0
+    vat_amount = _percent_of(subtotal + service, VAT_RATE) if vat else 0
+    total = subtotal + service + vat_amount
+
+    shares = allocate(total, weights)
+    return BillSplitResult(
+        subtotal=_from_satang(subtotal),
+        service_charge=_from_satang(service),
+        vat=_from_satang(vat_amount),
+        total=_from_satang(total),
+        shares=[(name, _from_satang(share)) for name, share in zip(people, shares)],
+    )
@@ -0,0 +1,120 @@
+# core/broker.py
+# ตัวกลาง (pub/sub) สำหรับกระจายข้อความแชทแบบ real-time ไปยังทุกคนที่เปิดห้องแชทอยู่
+# เลือก backend ได้จาก settings.CHAT_BROKER (ค่าเริ่มต้นคือ InMemoryBroker)
+import asyncio
+import json
+import threading
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+
+
+class Subscription:
+    """การรับฟังข้อความของห้องหนึ่งๆ (1 connection ต่อ 1 subscription)"""
+
+    def __init__(self, broker, post_id):
+        self.broker = broker
+        self.post_id = post_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue()
+
+    async def get(self, timeout=None):
+        # คืนค่า payload ถัดไป หรือ None ถ้าหมดเวลารอ (ใช้ส่ง keep-alive)
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def close(self):
+        self.broker._unsubscribe(self)
+
+
+class InMemoryBroker:
+    """
+    Broker ภายใน process เดียว เหมาะกับตอน dev หรือรัน ASGI worker ตัวเดียว
+    publish() เรียกได้จาก thread ไหนก็ได้ (เช่น sync view) ส่วน subscribe() ต้องเรียกใน event loop
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = {}  # post_id -> set ของ Subscription
+
+    def publish(self, post_id, payload):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(post_id, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.queue.put_nowait, payload)
+            except RuntimeError:
+                # event loop ของ connection นั้นปิดไปแล้ว
+                self._unsubscribe(subscription)
+
+    async def subscribe(self, post_id):
+        subscription = Subscription(self, post_id)
+        with self._lock:
+            self._subscriptions.setdefault(post_id, set()).add(subscription)
+        return subscription
+
+    def _unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.post_id)
+            if subscriptions is None:
+                return
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscriptions[subscription.post_id]
+
+
+class RedisSubscription:
+    def __init__(self, pubsub):
+        self.pubsub = pubsub
+
+    async def get(self, timeout=None):
+        message = await self.pubsub.get_message(ignore_subscribe_messages=True, timeout=timeout)
+        if message is None:
+            return None
+        return json.loads(message['data'])
+
+    async def close(self):
+        await self.pubsub.aclose()
+
+
+class RedisBroker:
+    """
+    Broker ผ่าน Redis pub/sub ใช้เมื่อมีหลาย worker/หลายเครื่อง (ต้องติดตั้ง redis เพิ่ม)
+    ตั้งค่าที่อยู่ได้จาก settings.CHAT_BROKER_URL
+    """
+
+    channel_prefix = 'chat:post:'
+
+    def __init__(self):
+        try:
+            import redis
+            import redis.asyncio
+        except ImportError as exc:
+            raise ImproperlyConfigured("RedisBroker ต้องติดตั้งแพ็กเกจ 'redis' ก่อน") from exc
+        self.url = settings.CHAT_BROKER_URL
+        self._client = redis.Redis.from_url(self.url)
+        self._async_client = redis.asyncio.Redis.from_url(self.url)
+
+    def publish(self, post_id, payload):
+        self._client.publish(f'{self.channel_prefix}{post_id}', json.dumps(payload))
+
+    async def subscribe(self, post_id):
+        pubsub = self._async_client.pubsub()
+        await pubsub.subscribe(f'{self.channel_prefix}{post_id}')
+        return RedisSubscription(pubsub)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = import_string(settings.CHAT_BROKER)()
+    return _broker
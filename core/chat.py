@@ -0,0 +1,46 @@
+# core/chat.py
+# แปลงข้อความแชทเป็น dict สำหรับส่งให้หน้าเว็บ (ใช้ร่วมกันทั้ง API ดึงข้อความ, ส่งข้อความ และ SSE)
+from .models import ChatMessage
+from .templatetags.images import variant
+
+
+def chat_messages_queryset(post):
+    # ดึงข้อมูลผู้ส่งมาพร้อมกันใน query เดียว (กัน N+1 ตอนอ่าน msg.user)
+    return ChatMessage.objects.filter(post=post).select_related('user')
+
+
+class ChatMessageSerializer:
+    """
+    แปลงข้อความเป็น payload โดยจำ URL รูปโปรไฟล์ของผู้ส่งแต่ละคนไว้
+    (storage อย่าง Cloudinary ต้องสร้าง URL ทุกครั้งที่เรียก .url ซึ่งช้า)
+    """
+
+    def __init__(self, viewer=None):
+        self.viewer_id = viewer.pk if viewer is not None else None
+        self._avatar_urls = {}
+
+    def avatar_url(self, user):
+        if user.pk not in self._avatar_urls:
+            self._avatar_urls[user.pk] = variant(user.profile_picture, 64)
+        return self._avatar_urls[user.pk]
+
+    def payload(self, msg):
+        data = {
+            'id': msg.id,
+            'user_id': msg.user_id,
+            'user': msg.user.username,
+            'profile_url': self.avatar_url(msg.user),
+            'message': msg.message,
+
+            # ★ ส่ง URL รูปภาพไปด้วย (ถ้ามี) ★ ใช้รูปย่อถ้าสร้างเสร็จแล้ว
+            'image_url': variant(msg.image, 600) if msg.image else None,
+
+            'timestamp': msg.timestamp.strftime('%H:%M'),
+        }
+        if self.viewer_id is not None:
+            # เทียบด้วย id แทนการเทียบ object เพื่อไม่ต้องโหลด user เพิ่ม
+            data['is_me'] = msg.user_id == self.viewer_id
+        return data
+
+    def serialize(self, messages):
+        return [self.payload(msg) for msg in messages]
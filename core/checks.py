@@ -0,0 +1,32 @@
+# core/checks.py
+# system check ของแอป (รันตอน `manage.py check`, runserver และ migrate ใน build.sh ตั้งค่าผิดจึงล้มตั้งแต่ตอน deploy)
+from django.conf import settings
+from django.core.checks import Error, register
+from django.utils.module_loading import import_string
+
+from .broker import InMemoryBroker
+
+
+@register()
+def check_chat_broker(app_configs, **kwargs):
+    # งานเบื้องหลังรันใน process ของ worker (run_worker) ส่วน SSE รันใน ASGI server
+    # InMemoryBroker ส่งข้อความได้แค่ใน process เดียวกัน ข้อความรูปที่ worker สร้างจึงไม่ถึงคนที่เปิดห้องแชทอยู่
+    if getattr(settings, 'TASKS_BACKEND', 'immediate') != 'database':
+        return []
+    try:
+        broker_class = import_string(settings.CHAT_BROKER)
+    except ImportError:
+        return []  # get_broker() จะ error เองตอนใช้งาน
+    if not issubclass(broker_class, InMemoryBroker):
+        return []
+    return [
+        Error(
+            "TASKS_BACKEND='database' ใช้คู่กับ InMemoryBroker ไม่ได้: "
+            "ข้อความที่ worker ส่ง (เช่นรูปในแชท) จะไม่ถึงคนที่เปิดห้องแชทผ่าน SSE",
+            hint=(
+                "ตั้ง CHAT_BROKER=core.broker.RedisBroker (พร้อม CHAT_BROKER_URL) หรือ TASKS_BACKEND=immediate "
+                "ถ้ารันผ่าน WSGI อย่างเดียว (ไม่มี SSE หน้าแชทใช้ polling) ปิดได้ด้วย SILENCED_SYSTEM_CHECKS = ['core.E001']"
+            ),
+            id='core.E001',
+        )
+    ]
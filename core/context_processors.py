@@ -1,12 +1,16 @@
 # core/context_processors.py
+from django.utils.functional import SimpleLazyObject
+
 from .models import Notification
+from .notifications import get_unread_count
 
 def notifications(request):
     if request.user.is_authenticated:
-        # ดึงจำนวนที่ยังไม่อ่าน
-        count = Notification.objects.filter(recipient=request.user, is_read=False).count()
-        # ดึง 5 รายการล่าสุดมาโชว์ (เผื่อทำ dropdown)
-        latest = Notification.objects.filter(recipient=request.user).order_by('-created_at')[:5]
+        user = request.user
+        # จำนวนที่ยังไม่อ่าน: อ่านจาก cache และคำนวณเฉพาะตอนที่ template ใช้จริง
+        count = SimpleLazyObject(lambda: get_unread_count(user))
+        # 5 รายการล่าสุด (เผื่อทำ dropdown) เป็น queryset ที่ยังไม่ query จนกว่า template จะวนลูป
+        latest = Notification.objects.filter(recipient=user).select_related('sender').order_by('-created_at')[:5]
         return {
             'noti_count': count,
             'latest_notis': latest
@@ -14,4 +18,4 @@ def notifications(request):
     return {
         'noti_count': 0,
         'latest_notis': []
-    }
\ No newline at end of file
+    }
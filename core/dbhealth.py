@@ -0,0 +1,63 @@
+# core/dbhealth.py
+# ตรวจสถานะ database และ connection pool สำหรับ /health/db/ (ดู DB_POOL ใน config/settings.py)
+import logging
+import time
+
+from django.conf import settings
+from django.db import DatabaseError, connection
+
+logger = logging.getLogger(__name__)
+
+def _ms(seconds):
+    return round(seconds * 1000, 2)
+
+
+def pool_metrics(pool):
+    """สถิติจาก psycopg_pool: จำนวน connection ที่ใช้อยู่, คิวที่รอ, เวลารอ checkout เฉลี่ย"""
+    stats = pool.get_stats()
+    in_use = stats.get('pool_size', 0) - stats.get('pool_available', 0)
+    requests = stats.get('requests_num', 0)
+    return {
+        'min_size': stats.get('pool_min'),
+        'max_size': stats.get('pool_max'),
+        'size': stats.get('pool_size'),
+        'available': stats.get('pool_available'),
+        'in_use': in_use,
+        'waiting': stats.get('requests_waiting', 0),
+        # ใกล้ 1 = connection เกือบหมด pool ควรเพิ่ม DB_POOL_MAX_SIZE หรือลดจำนวน worker
+        'saturation': round(in_use / stats['pool_max'], 3) if stats.get('pool_max') else None,
+        'checkouts': requests,
+        'avg_checkout_wait_ms': round(stats.get('requests_wait_ms', 0) / requests, 2) if requests else 0,
+        'checkout_errors': stats.get('requests_errors', 0),
+        'connections_lost': stats.get('connections_lost', 0),
+    }
+
+
+def database_health():
+    """คืนค่า (ok, dict ของผลตรวจ)"""
+    report = {
+        'vendor': connection.vendor,
+        'pool_mode': getattr(settings, 'DB_POOL', 'persistent'),
+        'conn_max_age': connection.settings_dict.get('CONN_MAX_AGE'),
+    }
+    try:
+        # checkout: เวลาที่ได้ connection มา (ต่อใหม่ / หยิบจาก pool) ถ้า request นี้มี connection อยู่แล้วจะเกือบเป็น 0
+        started = time.perf_counter()
+        connection.ensure_connection()
+        report['checkout_ms'] = _ms(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+        report['query_ms'] = _ms(time.perf_counter() - started)
+    except DatabaseError:
+        # ข้อความจาก driver อาจมี host/port/user/ชื่อ database อยู่ เก็บไว้ใน log เท่านั้น
+        logger.exception("ตรวจสถานะ database ไม่สำเร็จ")
+        report['error'] = 'unavailable'
+        return False, report
+
+    pool = getattr(connection, 'pool', None)
+    if pool is not None:
+        report['pool'] = pool_metrics(pool)
+    return True, report
@@ -0,0 +1,60 @@
+# core/facets.py
+# จำนวนโพสต์ของแต่ละตัวกรองในหน้า /post (หมวดหมู่ + ว่าง/เต็ม) ภายใต้คำค้นปัจจุบัน
+# - นับทุกตัวเลือกใน query เดียวด้วย COUNT(...) FILTER (WHERE ...) แทนการ COUNT ทีละตัวเลือก
+# - ตัวเลขของแต่ละกลุ่มใช้ตัวกรองของกลุ่มอื่นแต่ไม่ใช้ของกลุ่มตัวเอง
+#   (เลือกหมวด GAME อยู่ก็ยังเห็นว่าหมวดอื่นมีกี่โพสต์ ถ้าเปลี่ยนไปเลือก)
+# - cache ตามคำค้น+ตัวกรองไว้สั้นๆ ตัวเลขคลาดเคลื่อนได้ไม่เกิน FACETS_CACHE_TTL วินาที
+import hashlib
+
+from django.core.cache import cache
+from django.db.models import Count, F, Q
+
+from .models import Post
+from .search import filter_search, normalize_search_text
+
+FACETS_CACHE_TTL = 60
+
+STATUS_FILTERS = {
+    'available': Q(member_count__lt=F('member_limit')),
+    'full': Q(member_count__gte=F('member_limit')),
+}
+
+
+def _cache_key(query, category, status):
+    raw = '\x1f'.join([normalize_search_text(query or ''), category or '', status or ''])
+    return f"post_facets:{hashlib.md5(raw.encode()).hexdigest()}"
+
+
+def compute_facets(query='', category='', status=''):
+    category_filter = Q(category=category) if category else Q()
+    status_filter = STATUS_FILTERS.get(status, Q())
+
+    aggregates = {
+        f'category_{code}': Count('pk', filter=Q(category=code) & status_filter)
+        for code, _ in Post.CATEGORY_CHOICES
+    }
+    aggregates.update({
+        f'status_{name}': Count('pk', filter=condition & category_filter)
+        for name, condition in STATUS_FILTERS.items()
+    })
+    aggregates['all_categories'] = Count('pk', filter=status_filter)
+    aggregates['all_statuses'] = Count('pk', filter=category_filter)
+    aggregates['total'] = Count('pk', filter=category_filter & status_filter)
+    counts = filter_search(Post.objects.all(), query).aggregate(**aggregates)
+
+    return {
+        'categories': [(code, label, counts[f'category_{code}']) for code, label in Post.CATEGORY_CHOICES],
+        'statuses': {name: counts[f'status_{name}'] for name in STATUS_FILTERS},
+        'all_categories': counts['all_categories'],
+        'all_statuses': counts['all_statuses'],
+        'total': counts['total'],
+    }
+
+
+def get_post_facets(query='', category='', status=''):
+    key = _cache_key(query, category, status)
+    facets = cache.get(key)
+    if facets is None:
+        facets = compute_facets(query, category, status)
+        cache.set(key, facets, FACETS_CACHE_TTL)
+    return facets
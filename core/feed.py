@@ -0,0 +1,48 @@
+# core/feed.py
+# ฟีดโพสต์หน้าแรกแบบ keyset pagination (เรียงตาม created_at, id จากใหม่ไปเก่า)
+# ใช้ cursor แทน OFFSET จึงเร็วเท่าเดิมไม่ว่าจะเลื่อนลงไปลึกแค่ไหน
+import base64
+from collections import namedtuple
+from datetime import datetime
+
+from django.db.models import Q
+
+from .models import Post
+
+FEED_PAGE_SIZE = 12
+
+FeedPage = namedtuple('FeedPage', ['posts', 'next_cursor'])
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(post):
+    raw = f'{post.created_at.isoformat()}|{post.pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, pk = base64.urlsafe_b64decode(padded.encode()).decode().split('|')
+        return datetime.fromisoformat(created_at), int(pk)
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise InvalidCursor(cursor) from exc
+
+
+def feed_queryset():
+    # owner ถูกใช้ทุกการ์ด (ชื่อ + รูปโปรไฟล์) จึงดึงมาพร้อมกัน, จำนวนสมาชิกใช้ member_count ที่เก็บไว้แล้ว
+    return Post.objects.select_related('owner').order_by('-created_at', '-id')
+
+
+def get_feed_page(cursor=None, page_size=FEED_PAGE_SIZE):
+    queryset = feed_queryset()
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+
+    posts = list(queryset[:page_size + 1])
+    next_cursor = encode_cursor(posts[page_size - 1]) if len(posts) > page_size else None
+    return FeedPage(posts[:page_size], next_cursor)
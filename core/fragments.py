@@ -0,0 +1,58 @@
+# core/fragments.py
+# version stamp สำหรับ fragment cache ({% cache %} ใน template)
+# แต่ละ object มีเลขเวอร์ชันเก็บใน cache พอข้อมูลเปลี่ยนก็เปลี่ยนเลข -> key ของ fragment เปลี่ยน -> render ใหม่
+# (ไม่ต้องตามลบ fragment เก่า ปล่อยให้หมดอายุเอง) จุดที่เปลี่ยนเลขดู core/signals.py
+import time
+
+from django.core.cache import cache
+
+
+def _version_key(kind, pk):
+    return f'fragver:{kind}:{pk}'
+
+
+def _new_version():
+    # ใช้เวลาแทนการนับ 1, 2, 3 กันกรณี cache ของเลขเวอร์ชันหาย แล้วเริ่มนับใหม่ไปชนกับ fragment เก่า
+    return time.time_ns()
+
+
+def get_versions(kind, pks):
+    """คืนค่า {pk: version} ดึงทีเดียวด้วย get_many ตัวที่ยังไม่มีจะสร้างให้"""
+    keys = {_version_key(kind, pk): pk for pk in set(pks)}
+    found = cache.get_many(keys)
+    missing = {key: _new_version() for key in keys if key not in found}
+    if missing:
+        cache.set_many(missing, None)
+        found.update(missing)
+    return {pk: found[key] for key, pk in keys.items()}
+
+
+def bump_versions(kind, pks):
+    pks = set(pks)
+    if pks:
+        version = _new_version()
+        cache.set_many({_version_key(kind, pk): version for pk in pks}, None)
+
+
+def profile_comments_version(profile_user_id, author_ids):
+    """
+    เวอร์ชันของรายการคอมเมนต์ในหน้าโปรไฟล์ (ใช้เป็นส่วนหนึ่งของ key ใน core/profile.html)
+    เปลี่ยนเมื่อคอมเมนต์ที่ได้รับเปลี่ยน หรือคนที่มาคอมเมนต์เปลี่ยนรูป/ชื่อ
+    (เลขเวอร์ชันคือเวลาที่ bump เลขที่มากที่สุดของผู้คอมเมนต์จึงเปลี่ยนทุกครั้งที่มีคนใดคนหนึ่งถูก bump)
+    """
+    comments = get_versions('profile_comments', [profile_user_id])[profile_user_id]
+    authors = get_versions('user', author_ids).values()
+    return f'{comments}.{max(authors, default=0)}'
+
+
+def attach_card_versions(posts):
+    """
+    ใส่ post.card_version ให้ทุกโพสต์ (ใช้เป็นส่วนหนึ่งของ key ใน partials/post_card.html)
+    การ์ดเปลี่ยนเมื่อโพสต์/สมาชิกเปลี่ยน หรือเจ้าของเปลี่ยนรูป/ชื่อ จึงใช้เวอร์ชันของทั้งโพสต์และเจ้าของ
+    """
+    posts = list(posts)
+    post_versions = get_versions('post', [post.pk for post in posts])
+    user_versions = get_versions('user', [post.owner_id for post in posts])
+    for post in posts:
+        post.card_version = f'{post_versions[post.pk]}.{user_versions[post.owner_id]}'
+    return posts
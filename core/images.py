@@ -0,0 +1,159 @@
+# core/images.py
+# สร้างรูปย่อ (variant) ของรูปที่ผู้ใช้อัปโหลด เพื่อไม่ต้องส่งรูปต้นฉบับหลาย MB ไปแสดงเป็น avatar 40px
+# - decode รูปต้นฉบับครั้งเดียว แล้วย่อเป็นทุกขนาดที่กำหนด
+# - ไม่เขียน EXIF/metadata ลงรูปย่อ และ encode เป็น WebP (หรือ AVIF ถ้าตั้งค่าและ Pillow รองรับ)
+# - รูปย่อเก็บไว้ข้างๆ ต้นฉบับ เช่น post_images/foo.png -> post_images/foo__400.webp
+# - ชื่อไฟล์รูปย่อเก็บไว้ในฟิลด์ <field>_variants ของ model (template ใช้ filter |variant ดู core/templatetags/images.py)
+import io
+import os
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+
+# Pillow import เฉพาะตอนประมวลผลรูป (ใน worker) ไม่ให้ทุก request ต้องโหลด
+
+# ขนาดรูปย่อของแต่ละฟิลด์: (ความกว้าง px, crop เป็นสี่เหลี่ยมจัตุรัสหรือไม่)
+IMAGE_VARIANTS = {
+    'core.user.profile_picture': [(64, True), (128, True)],   # avatar
+    'core.post.image': [(400, False)],                        # การ์ดโพสต์
+    'core.chatmessage.image': [(600, False)],                 # รูปในแชท
+    'core.report.evidence_image': [(600, False)],             # รูปหลักฐาน
+}
+
+VARIANT_QUALITY = 80
+
+
+def field_key(instance, field_name):
+    return f'{instance._meta.label_lower}.{field_name}'
+
+
+def variants_field_name(field_name):
+    return f'{field_name}_variants'
+
+
+def output_format():
+    from PIL import features
+
+    fmt = getattr(settings, 'IMAGE_VARIANT_FORMAT', 'WEBP').upper()
+    if fmt == 'AVIF' and not features.check('avif'):
+        fmt = 'WEBP'
+    return fmt
+
+
+def variant_name(original_name, width, fmt):
+    root, _ = os.path.splitext(original_name)
+    return f'{root}__{width}.{fmt.lower()}'
+
+
+def is_default_image(fieldfile):
+    # รูปเริ่มต้นของ field (เช่น profile_pics/default.jpg) ทุกแถวใช้ไฟล์เดียวกัน รูปย่อจึงสร้างครั้งเดียวแล้วใช้ร่วมกัน
+    return bool(fieldfile) and fieldfile.name == fieldfile.field.default
+
+
+def needs_variants(instance, field_name):
+    fieldfile = getattr(instance, field_name)
+    # ไม่มีรูป หรือยังใช้รูปเริ่มต้น (รูปย่อของรูปเริ่มต้นสร้างด้วย update_default_variants)
+    if not fieldfile or is_default_image(fieldfile):
+        return False
+    variants = getattr(instance, variants_field_name(field_name)) or {}
+    return variants.get('source') != fieldfile.name
+
+
+def _resize(image, width, crop):
+    from PIL import Image, ImageOps
+
+    if crop:
+        return ImageOps.fit(image, (width, width), Image.LANCZOS)
+    if image.width <= width:
+        return image.copy()
+    # จำกัดความกว้าง คงสัดส่วนเดิม (สูงได้ไม่เกิน 2 เท่าของความกว้าง)
+    resized = image.copy()
+    resized.thumbnail((width, width * 2), Image.LANCZOS)
+    return resized
+
+
+def _encode(image, fmt):
+    buffer = io.BytesIO()
+    options = {'quality': VARIANT_QUALITY}
+    if fmt == 'WEBP':
+        options['method'] = 4
+    # ไม่ส่ง exif/icc เข้าไปตอน save = ตัด metadata ทิ้งทั้งหมด
+    image.save(buffer, format=fmt, **options)
+    return buffer.getvalue()
+
+
+def generate_variants(instance, field_name, force=False):
+    """
+    สร้างรูปย่อทุกขนาดของฟิลด์นี้ คืนค่า dict ที่จะเก็บลง <field>_variants
+    รูปที่มีรูปย่ออยู่แล้วใน storage (เช่น default.jpg ที่ผู้ใช้หลายคนใช้ร่วมกัน) จะไม่สร้างซ้ำ
+    """
+    fieldfile = getattr(instance, field_name)
+    storage = fieldfile.storage
+    fmt = output_format()
+    specs = IMAGE_VARIANTS[field_key(instance, field_name)]
+    variants = {'source': fieldfile.name}
+
+    missing = []
+    for width, crop in specs:
+        name = variant_name(fieldfile.name, width, fmt)
+        variants[str(width)] = name
+        if force or not storage.exists(name):
+            missing.append((width, crop, name))
+
+    if not missing:
+        return variants
+
+    from PIL import Image, ImageOps
+
+    with fieldfile.open('rb') as source:
+        image = Image.open(source)
+        # ให้ JPEG decode ที่ความละเอียดต่ำเท่าที่จำเป็น (เร็วขึ้นมากกับรูปจากกล้อง)
+        largest = max(width for width, _, _ in missing)
+        image.draft('RGB', (largest * 2, largest * 2))
+        image = ImageOps.exif_transpose(image)
+        image = image.convert('RGBA' if image.mode in ('RGBA', 'LA', 'P') else 'RGB')
+
+        for width, crop, name in missing:
+            content = _encode(_resize(image, width, crop), fmt)
+            if storage.exists(name):
+                storage.delete(name)
+            # storage บางตัว (เช่น Cloudinary) อาจเปลี่ยนชื่อไฟล์ตอนบันทึก ต้องเก็บชื่อที่ได้กลับมา
+            variants[str(width)] = storage.save(name, ContentFile(content))
+
+    return variants
+
+
+def default_variants(model, field_name):
+    """รูปย่อของรูปเริ่มต้นที่สร้างไว้แล้ว (คัดลอกจากแถวไหนก็ได้ที่ยังใช้รูปเริ่มต้น) ยังไม่เคยสร้างคืน None"""
+    default = model._meta.get_field(field_name).default
+    variants_field = variants_field_name(field_name)
+    return (
+        model.objects.filter(**{field_name: default, f'{variants_field}__source': default})
+        .values_list(variants_field, flat=True).first()
+    )
+
+
+def update_default_variants(model, field_name, force=False):
+    """
+    สร้างรูปย่อของรูปเริ่มต้นของ field ครั้งเดียว แล้วเขียนลงทุกแถวที่ยังใช้รูปเริ่มต้นใน UPDATE เดียว
+    คืนค่า (variants, จำนวนแถวที่อัปเดต) field ที่ไม่มีรูปเริ่มต้นคืน (None, 0)
+    """
+    default = model._meta.get_field(field_name).default
+    if not default or callable(default):
+        return None, 0
+    variants = generate_variants(model(**{field_name: default}), field_name, force=force)
+    variants_field = variants_field_name(field_name)
+    updated = (
+        model.objects.filter(**{field_name: default})
+        .exclude(**{variants_field: variants})
+        .update(**{variants_field: variants})
+    )
+    return variants, updated
+
+
+def update_variants(instance, field_name, force=False):
+    variants = generate_variants(instance, field_name, force=force)
+    # ใช้ update() ตรงๆ จะได้ไม่เรียก post_save ซ้ำ และไม่ทับฟิลด์อื่น
+    type(instance).objects.filter(pk=instance.pk).update(**{variants_field_name(field_name): variants})
+    setattr(instance, variants_field_name(field_name), variants)
+    return variants
@@ -0,0 +1,305 @@
+# core/instrumentation.py
+# วัดผลแต่ละ request: จำนวน query, เวลา SQL, เวลา render template, cache hit/miss
+# - ส่งกลับเป็น header Server-Timing (ดูได้ใน DevTools > Network > Timing)
+# - รวมเป็น histogram แยกตามชื่อ URL ดูได้ที่ /system/metrics/ (เฉพาะ admin)
+# - request ที่ query เกินงบ (QUERY_BUDGET_DEFAULT / QUERY_BUDGETS) จะถูก log และติด header X-Query-Budget
+import bisect
+import contextvars
+import logging
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.backends.base import BaseCache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.template.backends.django import Template as DjangoTemplate
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+# ขอบบนของแต่ละช่องใน histogram (ช่องสุดท้ายคือมากกว่าค่าสุดท้าย)
+LATENCY_BUCKETS_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500]
+QUERY_BUCKETS = [0, 1, 2, 5, 10, 20, 50, 100]
+HISTOGRAMS = {
+    'total_ms': LATENCY_BUCKETS_MS,
+    'sql_ms': LATENCY_BUCKETS_MS,
+    'template_ms': LATENCY_BUCKETS_MS,
+    'queries': QUERY_BUCKETS,
+}
+
+METRICS_CACHE_PREFIX = 'reqmetrics:'
+METRICS_INDEX_KEY = 'reqmetrics:index'
+METRICS_TTL = 60 * 60 * 24
+# แต่ละ worker เก็บสถิติไว้ในหน่วยความจำก่อน แล้วค่อยรวมลง cache กลางทุกๆ กี่วินาที
+METRICS_FLUSH_INTERVAL = 10
+
+_current = contextvars.ContextVar('request_metrics', default=None)
+_MISSING = object()
+
+
+class RequestMetrics:
+    __slots__ = ('queries', 'sql_time', 'template_time', 'template_depth', 'cache_hits', 'cache_misses')
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.template_depth = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+
+# ---------- ตัวดักเวลา (ติดตั้งครั้งเดียวตอนสร้าง middleware) ----------
+
+def _sql_wrapper(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.sql_time += time.perf_counter() - started
+        metrics.queries += 1
+
+
+def _instrument_templates():
+    original = DjangoTemplate.render
+    if getattr(original, 'instrumented', False):
+        return
+
+    def render(self, context=None, request=None):
+        metrics = _current.get()
+        # นับแค่ render ชั้นนอกสุด (render_to_string ที่ซ้อนอยู่ข้างในนับรวมไปแล้ว)
+        if metrics is None or metrics.template_depth:
+            return original(self, context, request)
+        metrics.template_depth += 1
+        started = time.perf_counter()
+        try:
+            return original(self, context, request)
+        finally:
+            metrics.template_depth -= 1
+            metrics.template_time += time.perf_counter() - started
+
+    render.instrumented = True
+    DjangoTemplate.render = render
+
+
+def _instrument_cache_backend(backend_class):
+    original_get = backend_class.get
+    if getattr(original_get, 'instrumented', False):
+        return
+
+    def get(self, key, default=None, version=None):
+        value = original_get(self, key, _MISSING, version=version)
+        metrics = _current.get()
+        if metrics is not None:
+            if value is _MISSING:
+                metrics.cache_misses += 1
+            else:
+                metrics.cache_hits += 1
+        return default if value is _MISSING else value
+
+    get.instrumented = True
+    backend_class.get = get
+
+    # get_many ของ BaseCache เรียก get() ทีละ key อยู่แล้ว ดักเฉพาะ backend ที่เขียน get_many เอง (เช่น Redis)
+    original_get_many = backend_class.get_many
+    if original_get_many is BaseCache.get_many:
+        return
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        found = original_get_many(self, keys, version=version)
+        metrics = _current.get()
+        if metrics is not None:
+            metrics.cache_hits += len(found)
+            metrics.cache_misses += len(keys) - len(found)
+        return found
+
+    backend_class.get_many = get_many
+
+
+def install():
+    _instrument_templates()
+    for config in settings.CACHES.values():
+        _instrument_cache_backend(import_string(config['BACKEND']))
+
+
+# ---------- histogram ----------
+
+def _empty_stats():
+    return {
+        'count': 0,
+        'budget_exceeded': 0,
+        'cache_hits': 0,
+        'cache_misses': 0,
+        'histograms': {
+            name: {'sum': 0.0, 'max': 0.0, 'buckets': [0] * (len(bounds) + 1)}
+            for name, bounds in HISTOGRAMS.items()
+        },
+    }
+
+
+def _merge_stats(into, other):
+    for field in ('count', 'budget_exceeded', 'cache_hits', 'cache_misses'):
+        into[field] += other[field]
+    for name, histogram in other['histograms'].items():
+        target = into['histograms'][name]
+        target['sum'] += histogram['sum']
+        target['max'] = max(target['max'], histogram['max'])
+        target['buckets'] = [a + b for a, b in zip(target['buckets'], histogram['buckets'])]
+    return into
+
+
+def percentile(histogram, bounds, fraction):
+    """ค่าประมาณ percentile จาก histogram (ขอบบนของช่องที่ครอบคลุม) ช่องสุดท้ายใช้ค่า max แทน"""
+    total = sum(histogram['buckets'])
+    if not total:
+        return 0
+    target = fraction * total
+    running = 0
+    for i, count in enumerate(histogram['buckets']):
+        running += count
+        if running >= target:
+            return bounds[i] if i < len(bounds) else histogram['max']
+    return histogram['max']
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._last_flush = time.monotonic()
+
+    def record(self, url_name, values, budget_exceeded, cache_hits, cache_misses):
+        with self._lock:
+            stats = self._pending.setdefault(url_name, _empty_stats())
+            stats['count'] += 1
+            stats['budget_exceeded'] += int(budget_exceeded)
+            stats['cache_hits'] += cache_hits
+            stats['cache_misses'] += cache_misses
+            for name, value in values.items():
+                histogram = stats['histograms'][name]
+                histogram['sum'] += value
+                histogram['max'] = max(histogram['max'], value)
+                histogram['buckets'][bisect.bisect_left(HISTOGRAMS[name], value)] += 1
+            should_flush = time.monotonic() - self._last_flush >= METRICS_FLUSH_INTERVAL
+        if should_flush:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._last_flush = time.monotonic()
+        if not pending:
+            return
+        # รวมกับค่าใน cache กลาง (ถ้าหลาย worker flush พร้อมกันอาจนับหายบ้าง ยอมได้สำหรับสถิติ)
+        keys = {f'{METRICS_CACHE_PREFIX}{name}': name for name in pending}
+        stored = cache.get_many(list(keys))
+        cache.set_many({
+            key: _merge_stats(stored.get(key) or _empty_stats(), pending[name])
+            for key, name in keys.items()
+        }, METRICS_TTL)
+        index = set(cache.get(METRICS_INDEX_KEY) or ())
+        cache.set(METRICS_INDEX_KEY, sorted(index | set(pending)), METRICS_TTL)
+
+    def snapshot(self):
+        """คืนค่า {url_name: stats} ของทุก worker ที่ flush ลง cache แล้ว (รวมของ worker นี้ด้วย)"""
+        self.flush()
+        names = cache.get(METRICS_INDEX_KEY) or []
+        stored = cache.get_many([f'{METRICS_CACHE_PREFIX}{name}' for name in names])
+        return {name: stored[f'{METRICS_CACHE_PREFIX}{name}'] for name in names if f'{METRICS_CACHE_PREFIX}{name}' in stored}
+
+    def reset(self):
+        with self._lock:
+            self._pending = {}
+        names = cache.get(METRICS_INDEX_KEY) or []
+        cache.delete_many([METRICS_INDEX_KEY, *(f'{METRICS_CACHE_PREFIX}{name}' for name in names)])
+
+
+registry = MetricsRegistry()
+
+
+def summarize(stats):
+    """แปลง stats ของ URL หนึ่งเป็นค่าที่แสดงในหน้า admin"""
+    count = stats['count'] or 1
+    histograms = stats['histograms']
+    lookups = stats['cache_hits'] + stats['cache_misses']
+    return {
+        'count': stats['count'],
+        'p50_ms': percentile(histograms['total_ms'], LATENCY_BUCKETS_MS, 0.5),
+        'p95_ms': percentile(histograms['total_ms'], LATENCY_BUCKETS_MS, 0.95),
+        'max_ms': round(histograms['total_ms']['max'], 1),
+        'avg_sql_ms': round(histograms['sql_ms']['sum'] / count, 1),
+        'avg_template_ms': round(histograms['template_ms']['sum'] / count, 1),
+        'avg_queries': round(histograms['queries']['sum'] / count, 1),
+        'max_queries': int(histograms['queries']['max']),
+        'cache_hit_rate': round(stats['cache_hits'] / lookups * 100) if lookups else None,
+        'budget_exceeded': stats['budget_exceeded'],
+        'latency_buckets': histograms['total_ms']['buckets'],
+    }
+
+
+def query_budget(url_name):
+    budgets = getattr(settings, 'QUERY_BUDGETS', {})
+    return budgets.get(url_name, getattr(settings, 'QUERY_BUDGET_DEFAULT', None))
+
+
+# ---------- middleware ----------
+
+def _show_timing(request):
+    if getattr(settings, 'SERVER_TIMING_PUBLIC', False):
+        return True
+    user = getattr(request, 'user', None)
+    return user is not None and user.is_staff
+
+
+class RequestMetricsMiddleware:
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_METRICS', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        install()
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(_sql_wrapper))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        total_ms = (time.perf_counter() - started) * 1000
+        sql_ms = metrics.sql_time * 1000
+        template_ms = metrics.template_time * 1000
+
+        match = getattr(request, 'resolver_match', None)
+        url_name = match.view_name if match else 'unresolved'
+        budget = query_budget(url_name)
+        budget_exceeded = budget is not None and metrics.queries > budget
+        if budget_exceeded:
+            logger.warning("%s %s ใช้ %d queries เกินงบ %d", request.method, url_name, metrics.queries, budget)
+
+        # เวลา/จำนวน query บอกโครงสร้างภายในของระบบ ส่งให้เฉพาะ staff (หรือเปิดให้ทุกคนด้วย SERVER_TIMING_PUBLIC)
+        if _show_timing(request):
+            if budget_exceeded:
+                response['X-Query-Budget'] = f'exceeded; queries={metrics.queries}; budget={budget}'
+            response['Server-Timing'] = ', '.join([
+                f'db;dur={sql_ms:.1f};desc="{metrics.queries} queries"',
+                f'tpl;dur={template_ms:.1f}',
+                f'cache;desc="hit={metrics.cache_hits} miss={metrics.cache_misses}"',
+                f'total;dur={total_ms:.1f}',
+            ])
+        registry.record(
+            url_name,
+            {'total_ms': total_ms, 'sql_ms': sql_ms, 'template_ms': template_ms, 'queries': metrics.queries},
+            budget_exceeded, metrics.cache_hits, metrics.cache_misses,
+        )
+        return response
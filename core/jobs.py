@@ -0,0 +1,130 @@
+# core/jobs.py
+# ระบบงานเบื้องหลัง (background job) แบบง่ายที่เก็บคิวไว้ในฐานข้อมูล
+#
+#   @task()
+#   def send_email_message(...): ...
+#
+#   enqueue(send_email_message, ...)  # หรือ enqueue('core.send_email_message', ...)
+#
+# settings.TASKS_BACKEND:
+#   'immediate' - ทำงานทันทีหลัง transaction commit ใน request เดียวกัน (ค่าเริ่มต้นตอน dev ไม่ต้องมี worker)
+#   'database'  - บันทึกลงตาราง BackgroundJob แล้วให้ `python manage.py run_worker` หยิบไปทำ (ค่าเริ่มต้นบน production)
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import BackgroundJob
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+
+RETRY_BASE_DELAY = 10  # วินาที (หน่วงเพิ่มเป็นเท่าตัวทุกครั้งที่ล้มเหลว)
+RETRY_MAX_DELAY = 60 * 60
+
+
+def task(name=None, max_attempts=5):
+    def decorator(func):
+        func.task_name = name or f'{func.__module__.split(".")[0]}.{func.__name__}'
+        func.max_attempts = max_attempts
+        _registry[func.task_name] = func
+        return func
+    return decorator
+
+
+def get_task(name):
+    return _registry[name]
+
+
+def enqueue(task_or_name, *args, **kwargs):
+    """
+    ส่งงานเข้าคิว (args/kwargs ต้องแปลงเป็น JSON ได้)
+    งานจะเริ่มหลังจาก transaction ปัจจุบัน commit แล้วเท่านั้น
+    """
+    name = getattr(task_or_name, 'task_name', task_or_name)
+    func = get_task(name)
+
+    if settings.TASKS_BACKEND == 'immediate':
+        transaction.on_commit(lambda: _run_immediately(name, func, args, kwargs))
+        return None
+
+    return BackgroundJob.objects.create(
+        task=name, args=list(args), kwargs=kwargs, max_attempts=func.max_attempts,
+    )
+
+
+def _run_immediately(name, func, args, kwargs):
+    # ข้อมูลของ request commit ไปแล้ว งานที่ล้มเหลวจึงไม่ควรทำให้ request ตอบ 500 (ไม่มี retry ในโหมดนี้)
+    try:
+        func(*args, **kwargs)
+    except Exception:
+        logger.exception("งาน %s ล้มเหลว (TASKS_BACKEND='immediate')", name)
+
+
+def claim_jobs(batch_size=10, visibility_timeout=None):
+    """หยิบงานที่ถึงเวลาแล้ว (หรืองานที่ worker ก่อนหน้าค้างจนหมดเวลา) มาทำ"""
+    now = timezone.now()
+    visibility_timeout = visibility_timeout or settings.TASKS_VISIBILITY_TIMEOUT
+    due = Q(status='PENDING', run_at__lte=now) | Q(status='RUNNING', locked_until__lt=now)
+    stuck = Q(status='RUNNING', locked_until__lt=now)
+
+    with transaction.atomic():
+        # งานที่ค้างจนหมดเวลาและใช้ครบจำนวนครั้งแล้ว ไม่หยิบมาทำอีก
+        BackgroundJob.objects.filter(stuck, attempts__gte=F('max_attempts')).update(
+            status='FAILED', locked_until=None, finished_at=now,
+            last_error="worker ค้างจนหมดเวลา (visibility timeout) ครบจำนวนครั้งที่กำหนด",
+        )
+        # skip_locked: worker หลายตัวจะไม่หยิบงานเดียวกัน (Postgres)
+        jobs = list(
+            BackgroundJob.objects
+            .select_for_update(skip_locked=True)
+            .filter(due, attempts__lt=F('max_attempts'))
+            .order_by('run_at')[:batch_size]
+        )
+        BackgroundJob.objects.filter(pk__in=[job.pk for job in jobs]).update(
+            status='RUNNING',
+            attempts=F('attempts') + 1,
+            locked_until=now + timedelta(seconds=visibility_timeout),
+        )
+    for job in jobs:
+        job.status = 'RUNNING'
+        job.attempts += 1
+    return jobs
+
+
+def run_job(job):
+    try:
+        get_task(job.task)(*job.args, **job.kwargs)
+    except Exception:
+        error = traceback.format_exc()
+        logger.exception("งาน %s (#%s) ล้มเหลว ครั้งที่ %s", job.task, job.pk, job.attempts)
+        if job.attempts >= job.max_attempts:
+            job.status = 'FAILED'
+            job.finished_at = timezone.now()
+        else:
+            delay = min(RETRY_BASE_DELAY * 2 ** (job.attempts - 1), RETRY_MAX_DELAY)
+            job.status = 'PENDING'
+            job.run_at = timezone.now() + timedelta(seconds=delay)
+        job.locked_until = None
+        job.last_error = error
+        job.save(update_fields=['status', 'run_at', 'locked_until', 'last_error', 'finished_at'])
+        return False
+
+    job.status = 'DONE'
+    job.locked_until = None
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'locked_until', 'finished_at'])
+    return True
+
+
+def run_pending(batch_size=10):
+    """ทำงานที่ค้างอยู่หนึ่งรอบ คืนค่าจำนวนงานที่หยิบมาทำ"""
+    jobs = claim_jobs(batch_size)
+    for job in jobs:
+        run_job(job)
+    return len(jobs)
@@ -0,0 +1,73 @@
+# core/management/commands/benchmark_scenarios.py
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+from core.benchmarking import client_for, measure
+from core.models import ChatMessage, Post, User
+
+
+def scenarios(post, word):
+    """(ชื่อ, url, login หรือไม่) ของหน้าหลักๆ ที่ผู้ใช้เปิดบ่อย"""
+    chat_url = reverse('chat-api-get', args=[post.pk])
+    last_message_id = ChatMessage.objects.filter(post=post).order_by('-id').values_list('id', flat=True).first() or 0
+    return [
+        ('home', reverse('home'), True),
+        ('home-feed', reverse('home-feed'), True),
+        ('post-list', reverse('post-list'), False),
+        ('post-list category', f"{reverse('post-list')}?category={post.category}", False),
+        ('post-list available', f"{reverse('post-list')}?status=available", False),
+        ('post-list search', f"{reverse('post-list')}?q={word}", False),
+        ('post-detail', reverse('post-detail', args=[post.pk]), True),
+        ('chat history', chat_url, True),
+        # poll ที่ไม่มีข้อความใหม่ = กรณีที่เกิดบ่อยที่สุดของแชท
+        ('chat poll', f'{chat_url}?since_id={last_message_id}', True),
+        ('profile', reverse('profile', args=[post.owner_id]), True),
+        ('notifications', reverse('notification-list'), True),
+    ]
+
+
+class Command(BaseCommand):
+    help = "วัดเวลา/จำนวน query ของหน้าหลักๆ กับข้อมูลในฐานข้อมูลปัจจุบัน (สร้างข้อมูลด้วย seed_data ก่อน)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--user', help="username ที่ใช้ login (ค่าเริ่มต้น: เจ้าของห้องแชทล่าสุดที่มีสมาชิกหลายคน)")
+        parser.add_argument('--json', help="เขียนผลลงไฟล์ JSON ด้วย")
+
+    def handle(self, *args, **options):
+        post = Post.objects.filter(member_count__gt=1).select_related('owner').order_by('-id').first()
+        if post is None:
+            raise CommandError("ไม่มีโพสต์ที่มีสมาชิกหลายคน สร้างข้อมูลก่อนด้วย `python manage.py seed_data`")
+        user = post.owner
+        if options['user']:
+            user = User.objects.filter(username=options['user']).first()
+            if user is None:
+                raise CommandError(f"ไม่พบผู้ใช้ {options['user']}")
+
+        anonymous, member = client_for(), client_for(user)
+        word = post.title.split()[-1]
+        results = []
+        self.stdout.write(f"{'scenario':<22} {'status':>6} {'queries':>8} {'p50':>9} {'p95':>9} {'max':>9}")
+        for name, url, login in scenarios(post, word):
+            result = measure(member if login else anonymous, url, repeat=options['repeat'])
+            result['scenario'] = name
+            results.append(result)
+            line = (
+                f"{name:<22} {result['status']:>6} {result['queries']:>8} "
+                f"{result['p50_ms']:>9.2f} {result['p95_ms']:>9.2f} {result['max_ms']:>9.2f}"
+            )
+            self.stdout.write(self.style.ERROR(line) if result['status'] >= 400 else line)
+
+        if options['json']:
+            with open(options['json'], 'w', encoding='utf-8') as f:
+                json.dump({
+                    'dataset': {
+                        'users': User.objects.count(),
+                        'posts': Post.objects.count(),
+                        'chat_messages': ChatMessage.objects.count(),
+                    },
+                    'results': results,
+                }, f, ensure_ascii=False, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"บันทึกผลที่ {options['json']}"))
@@ -0,0 +1,99 @@
+# core/management/commands/benchmark_templates.py
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.template import Engine, TemplateDoesNotExist, TemplateSyntaxError
+from django.template.backends.django import get_installed_libraries
+from django.test import Client
+
+from core.models import User
+from core.templatecache import iter_template_names, reset_template_cache
+
+
+def _ms(seconds):
+    return f"{seconds * 1000:8.2f} ms"
+
+
+class Command(BaseCommand):
+    help = "วัดเวลาโหลด template ครั้งแรก (worker ใหม่) เทียบกับตอนที่ cached loader จำไว้แล้ว"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20, help="จำนวนรอบที่วัดตอน steady state")
+        parser.add_argument('--top', type=int, default=10, help="แสดง template ที่ช้าที่สุดกี่อันดับ")
+        parser.add_argument(
+            '--url', action='append', default=[],
+            help="วัดเวลา request ทั้งหน้า (ใส่ได้หลายครั้ง) เช่น --url / --url /post",
+        )
+        parser.add_argument('--user', help="username ที่ใช้ login ตอนวัด --url")
+
+    def handle(self, *args, **options):
+        self.benchmark_compile(options['repeat'], options['top'])
+        if options['url']:
+            self.benchmark_requests(options['url'], options['repeat'], options['user'])
+
+    def benchmark_compile(self, repeat, top):
+        # สร้าง engine แยกที่ใช้ cached loader เสมอ (ตอน DEBUG settings จะไม่ใช้ cached loader)
+        config = settings.TEMPLATES[0]
+        engine = Engine(
+            dirs=config['DIRS'],
+            loaders=[('django.template.loaders.cached.Loader', settings.TEMPLATE_LOADERS)],
+            context_processors=config['OPTIONS'].get('context_processors', []),
+            libraries=get_installed_libraries(),
+        )
+
+        rows = []
+        for name in dict.fromkeys(iter_template_names()):
+            for loader in engine.template_loaders:
+                loader.reset()
+            try:
+                started = time.perf_counter()
+                engine.get_template(name)
+                cold = time.perf_counter() - started
+            except (TemplateDoesNotExist, TemplateSyntaxError) as e:
+                self.stderr.write(f"ข้าม {name}: {e}")
+                continue
+
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                engine.get_template(name)
+                timings.append(time.perf_counter() - started)
+            rows.append((name, cold, statistics.median(timings)))
+
+        rows.sort(key=lambda row: row[1], reverse=True)
+        self.stdout.write(f"{'template':<45} {'ครั้งแรก':>11} {'cached':>11}")
+        for name, cold, warm in rows[:top]:
+            self.stdout.write(f"{name:<45} {_ms(cold)} {_ms(warm)}")
+        self.stdout.write(self.style.SUCCESS(
+            f"รวม {len(rows)} template: ครั้งแรก {_ms(sum(row[1] for row in rows))} "
+            f"/ cached {_ms(sum(row[2] for row in rows))}"
+        ))
+
+    def benchmark_requests(self, urls, repeat, username):
+        client = Client()
+        if username:
+            user = User.objects.filter(username=username).first()
+            if user is None:
+                raise CommandError(f"ไม่พบผู้ใช้ {username}")
+            client.force_login(user)
+        if settings.DEBUG:
+            self.stdout.write(self.style.WARNING("DEBUG=True ไม่ได้ใช้ cached loader ผลของ request จะไม่ต่างกันมาก"))
+
+        self.stdout.write(f"\n{'url':<45} {'request แรก':>11} {'steady':>11}")
+        for url in urls:
+            reset_template_cache()
+            started = time.perf_counter()
+            response = client.get(url)
+            first = time.perf_counter() - started
+            if response.status_code >= 400:
+                self.stderr.write(f"{url} ตอบกลับ {response.status_code}")
+                continue
+
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                client.get(url)
+                timings.append(time.perf_counter() - started)
+            self.stdout.write(f"{url:<45} {_ms(first)} {_ms(statistics.median(timings))}")
@@ -0,0 +1,79 @@
+# core/management/commands/benchmark_urls.py
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core.benchmarking import SKIPPED_URLS, build_fixture, case_url_name, run_url_benchmark
+from core.instrumentation import query_budget
+from core.models import ChatMessage, Notification, Post, User
+
+
+class Command(BaseCommand):
+    help = (
+        "วัดจำนวน query (ตอน cache ว่าง) และเวลาของทุก URL ใน core/urls.py เทียบกับ QUERY_BUDGETS "
+        "(ต้องสร้างข้อมูลด้วย seed_data ก่อน) ทุก request ถูกย้อนกลับ ข้อมูลไม่เปลี่ยน"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=10)
+        parser.add_argument('--warmup', type=int, default=1)
+        parser.add_argument('--only', action='append', default=[], help="วัดเฉพาะ URL นี้ (ใส่ได้หลายครั้ง)")
+        parser.add_argument('--json', help="เขียนผลลงไฟล์ JSON (เก็บไว้เทียบกับ commit อื่นด้วย --compare)")
+        parser.add_argument('--compare', help="ไฟล์ JSON จากรอบก่อน แสดงผลต่างของ query และ p95")
+
+    def handle(self, *args, **options):
+        fixture = build_fixture()
+        if fixture is None:
+            raise CommandError("ข้อมูลไม่พอ สร้างก่อนด้วย `python manage.py seed_data`")
+
+        results = run_url_benchmark(fixture, repeat=options['repeat'], warmup=options['warmup'], names=options['only'])
+        previous = {}
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as f:
+                previous = json.load(f)['results']
+
+        failures = []
+        self.stdout.write(f"{'url':<24} {'method':<6} {'status':>6} {'queries':>11} {'p50':>9} {'p95':>9}  ผลต่าง")
+        for name, result in results.items():
+            budget = query_budget(case_url_name(name))
+            result['budget'] = budget
+            over = budget is not None and result['queries'] > budget
+            if over or result['status'] >= 500:
+                failures.append(name)
+
+            diff = ''
+            before = previous.get(name)
+            if before:
+                diff = f"query {result['queries'] - before['queries']:+d}"
+                if before['p95_ms']:
+                    diff += f", p95 {(result['p95_ms'] - before['p95_ms']) / before['p95_ms'] * 100:+.0f}%"
+            line = (
+                f"{name:<24} {result['method']:<6} {result['status']:>6} {result['queries']:>5}/{budget or '-':<5} "
+                f"{result['p50_ms']:>9.2f} {result['p95_ms']:>9.2f}  {diff}"
+            )
+            if name in failures:
+                line = self.style.ERROR(line)
+            elif before and result['queries'] > before['queries']:
+                line = self.style.WARNING(line)
+            self.stdout.write(line)
+        for name, reason in SKIPPED_URLS.items():
+            self.stdout.write(f"{name:<24} ข้าม: {reason}")
+
+        if options['json']:
+            with open(options['json'], 'w', encoding='utf-8') as f:
+                json.dump({
+                    'generated_at': timezone.now().isoformat(),
+                    'repeat': options['repeat'],
+                    'dataset': {
+                        'users': User.objects.count(),
+                        'posts': Post.objects.count(),
+                        'chat_messages': ChatMessage.objects.count(),
+                        'notifications': Notification.objects.count(),
+                    },
+                    'results': results,
+                }, f, ensure_ascii=False, indent=2, sort_keys=True)
+            self.stdout.write(self.style.SUCCESS(f"บันทึกผลที่ {options['json']}"))
+
+        if failures:
+            raise CommandError(f"เกินงบ query หรือ error: {', '.join(failures)}")
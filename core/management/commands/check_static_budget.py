@@ -0,0 +1,61 @@
+# core/management/commands/check_static_budget.py
+import gzip
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management.base import BaseCommand, CommandError
+
+
+def _kb(size):
+    return f"{size / 1024:8.1f} KB"
+
+
+class Command(BaseCommand):
+    help = "ตรวจขนาดไฟล์ static (หลัง gzip) เทียบกับ STATIC_BUDGETS ใช้ใน build.sh หลัง collectstatic"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--budget', action='append', default=[], metavar='PATH=BYTES',
+            help="กำหนดงบเพิ่ม/แทนค่าใน settings เช่น --budget css/dist/styles.css=20000",
+        )
+
+    def locate(self, path):
+        """ไฟล์ที่ผ่าน collectstatic แล้ว (ชื่อมี hash) ถ้ายังไม่ได้ collectstatic ใช้ไฟล์ต้นฉบับในแอป"""
+        try:
+            hashed = staticfiles_storage.path(staticfiles_storage.stored_name(path))
+            if os.path.exists(hashed):
+                return hashed
+        except (AttributeError, ValueError, NotImplementedError):
+            pass
+        return finders.find(path)
+
+    def handle(self, *args, **options):
+        budgets = dict(getattr(settings, 'STATIC_BUDGETS', {}))
+        for item in options['budget']:
+            path, _, size = item.partition('=')
+            if not size.isdigit():
+                raise CommandError(f"--budget ต้องเป็น PATH=BYTES: {item}")
+            budgets[path] = int(size)
+
+        failures = []
+        self.stdout.write(f"{'ไฟล์':<30} {'ขนาดจริง':>11} {'gzip':>11} {'brotli':>11} {'งบ (gzip)':>11}")
+        for path, budget in budgets.items():
+            filename = self.locate(path)
+            if not filename:
+                failures.append(f"{path} ไม่พบไฟล์")
+                continue
+            with open(filename, 'rb') as f:
+                content = f.read()
+            gzipped = len(gzip.compress(content, compresslevel=9))
+            brotli_size = os.path.getsize(f'{filename}.br') if os.path.exists(f'{filename}.br') else None
+            line = f"{path:<30} {_kb(len(content))} {_kb(gzipped)} {_kb(brotli_size) if brotli_size else '-':>11} {_kb(budget)}"
+            if gzipped > budget:
+                failures.append(f"{path} {gzipped:,} bytes เกินงบ {budget:,} bytes")
+                line = self.style.ERROR(line)
+            self.stdout.write(line)
+
+        if failures:
+            raise CommandError("ขนาดไฟล์ static เกินงบ:\n" + "\n".join(failures))
+        self.stdout.write(self.style.SUCCESS("ขนาดไฟล์ static อยู่ในงบ"))
@@ -0,0 +1,73 @@
+# core/management/commands/check_tailwind_classes.py
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.management.base import BaseCommand, CommandError
+from django.template.utils import get_app_template_dirs
+
+BUNDLE = 'css/dist/styles.css'
+CLASS_ATTR = re.compile(r'\bclass\s*=\s*(["\'])(.*?)\1', re.S)
+TEMPLATE_TAG = re.compile(r'\{\{.*?\}\}|\{%.*?%\}', re.S)
+
+
+def css_selector(name):
+    """class selector แบบที่ Tailwind เขียนลง CSS เช่น hover:bg-yellow-400 -> .hover\\:bg-yellow-400"""
+    escaped = re.sub(r'([^A-Za-z0-9_-])', r'\\\1', name)
+    if name[0].isdigit():
+        # ตัวเลขขึ้นต้น selector ไม่ได้ ต้องเขียนเป็น code point เช่น 2xl:flex -> .\32 xl\:flex
+        escaped = f'\\{ord(name[0]):x} {escaped[1:]}'
+    return '.' + escaped
+
+
+def template_classes(path):
+    """class ที่เขียนตรงๆ ใน attribute class="" (ข้ามส่วนที่มาจาก {{ }} / {% %} เพราะรู้ค่าตอน render เท่านั้น)"""
+    text = Path(path).read_text(encoding='utf-8')
+    for match in CLASS_ATTR.finditer(text):
+        for token in TEMPLATE_TAG.sub('\0', match.group(2)).split():
+            if '\0' not in token:
+                yield token
+
+
+def project_template_dirs():
+    """โฟลเดอร์ template ของโปรเจกต์ (ไม่รวม template ของแพ็กเกจที่ติดตั้งมา)"""
+    base = Path(settings.BASE_DIR).resolve()
+    dirs = [Path(d) for engine in settings.TEMPLATES for d in engine.get('DIRS', [])]
+    dirs += [Path(d) for d in get_app_template_dirs('templates')]
+    return sorted({d.resolve() for d in dirs if d.resolve().is_relative_to(base)})
+
+
+class Command(BaseCommand):
+    help = (
+        "ตรวจว่าทุก class ใน template มีอยู่ใน Tailwind CSS ที่ build แล้ว (css/dist/styles.css) "
+        "ใช้ใน build.sh หลัง npm run build กันหน้าเว็บเพี้ยนเพราะ bundle เก่ากว่า template"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--css', help=f"ไฟล์ CSS ที่จะตรวจ (ค่าเริ่มต้น {BUNDLE} ใน static ของแอป)")
+
+    def handle(self, *args, **options):
+        filename = options['css'] or finders.find(BUNDLE)
+        if not filename or not Path(filename).exists():
+            raise CommandError(f"ไม่พบ {options['css'] or BUNDLE} ต้อง build Tailwind ก่อน (npm run build --prefix theme/static_src)")
+        css = Path(filename).read_text(encoding='utf-8')
+        ignored = set(getattr(settings, 'TAILWIND_NON_UTILITY_CLASSES', ()))
+
+        used = {}  # class -> template ที่ใช้
+        for directory in project_template_dirs():
+            for path in directory.rglob('*.html'):
+                for name in template_classes(path):
+                    used.setdefault(name, set()).add(str(path.relative_to(settings.BASE_DIR)))
+
+        missing = {
+            name: paths for name, paths in used.items()
+            if name not in ignored and not re.search(re.escape(css_selector(name)) + r'(?![\w\\-])', css)
+        }
+        if missing:
+            lines = [f"{name}: {', '.join(sorted(paths))}" for name, paths in sorted(missing.items())]
+            raise CommandError(
+                f"class ใน template ที่ไม่มีใน {filename} (build Tailwind ใหม่ หรือเพิ่มใน TAILWIND_NON_UTILITY_CLASSES):\n"
+                + "\n".join(lines)
+            )
+        self.stdout.write(self.style.SUCCESS(f"class ใน template ทั้ง {len(used)} ตัวมีใน {BUNDLE}"))
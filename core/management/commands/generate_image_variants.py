@@ -0,0 +1,38 @@
+# core/management/commands/generate_image_variants.py
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from core.images import IMAGE_VARIANTS, needs_variants, update_default_variants, update_variants
+
+
+class Command(BaseCommand):
+    help = "สร้างรูปย่อ (variant) ให้รูปที่อัปโหลดไว้แล้วทั้งหมด รวมถึงรูปเริ่มต้น (เช่น avatar default.jpg) ที่ใช้ร่วมกัน"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help="สร้างใหม่ทั้งหมด แม้จะมีรูปย่ออยู่แล้ว")
+
+    def handle(self, *args, **options):
+        for key in IMAGE_VARIANTS:
+            model_label, field_name = key.rsplit('.', 1)
+            model = apps.get_model(model_label)
+
+            # รูปเริ่มต้นสร้างครั้งเดียว แล้วทุกแถวที่ยังใช้รูปเริ่มต้นใช้ชุดเดียวกัน
+            try:
+                variants, shared = update_default_variants(model, field_name, force=options['force'])
+                if variants:
+                    self.stdout.write(f"{key}: รูปเริ่มต้น {variants['source']} ใช้ร่วมกัน {shared} รายการ")
+            except (OSError, ValueError) as exc:
+                self.stderr.write(f"{key} รูปเริ่มต้น: {exc}")
+
+            queryset = model.objects.exclude(**{field_name: ''}).exclude(**{f'{field_name}__isnull': True})
+
+            done = 0
+            for instance in queryset.iterator(chunk_size=200):
+                if not options['force'] and not needs_variants(instance, field_name):
+                    continue
+                try:
+                    update_variants(instance, field_name, force=options['force'])
+                    done += 1
+                except (OSError, ValueError) as exc:
+                    self.stderr.write(f"{key} #{instance.pk}: {exc}")
+            self.stdout.write(f"{key}: สร้างรูปย่อ {done} รายการ")
@@ -0,0 +1,70 @@
+# core/management/commands/profile_imports.py
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# บรรทัดจาก python -X importtime: "import time:       123 |       4567 |   package.module"
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$')
+
+
+def _ms(us):
+    return f"{us / 1000:9.1f} ms"
+
+
+class Command(BaseCommand):
+    help = "วัดเวลา import ตอน cold start (python -X importtime) แยกตามแพ็กเกจ"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--module', default='config.wsgi',
+            help="module ที่จะ import (ค่าเริ่มต้น config.wsgi = สิ่งที่ Vercel/gunicorn โหลดตอน cold start)",
+        )
+        parser.add_argument('--top', type=int, default=15, help="แสดงกี่อันดับ")
+        parser.add_argument(
+            '--budget-ms', type=float,
+            help="จบด้วย error ถ้าเวลา import รวมเกินค่านี้ (ใช้ใน CI กัน import หนักๆ หลุดเข้ามา)",
+        )
+        parser.add_argument(
+            '--forbid', action='append', default=[],
+            help="แพ็กเกจที่ต้องไม่ถูก import ตอน start (ใส่ได้หลายครั้ง) เช่น --forbid qrcode --forbid PIL",
+        )
+
+    def handle(self, *args, **options):
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', settings.SETTINGS_MODULE)}
+        # รันใน process ใหม่ทุกครั้ง จะได้เวลาของ cold start จริงๆ (module ใน process นี้ถูก import ไปหมดแล้ว)
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', f"import {options['module']}"],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+        )
+        if result.returncode != 0:
+            raise CommandError(f"import {options['module']} ไม่สำเร็จ:\n{result.stderr[-2000:]}")
+
+        self_time = defaultdict(int)
+        top_level = {}
+        for line in result.stderr.splitlines():
+            match = IMPORTTIME_LINE.match(line)
+            if not match:
+                continue
+            self_us, cumulative_us, indent, name = match.groups()
+            package = name.split('.')[0]
+            self_time[package] += int(self_us)
+            # indent 1 ช่อง = import ระดับบนสุด (ไม่ได้ถูก import ซ้อนอยู่ในอันอื่น)
+            if len(indent) == 1:
+                top_level[name] = int(cumulative_us)
+
+        total = sum(top_level.values())
+        self.stdout.write(f"{'แพ็กเกจ':<30} {'self (รวมทุก module)':>22}")
+        for package, us in sorted(self_time.items(), key=lambda item: item[1], reverse=True)[:options['top']]:
+            self.stdout.write(f"{package:<30} {_ms(us):>22}")
+        self.stdout.write(self.style.SUCCESS(f"import {options['module']} รวม {_ms(total).strip()}"))
+
+        loaded = [package for package in options['forbid'] if package in self_time]
+        if loaded:
+            raise CommandError(f"แพ็กเกจเหล่านี้ถูก import ตอน start: {', '.join(loaded)}")
+        if options['budget_ms'] is not None and total / 1000 > options['budget_ms']:
+            raise CommandError(f"เวลา import {total / 1000:.1f} ms เกินงบ {options['budget_ms']} ms")
@@ -0,0 +1,40 @@
+# core/management/commands/recount_members.py
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, F
+
+from core.membership import refresh_member_count
+from core.models import Post
+
+
+class Command(BaseCommand):
+    help = "ตรวจสอบ/คำนวณ Post.member_count ใหม่จากตาราง members"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check', action='store_true',
+            help="ตรวจสอบอย่างเดียว ไม่แก้ไข (จบด้วย error ถ้าพบค่าไม่ตรง)",
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        mismatched = list(
+            Post.objects
+            .annotate(actual=Count('members'))
+            .exclude(member_count=F('actual'))
+            .values_list('pk', 'member_count', 'actual')
+        )
+
+        for pk, stored, actual in mismatched:
+            self.stdout.write(f"Post #{pk}: member_count={stored} แต่สมาชิกจริง={actual}")
+
+        if options['check']:
+            if mismatched:
+                raise CommandError(f"พบ member_count ไม่ตรง {len(mismatched)} โพสต์")
+            self.stdout.write(self.style.SUCCESS("member_count ถูกต้องทุกโพสต์"))
+            return
+
+        batch_size = options['batch_size']
+        post_ids = [pk for pk, _, _ in mismatched]
+        for start in range(0, len(post_ids), batch_size):
+            refresh_member_count(post_ids[start:start + batch_size])
+        self.stdout.write(self.style.SUCCESS(f"แก้ไข member_count แล้ว {len(post_ids)} โพสต์"))
@@ -0,0 +1,28 @@
+# core/management/commands/rollup_daily_stats.py
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core.adminstats import invalidate_admin_stats, rollup_daily_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "สรุปยอดรายวัน (เรื่องร้องเรียนใหม่, ผู้ใช้ใหม่) ลงตาราง DailyStat สำหรับกราฟหน้า admin "
+        "ตั้งเป็น cron วันละครั้ง หรือสั่งเองหลังลบ/นำเข้าข้อมูลย้อนหลัง"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=2, help="สรุปย้อนหลังกี่วัน ไม่นับวันนี้ (ค่าเริ่มต้น 2)")
+
+    def handle(self, *args, **options):
+        if options['days'] < 1:
+            raise CommandError("--days ต้องมากกว่า 0")
+        yesterday = timezone.localdate() - timedelta(days=1)
+        start = yesterday - timedelta(days=options['days'] - 1)
+        result = rollup_daily_stats(start, yesterday)
+        invalidate_admin_stats()
+        for metric, values in result.items():
+            self.stdout.write(f"{metric}: {sum(values.values())} รายการ ใน {len(values)} วัน")
+        self.stdout.write(self.style.SUCCESS(f"สรุปยอด {start} ถึง {yesterday} แล้ว"))
@@ -0,0 +1,26 @@
+# core/management/commands/run_worker.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.jobs import run_pending
+
+
+class Command(BaseCommand):
+    help = "รัน worker สำหรับงานเบื้องหลัง (ใช้คู่กับ TASKS_BACKEND='database')"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="ทำงานที่ค้างอยู่รอบเดียวแล้วจบ")
+        parser.add_argument('--batch-size', type=int, default=10)
+        parser.add_argument('--sleep', type=float, default=1.0, help="เวลารอ (วินาที) เมื่อไม่มีงานในคิว")
+
+    def handle(self, *args, **options):
+        self.stdout.write("🛠️  เริ่ม worker ...")
+        while True:
+            processed = run_pending(options['batch_size'])
+            if processed:
+                self.stdout.write(f"ทำงานไป {processed} งาน")
+            if options['once']:
+                break
+            if not processed:
+                time.sleep(options['sleep'])
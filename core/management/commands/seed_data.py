@@ -0,0 +1,52 @@
+# core/management/commands/seed_data.py
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.seeding import SeedError, clear_seeded, seed_dataset
+
+
+class Command(BaseCommand):
+    help = "สร้างข้อมูลจำลองจำนวนมากด้วย bulk_create (ดู core/seeding.py) ไว้ทดสอบความเร็ว"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--posts', type=int, default=2000)
+        parser.add_argument('--members', type=int, default=4, help="สมาชิกสูงสุดต่อโพสต์ (รวมเจ้าของ)")
+        parser.add_argument('--messages', type=int, default=20, help="ข้อความแชทต่อห้องที่มีสมาชิกมากกว่า 1 คน")
+        parser.add_argument('--notifications', type=int, default=10, help="แจ้งเตือนต่อผู้ใช้")
+        parser.add_argument('--comments', type=int, default=2, help="คอมเมนต์โปรไฟล์ต่อผู้ใช้")
+        parser.add_argument('--reports', type=int, default=100)
+        parser.add_argument('--seed', type=int, default=42, help="seed เดียวกันได้ข้อมูลชุดเดิม")
+        parser.add_argument('--chunk-size', type=int, default=5000, help="จำนวนแถวต่อ INSERT")
+        parser.add_argument('--clear', action='store_true', help="ลบข้อมูลจาก seed ชุดเก่าก่อน")
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            self.stdout.write(f"ลบข้อมูลเก่า {clear_seeded()} แถว")
+
+        started = time.perf_counter()
+        try:
+            counts = seed_dataset(
+                users=options['users'],
+                posts=options['posts'],
+                members_per_post=options['members'],
+                messages_per_room=options['messages'],
+                notifications_per_user=options['notifications'],
+                comments_per_user=options['comments'],
+                reports=options['reports'],
+                seed=options['seed'],
+                chunk_size=options['chunk_size'],
+                progress=self.progress if options['verbosity'] > 1 else None,
+            )
+        except SeedError as e:
+            raise CommandError(str(e))
+
+        elapsed = time.perf_counter() - started
+        for table, count in counts.items():
+            self.stdout.write(f"{table:<20} {count:>12,}")
+        total = sum(counts.values())
+        self.stdout.write(self.style.SUCCESS(f"สร้าง {total:,} แถวใน {elapsed:.1f} วินาที ({total / elapsed:,.0f} แถว/วินาที)"))
+
+    def progress(self, table, count):
+        self.stdout.write(f"  {table}: {count:,}")
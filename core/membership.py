@@ -0,0 +1,67 @@
+# core/membership.py
+# เช็คว่า user เป็นสมาชิกปาร์ตี้หรือไม่ โดยไม่ต้องโหลดสมาชิกทั้งหมดมาไล่หาใน Python
+# ผลของ EXISTS ถูก cache ไว้สั้นๆ ต่อคู่ (post, user) ใน cache กลาง และถูกลบทุกครั้งที่ members เปลี่ยน (ดู core/signals.py)
+# หน้าแชทที่ poll ทุก 2 วิจึงแทบไม่ต้องถาม DB
+# ถ้ามีหลาย worker ต้องตั้ง CACHE_URL (ดู config/settings.py) ไม่งั้น worker อื่นยังเห็นผลเดิมได้นานสุด MEMBERSHIP_CACHE_TTL
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Post
+
+MEMBERSHIP_CACHE_TTL = 30  # วินาที
+
+
+def _cache_key(post_id, user_id):
+    return f'member:{post_id}:{user_id}'
+
+
+def is_member(post, user):
+    """เป็นเจ้าของหรือสมาชิกของปาร์ตี้นี้หรือไม่ (ใช้ EXISTS บนตาราง members + cache)"""
+    if not user.is_authenticated:
+        return False
+    if post.owner_id == user.pk:
+        return True
+
+    key = _cache_key(post.pk, user.pk)
+    result = cache.get(key)
+    if result is None:
+        result = Post.members.through.objects.filter(post_id=post.pk, user_id=user.pk).exists()
+        cache.set(key, result, MEMBERSHIP_CACHE_TTL)
+    return result
+
+
+def invalidate_membership(post_ids, user_ids):
+    cache.delete_many([_cache_key(post_id, user_id) for post_id in post_ids for user_id in user_ids])
+
+
+def refresh_member_count(post_ids):
+    """นับสมาชิกใหม่จากตาราง members แล้วเขียนลง Post.member_count ใน UPDATE เดียว"""
+    counts = (
+        Post.members.through.objects
+        .filter(post_id=OuterRef('pk'))
+        .order_by()
+        .values('post_id')
+        .annotate(total=Count('*'))
+        .values('total')
+    )
+    return Post.objects.filter(pk__in=post_ids).update(member_count=Coalesce(Subquery(counts), 0))
+
+
+def add_member(post, user):
+    """
+    เพิ่มสมาชิกถ้ายังมีที่ว่าง คืนค่า False ถ้าปาร์ตี้เต็ม
+    จองที่ด้วย conditional UPDATE (member_count < member_limit) เพื่อกันอนุมัติพร้อมกันจนเกินจำนวน
+    """
+    with transaction.atomic():
+        reserved = (
+            Post.objects
+            .filter(pk=post.pk, member_count__lt=F('member_limit'))
+            .update(member_count=F('member_count') + 1)
+        )
+        if not reserved:
+            return False
+        # signal จะนับจำนวนจริงใหม่อีกรอบ (กรณีเป็นสมาชิกอยู่แล้ว ค่าจะถูกแก้กลับให้ถูกต้อง)
+        post.members.add(user)
+    return True
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:11
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_member_count(apps, schema_editor):
+    Post = apps.get_model('core', 'Post')
+    counts = (
+        Post.members.through.objects
+        .filter(post_id=OuterRef('pk'))
+        .order_by()
+        .values('post_id')
+        .annotate(total=Count('*'))
+        .values('total')
+    )
+    Post.objects.update(member_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_notification'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='member_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_member_count, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='post',
+            name='category',
+            field=models.CharField(choices=[('APP', 'แอพ'), ('GAME', 'เกม'), ('MOVIE', 'หนัง'), ('MUSIC', 'ดนตรี'), ('PRODUCT', 'สินค้า'), ('FOOD', 'อาหาร'), ('OTHER', 'อื่นๆ')], max_length=10),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:13
+
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+from core.search import normalize_search_text
+
+
+def backfill_search_text(apps, schema_editor):
+    Post = apps.get_model('core', 'Post')
+    posts = list(Post.objects.only('pk', 'title', 'description'))
+    for post in posts:
+        post.search_text = normalize_search_text(post.title, post.description)
+    Post.objects.bulk_update(posts, ['search_text'], batch_size=1000)
+
+
+# GIN trigram index ใช้ได้เฉพาะ Postgres (SQLite ตอนรันเทสต์จะข้ามไป)
+def create_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE INDEX IF NOT EXISTS core_post_search_text_trgm '
+            'ON core_post USING gin (search_text gin_trgm_ops)'
+        )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS core_post_search_text_trgm')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_post_member_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='search_text',
+            field=models.TextField(default='', editable=False),
+        ),
+        migrations.RunPython(backfill_search_text, migrations.RunPython.noop),
+        TrigramExtension(),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
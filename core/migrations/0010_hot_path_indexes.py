@@ -0,0 +1,70 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:13
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+# ลบคำขอที่ซ้ำกันก่อนเพิ่ม unique constraint (เก็บอันที่อนุมัติแล้ว > รออนุมัติ > ถูกปฏิเสธ แล้วเอาอันล่าสุด)
+STATUS_PRIORITY = {'APPROVED': 0, 'PENDING': 1, 'REJECTED': 2}
+
+
+def dedupe_join_requests(apps, schema_editor):
+    JoinRequest = apps.get_model('core', 'JoinRequest')
+    duplicates = (
+        JoinRequest.objects.values('post_id', 'user_id')
+        .annotate(total=Count('id'))
+        .filter(total__gt=1)
+    )
+    for group in duplicates:
+        requests = sorted(
+            JoinRequest.objects.filter(post_id=group['post_id'], user_id=group['user_id']),
+            key=lambda req: (STATUS_PRIORITY.get(req.status, 3), -req.pk),
+        )
+        JoinRequest.objects.filter(pk__in=[req.pk for req in requests[1:]]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_post_search_text'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='chatmessage',
+            index=models.Index(fields=['post', 'id'], name='chatmessage_post_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='joinrequest',
+            index=models.Index(fields=['post', 'status'], name='joinrequest_post_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['recipient', '-created_at'], name='noti_recipient_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('is_read', False)), fields=['recipient', '-created_at'], name='noti_recipient_unread_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['-created_at', '-id'], name='post_feed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['category', '-created_at'], name='post_category_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='report',
+            index=models.Index(fields=['status', '-created_at'], name='report_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='report',
+            index=models.Index(fields=['reporter', '-created_at'], name='report_reporter_created_idx'),
+        ),
+        migrations.RunPython(dedupe_join_requests, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='joinrequest',
+            constraint=models.UniqueConstraint(fields=('post', 'user'), name='unique_join_request'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_billsplit'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('metric', models.CharField(choices=[('reports', 'เรื่องร้องเรียนใหม่'), ('users', 'ผู้ใช้ใหม่')], max_length=20)),
+                ('date', models.DateField()),
+                ('value', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('metric', 'date'), name='unique_daily_stat')],
+            },
+        ),
+    ]
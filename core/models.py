@@ -1,12 +1,17 @@
 # core/models.py
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import AbstractUser
 
+from .search import normalize_search_text
+
 # 1. ข้อมูลผู้ใช้
 class User(AbstractUser):
     bio = models.TextField(blank=True, null=True)
     phone_number = models.CharField(max_length=15, blank=True, null=True)
     profile_picture = models.ImageField(upload_to='profile_pics/', default='profile_pics/default.jpg')
+    # ชื่อไฟล์รูปย่อ (สร้างโดย core/images.py)
+    profile_picture_variants = models.JSONField(default=dict, blank=True, editable=False)
 
 # 2. ข้อมูลโพสต์
 class Post(models.Model):
@@ -30,10 +35,24 @@ class Post(models.Model):
     # divided_price = models.DecimalField(max_digits=10, decimal_places=2) 
     
     image = models.ImageField(upload_to='post_images/', blank=True, null=True)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='owned_posts')
     members = models.ManyToManyField(User, related_name='joined_posts', blank=True)
+    # จำนวนสมาชิก (รวมเจ้าของ) เก็บไว้ตรงๆ จะได้ไม่ต้อง COUNT ทุกครั้ง
+    # อัปเดตอัตโนมัติทุกครั้งที่ members เปลี่ยน (ดู core/signals.py) ห้ามแก้เองตรงๆ
+    member_count = models.PositiveIntegerField(default=0, editable=False)
+    # title + description ที่ normalize แล้ว ใช้สำหรับค้นหา (มี trigram index บน Postgres)
+    search_text = models.TextField(default='', editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # ฟีดหน้าแรก: ORDER BY created_at DESC, id DESC
+            models.Index(fields=['-created_at', '-id'], name='post_feed_idx'),
+            # หน้ารายการโพสต์กรองตามหมวดหมู่ เรียงใหม่สุดก่อน
+            models.Index(fields=['category', '-created_at'], name='post_category_created_idx'),
+        ]
+
     @property
     def divided_price(self):
         """
@@ -44,8 +63,21 @@ class Post(models.Model):
             return round(self.full_price / self.member_limit, 2)
         return self.full_price
     def save(self, *args, **kwargs):
-        # ตรวจสอบว่าเป็นโพสต์ที่สร้างใหม่หรือไม่ (ยังไม่มี ID)
-        is_new = self.pk is None 
+        # ตรวจสอบว่าเป็นโพสต์ที่สร้างใหม่หรือไม่ (ใช้ _state.adding ไม่ใช่ pk เพราะ fixture อาจกำหนด pk มาเอง)
+        is_new = self._state.adding
+
+        # อัปเดตข้อความสำหรับค้นหาทุกครั้งที่บันทึก
+        self.search_text = normalize_search_text(self.title, self.description)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'title', 'description'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'search_text'}
+
+        # ตอนแก้ไขโพสต์ ไม่เขียนทับ member_count (ค่าใน object อาจเก่ากว่าใน DB)
+        if not is_new and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'member_count'
+            ]
         
         # บันทึกข้อมูลโพสต์ลงฐานข้อมูลก่อน (เพื่อให้มี ID สำหรับสร้างความสัมพันธ์)
         super().save(*args, **kwargs)
@@ -53,6 +85,7 @@ class Post(models.Model):
         # ถ้าเป็นโพสต์ใหม่ ให้เพิ่ม owner เข้าไปใน members ทันที
         if is_new and self.owner:
             self.members.add(self.owner)
+            self.member_count = 1
     def __str__(self):
         return self.title
 
@@ -68,6 +101,16 @@ class JoinRequest(models.Model):
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
     requested_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        constraints = [
+            # 1 คนขอเข้าร่วม 1 โพสต์ได้ครั้งเดียว (ทำให้ get_or_create ไม่สร้างซ้ำตอนกดพร้อมกัน)
+            models.UniqueConstraint(fields=['post', 'user'], name='unique_join_request'),
+        ]
+        indexes = [
+            # คำขอที่รออนุมัติของโพสต์ (หน้า post detail ของเจ้าของ)
+            models.Index(fields=['post', 'status'], name='joinrequest_post_status_idx'),
+        ]
+
     def __str__(self):
         return f'{self.user.username} requests to join {self.post.title}'
 
@@ -77,11 +120,35 @@ class ChatMessage(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     message = models.TextField(blank=True, null=True)
     image = models.ImageField(upload_to='chat_images/', blank=True, null=True)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     timestamp = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # API แชทดึงข้อความตาม post แล้วใช้ id เป็น cursor (since_id / before_id)
+            models.Index(fields=['post', 'id'], name='chatmessage_post_id_idx'),
+        ]
+
     def __str__(self):
         return f'Message by {self.user.username} in {self.post.title}'
 
+# บิลที่หารไว้ของโพสต์ (คำนวณด้วย core/billsplit.py) สมาชิกดูยอดของตัวเองแล้วสแกนจ่ายได้เลย
+class BillSplit(models.Model):
+    post = models.OneToOneField(Post, on_delete=models.CASCADE, related_name='bill_split')
+    # ข้อมูลที่กรอก (people, items, service_charge, vat) เก็บไว้ให้เปิดมาแก้ต่อได้
+    bill = models.JSONField(default=dict)
+    # ยอดที่แต่ละคนต้องจ่าย {"ชื่อ": "123.45"}
+    shares = models.JSONField(default=dict)
+    total = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    updated_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'Bill of {self.post.title} ({self.total})'
+
+    def share_for(self, user):
+        return self.shares.get(user.username)
+
 # 5. คอมเมนต์โปรไฟล์
 class ProfileComment(models.Model):
     profile_owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='comments_received')
@@ -95,6 +162,7 @@ class ProfileComment(models.Model):
 
 class Report(models.Model):
     evidence_image = models.ImageField(upload_to='report_evidence/', blank=True, null=True, verbose_name='หลักฐานประกอบ (รูปภาพ)')
+    evidence_image_variants = models.JSONField(default=dict, blank=True, editable=False)
     resolution_note = models.TextField(verbose_name='รายละเอียดการแก้ไข', blank=True, null=True)
     CATEGORY_CHOICES = [
         ('BUG', 'แจ้งปัญหาการใช้งาน/บั๊ก'),
@@ -119,6 +187,13 @@ class Report(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING', verbose_name='สถานะ')
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # หน้า admin กรองตามสถานะ / หน้า "รายงานของฉัน" กรองตามผู้แจ้ง ทั้งคู่เรียงใหม่สุดก่อน
+            models.Index(fields=['status', '-created_at'], name='report_status_created_idx'),
+            models.Index(fields=['reporter', '-created_at'], name='report_reporter_created_idx'),
+        ]
+
     def __str__(self):
         return f"[{self.get_status_display()}] {self.title} - โดย {self.reporter.username}"
     
@@ -131,10 +206,77 @@ class Notification(models.Model):
     message = models.CharField(max_length=255)
     link = models.CharField(max_length=255, blank=True, null=True) # ลิงก์ไปหน้าปาร์ตี้
     is_read = models.BooleanField(default=False)
+    # ประเภทเหตุการณ์ (เช่น join_request) ใช้รวมแจ้งเตือนซ้ำๆ ที่ยังไม่อ่านให้เหลืออันเดียว
+    event = models.CharField(max_length=30, blank=True, default='')
+    event_count = models.PositiveIntegerField(default=1)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # รายการแจ้งเตือนของแต่ละคน เรียงใหม่สุดก่อน
+            models.Index(fields=['recipient', '-created_at'], name='noti_recipient_created_idx'),
+            # นับจำนวนที่ยังไม่อ่าน (partial index เก็บเฉพาะแถวที่ is_read = False)
+            models.Index(
+                fields=['recipient', '-created_at'],
+                name='noti_recipient_unread_idx',
+                condition=models.Q(is_read=False),
+            ),
+        ]
+
+    def __str__(self):
+        return f"To {self.recipient.username}: {self.message}"
+
+
+
+# ยอดรายวันที่สรุปไว้ล่วงหน้า (rollup) สำหรับกราฟในหน้า admin อ่านจากตารางนี้แทนการนับจากตารางจริงทุกครั้ง
+# วันที่ผ่านไปแล้วไม่เปลี่ยน สรุปครั้งเดียวพอ ดู core/adminstats.py
+class DailyStat(models.Model):
+    METRIC_CHOICES = [
+        ('reports', 'เรื่องร้องเรียนใหม่'),
+        ('users', 'ผู้ใช้ใหม่'),
+    ]
+
+    metric = models.CharField(max_length=20, choices=METRIC_CHOICES)
+    date = models.DateField()
+    value = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['metric', 'date'], name='unique_daily_stat'),
+        ]
+
+    def __str__(self):
+        return f"{self.metric} {self.date}: {self.value}"
+
+# งานเบื้องหลัง (background job) สำหรับงานช้าๆ เช่น อัปโหลดรูปขึ้น Cloudinary, ส่งอีเมล
+# worker (python manage.py run_worker) จะดึงงานจากตารางนี้ไปทำ ดู core/jobs.py
+class BackgroundJob(models.Model):
+    STATUS_CHOICES = [
+        ('PENDING', 'รอทำงาน'),
+        ('RUNNING', 'กำลังทำงาน'),
+        ('DONE', 'สำเร็จ'),
+        ('FAILED', 'ล้มเหลว'),
+    ]
+
+    task = models.CharField(max_length=100)
+    args = models.JSONField(default=list, blank=True)
+    kwargs = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)
+    # ถ้า worker ค้าง/ตายระหว่างทำงาน พ้นเวลานี้แล้วงานจะถูกหยิบไปทำใหม่ (visibility timeout)
+    locked_until = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_at'], name='job_status_run_at_idx'),
+        ]
 
     def __str__(self):
-        return f"To {self.recipient.username}: {self.message}"
\ No newline at end of file
+        return f"{self.task} [{self.get_status_display()}]"
@@ -0,0 +1,110 @@
+# core/notifications.py
+# ระบบแจ้งเตือน
+# - notify(): ส่งแจ้งเตือนหาผู้รับหลายคนใน INSERT เดียว (bulk_create) และรวมเหตุการณ์ซ้ำที่ยังไม่อ่าน
+# - จำนวนที่ยังไม่อ่านของแต่ละคน (badge บนทุกหน้า) cache ไว้สั้นๆ และถูกลบทิ้งเมื่อมีแจ้งเตือนใหม่/อ่านแล้ว
+#   ไม่บวก/ลบค่าใน cache เพราะ locmem แยกกันต่อ process (web หลายตัว, run_worker) ตัวเลขจะเพี้ยนไม่กลับมาตรง
+#   ลบทิ้งแล้วนับใหม่ถูกเสมอ ส่วน process อื่นที่ยังถือค่าเก่าอยู่จะช้ากว่าจริงไม่เกิน UNREAD_CACHE_TTL
+from django.core.cache import cache
+from django.utils import timezone
+
+from .jobs import enqueue
+from .models import Notification
+
+UNREAD_CACHE_TTL = 15  # วินาที
+
+
+def _unread_key(user_id):
+    return f'noti-unread:{user_id}'
+
+
+def get_unread_count(user):
+    key = _unread_key(user.pk)
+    count = cache.get(key)
+    if count is None:
+        count = Notification.objects.filter(recipient=user, is_read=False).count()
+        cache.set(key, count, UNREAD_CACHE_TTL)
+    return count
+
+
+def invalidate_unread_count(user_ids):
+    cache.delete_many([_unread_key(user_id) for user_id in user_ids])
+
+
+def mark_read(notification):
+    """ทำเครื่องหมายว่าอ่านแล้ว (ลด badge เฉพาะกรณีที่ยังไม่เคยอ่าน)"""
+    updated = Notification.objects.filter(pk=notification.pk, is_read=False).update(is_read=True)
+    notification.is_read = True
+    if updated:
+        invalidate_unread_count([notification.recipient_id])
+
+
+def mark_all_read(user):
+    updated = Notification.objects.filter(recipient=user, is_read=False).update(is_read=True)
+    if updated:
+        invalidate_unread_count([user.pk])
+
+
+def _recipient_ids(recipients, exclude=None):
+    ids = {getattr(recipient, 'pk', recipient) for recipient in recipients}
+    if exclude is not None:
+        ids.discard(getattr(exclude, 'pk', exclude))
+    ids.discard(None)
+    return ids
+
+
+def deliver(recipient_ids, message, sender_id=None, post_id=None, link=None, event='', coalesce_message=None):
+    """
+    บันทึกแจ้งเตือนลง DB
+    ถ้ามี event + coalesce_message และผู้รับมีแจ้งเตือนเดิม (event เดียวกัน, โพสต์เดียวกัน) ที่ยังไม่อ่าน
+    จะอัปเดตอันเดิมเป็น "ข้อความรวม" แทนการสร้างใหม่ เช่น "มีคำขอเข้าร่วมใหม่ 3 รายการ"
+    """
+    recipient_ids = set(recipient_ids)
+    now = timezone.now()
+
+    if event and coalesce_message:
+        existing = list(
+            Notification.objects.filter(
+                recipient_id__in=recipient_ids, post_id=post_id, event=event, is_read=False,
+            )
+        )
+        for notification in existing:
+            notification.event_count += 1
+            notification.message = coalesce_message.replace('{count}', str(notification.event_count))
+            notification.sender_id = sender_id
+            notification.created_at = now  # ดันขึ้นไปบนสุดของรายการ
+            recipient_ids.discard(notification.recipient_id)
+        Notification.objects.bulk_update(existing, ['event_count', 'message', 'sender', 'created_at'])
+
+    # bulk_create ไม่ส่ง post_save signal จึงต้องล้าง badge เอง
+    Notification.objects.bulk_create([
+        Notification(
+            recipient_id=recipient_id, sender_id=sender_id, post_id=post_id,
+            message=message, link=link, event=event,
+        )
+        for recipient_id in recipient_ids
+    ])
+    invalidate_unread_count(recipient_ids)
+
+
+def notify(recipients, message, *, sender=None, post=None, link=None, event='',
+           coalesce_message=None, exclude=None, defer=False):
+    """
+    ส่งแจ้งเตือนหาผู้รับทุกคนใน recipients (User หรือ id ก็ได้, ซ้ำกันได้)
+    defer=True จะส่งผ่านงานเบื้องหลัง (core/jobs.py) ไม่ให้ request ต้องรอ
+    """
+    recipient_ids = _recipient_ids(recipients, exclude=exclude)
+    if not recipient_ids:
+        return
+
+    kwargs = {
+        'message': message,
+        'sender_id': getattr(sender, 'pk', sender),
+        'post_id': getattr(post, 'pk', post),
+        'link': link,
+        'event': event,
+        'coalesce_message': coalesce_message,
+    }
+    if defer:
+        enqueue('core.deliver_notifications', sorted(recipient_ids), **kwargs)
+    else:
+        deliver(recipient_ids, **kwargs)
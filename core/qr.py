@@ -0,0 +1,138 @@
+# core/qr.py
+# สร้าง QR Code PromptPay
+# รูป QR ขึ้นกับ (เบอร์/เลขบัตร, ยอดเงิน) เท่านั้น จึง cache ได้ 2 ชั้น:
+#   1. LRU ใน process (เร็วสุด ไม่ต้องผ่าน network)
+#   2. cache กลางของ Django (ใช้ร่วมกันทุก worker)
+# qrcode/promptpay import ตอนต้องวาดรูปจริงเท่านั้น (ไม่ให้ทุก worker/cold start ต้องโหลด)
+import hashlib
+import io
+import re
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import cache
+
+QR_FORMATS = {
+    'png': 'image/png',
+    'svg': 'image/svg+xml',
+}
+QR_LRU_SIZE = 256
+QR_CACHE_TTL = 60 * 60 * 24 * 7
+# เปลี่ยนเลขนี้เมื่อเปลี่ยนวิธีวาดรูป เพื่อให้ ETag/cache เก่าใช้ไม่ได้
+QR_RENDER_VERSION = 1
+# จำนวน QR สูงสุดต่อ 1 request แบบ batch
+QR_BATCH_MAX = 100
+
+
+class InvalidQRRequest(ValueError):
+    pass
+
+
+def normalize_qr_key(pp_id, amount, fmt='png'):
+    """
+    แปลงค่าที่รับมาให้อยู่ในรูปเดียวกันเสมอ ('080-123-4567', '50' กับ '0801234567', '50.00' ได้ key เดียวกัน)
+    คืนค่า (pp_id, amount เป็น string ทศนิยม 2 ตำแหน่ง, fmt)
+    """
+    # เก็บแต่ตัวเลข (แบบเดียวกับ promptpay.qrcode.sanitize_target)
+    pp_id = re.sub(r'\D', '', pp_id or '')
+    # เบอร์มือถือ 10 หลัก / เลขบัตร 13 หลัก / e-Wallet 15 หลัก
+    if not 10 <= len(pp_id) <= 15:
+        raise InvalidQRRequest("PromptPay ID ไม่ถูกต้อง")
+
+    try:
+        amount = Decimal(str(amount or 0)).quantize(Decimal('0.01'))
+    except InvalidOperation:
+        raise InvalidQRRequest("จำนวนเงินไม่ถูกต้อง")
+    if not amount.is_finite() or amount < 0 or amount >= Decimal('10000000'):
+        raise InvalidQRRequest("จำนวนเงินไม่ถูกต้อง")
+
+    fmt = (fmt or 'png').lower()
+    if fmt not in QR_FORMATS:
+        raise InvalidQRRequest("รองรับเฉพาะ png หรือ svg")
+    return pp_id, str(amount), fmt
+
+
+def qr_etag(pp_id, amount, fmt):
+    # คำนวณได้โดยไม่ต้องวาดรูป จึงตอบ 304 ได้ทันที
+    raw = f'{QR_RENDER_VERSION}:{fmt}:{pp_id}:{amount}'
+    return hashlib.sha256(raw.encode()).hexdigest()[:32]
+
+
+def _render(payload, fmt):
+    import qrcode
+    import qrcode.image.svg
+
+    buffer = io.BytesIO()
+    if fmt == 'svg':
+        # SVG เป็นแค่ข้อความ path ไม่ต้อง rasterize จึงเร็วกว่า PNG มาก
+        qrcode.make(payload, image_factory=qrcode.image.svg.SvgPathImage).save(buffer)
+    else:
+        qrcode.make(payload).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+@lru_cache(maxsize=QR_LRU_SIZE)
+def _get_qr_image(pp_id, amount, fmt):
+    key = f'qr:{QR_RENDER_VERSION}:{fmt}:{pp_id}:{amount}'
+    content = cache.get(key)
+    if content is None:
+        from promptpay import qrcode as promptpay_qrcode
+
+        payload = promptpay_qrcode.generate_payload(pp_id, float(amount))
+        content = _render(payload, fmt)
+        cache.set(key, content, QR_CACHE_TTL)
+    return content
+
+
+def get_qr_image(pp_id, amount, fmt='png'):
+    """คืนค่า (bytes ของรูป, content type) รับค่าดิบได้เลย จะ normalize ให้เอง"""
+    pp_id, amount, fmt = normalize_qr_key(pp_id, amount, fmt)
+    return _get_qr_image(pp_id, amount, fmt), QR_FORMATS[fmt]
+
+
+def _safe_filename(label):
+    return re.sub(r'[^\w.-]+', '_', label).strip('._') or 'qr'
+
+
+def build_qr_batch(items, fmt='png'):
+    """
+    สร้าง QR หลายรูปในครั้งเดียวแล้วรวมเป็นไฟล์ zip
+    items: list ของ (label, pp_id, amount) เช่นรายชื่อสมาชิกกับยอดที่แต่ละคนต้องจ่าย
+    รายการที่ (id, amount) ซ้ำกันจะวาดแค่ครั้งเดียว ที่เหลือวาดพร้อมกันใน thread pool
+    """
+    if not items:
+        raise InvalidQRRequest("ไม่มีรายการ")
+    if len(items) > QR_BATCH_MAX:
+        raise InvalidQRRequest(f"สร้างได้ไม่เกิน {QR_BATCH_MAX} รายการต่อครั้ง")
+
+    # ตรวจทุกรายการก่อนเริ่มวาด จะได้ไม่เสียแรงวาดถ้ามีรายการไหนผิด
+    normalized = []
+    for index, (label, pp_id, amount) in enumerate(items, start=1):
+        try:
+            key = normalize_qr_key(pp_id, amount, fmt)
+        except InvalidQRRequest as e:
+            raise InvalidQRRequest(f"รายการที่ {index}: {e}")
+        normalized.append((label or f'qr-{index}', key))
+
+    unique_keys = list(dict.fromkeys(key for _, key in normalized))
+    workers = max(1, min(getattr(settings, 'QR_BATCH_WORKERS', 4), len(unique_keys)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        images = dict(zip(unique_keys, pool.map(lambda key: _get_qr_image(*key), unique_keys)))
+
+    buffer = io.BytesIO()
+    # PNG บีบอัดมาแล้ว เก็บแบบไม่บีบซ้ำ ส่วน SVG เป็นข้อความ บีบได้อีกมาก
+    compression = zipfile.ZIP_DEFLATED if fmt == 'svg' else zipfile.ZIP_STORED
+    used_names = set()
+    with zipfile.ZipFile(buffer, 'w', compression) as archive:
+        for label, key in normalized:
+            _, amount, ext = key
+            base = f'{_safe_filename(label)}_{amount}'
+            name, counter = f'{base}.{ext}', 2
+            while name in used_names:
+                name, counter = f'{base}-{counter}.{ext}', counter + 1
+            used_names.add(name)
+            archive.writestr(name, images[key])
+    return buffer.getvalue()
@@ -0,0 +1,52 @@
+# core/search.py
+# ค้นหาโพสต์จาก title + description
+# ภาษาไทยไม่มีการเว้นวรรคระหว่างคำ full-text search แบบตัดคำ (tsvector) จึงใช้ไม่ได้ดี
+# เลยใช้ trigram (pg_trgm) บนคอลัมน์ Post.search_text ที่ normalize ไว้แล้วแทน
+# บน Postgres จะได้ GIN index + จัดอันดับด้วยความคล้าย ส่วน SQLite (ตอนรันเทสต์) ใช้ LIKE ธรรมดา
+import re
+import unicodedata
+
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db import connection
+from django.db.models import Case, FloatField, Value, When
+
+# zero-width space/joiner มักติดมากับข้อความไทยที่ copy มาจากเว็บอื่น
+_INVISIBLE_CHARS = re.compile('[\u200b\u200c\u200d\u2060\ufeff]')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_search_text(*parts):
+    text = ' '.join(part for part in parts if part)
+    text = unicodedata.normalize('NFC', text)
+    text = _INVISIBLE_CHARS.sub('', text)
+    # นิคหิต + สระอา (ํ + า) ที่พิมพ์แยกกัน ให้เป็นสระอำตัวเดียว
+    text = text.replace('\u0e4d\u0e32', '\u0e33')
+    return _WHITESPACE.sub(' ', text).strip().casefold()
+
+
+def filter_search(queryset, query):
+    """กรองโพสต์ที่มีทุกคำในคำค้นหา (ไม่จัดอันดับ ใช้ตอนนับจำนวน)"""
+    normalized = normalize_search_text(query or '')
+    for term in normalized.split(' ') if normalized else []:
+        queryset = queryset.filter(search_text__contains=term)
+    return queryset
+
+
+def search_posts(queryset, query):
+    """กรองโพสต์ที่มีทุกคำในคำค้นหา แล้วเรียงตามความเกี่ยวข้อง (ใหม่กว่าก่อนถ้าคะแนนเท่ากัน)"""
+    normalized = normalize_search_text(query)
+    if not normalized:
+        return queryset
+
+    queryset = filter_search(queryset, normalized)
+
+    if connection.vendor == 'postgresql':
+        rank = TrigramWordSimilarity(normalized, 'search_text')
+    else:
+        # SQLite ไม่มี pg_trgm: ให้คะแนนโพสต์ที่คำค้นอยู่ในชื่อสูงกว่าอยู่ในรายละเอียด
+        rank = Case(
+            When(title__icontains=query.strip(), then=Value(1.0)),
+            default=Value(0.5),
+            output_field=FloatField(),
+        )
+    return queryset.annotate(rank=rank).order_by('-rank', '-created_at')
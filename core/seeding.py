@@ -0,0 +1,254 @@
+# core/seeding.py
+# สร้างข้อมูลจำลองปริมาณมาก (หลักแสน-ล้านแถว) สำหรับทดสอบความเร็ว ใช้ผ่าน `python manage.py seed_data`
+# - insert ด้วย bulk_create เป็นก้อนๆ (ไม่เรียก save() / signal ทีละแถว)
+# - seed เดียวกันได้ข้อมูลชุดเดิมทุกครั้ง (ยกเว้นเลข id ที่ database เป็นคนออก)
+# - ผู้ใช้ที่สร้างขึ้นต้นด้วย SEED_USERNAME_PREFIX ลบทั้งชุดได้ด้วย clear_seeded() (DELETE ทีละตาราง ไม่ผ่าน Collector)
+# ข้อมูลชุดเล็กสำหรับลองกดเล่นตาม flow ต่างๆ ยังใช้ scripts/load_mock_data.py ได้เหมือนเดิม
+import random
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models import Q
+
+from .membership import refresh_member_count
+from .models import BillSplit, ChatMessage, JoinRequest, Notification, Post, ProfileComment, Report, User
+from .search import normalize_search_text
+
+SEED_USERNAME_PREFIX = 'seed_'
+SEED_PASSWORD = '1234'
+# ขนาดคลังข้อความที่สุ่มจาก Faker ไว้ก่อน (เรียก Faker ทีละแถวช้าเกินไปสำหรับข้อมูลหลักล้าน)
+TEXT_POOL_SIZE = 500
+
+
+class SeedError(Exception):
+    pass
+
+
+class _BulkWriter:
+    """สะสม object ไว้แล้ว insert ทีเดียวเมื่อครบ chunk_size"""
+
+    def __init__(self, model, chunk_size, progress=None):
+        self.model = model
+        self.chunk_size = chunk_size
+        self.progress = progress
+        self.rows = []
+        self.count = 0
+
+    def add(self, obj):
+        self.rows.append(obj)
+        if len(self.rows) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        if not self.rows:
+            return []
+        created = self.model._default_manager.bulk_create(self.rows, batch_size=self.chunk_size)
+        self.count += len(created)
+        self.rows = []
+        if self.progress:
+            self.progress(self.model._meta.verbose_name_plural, self.count)
+        return created
+
+
+def _text_pools(seed):
+    from faker import Faker
+
+    fake = Faker('th_TH')
+    fake.seed_instance(seed)
+    return {
+        'first_names': [fake.first_name() for _ in range(TEXT_POOL_SIZE)],
+        'last_names': [fake.last_name() for _ in range(TEXT_POOL_SIZE)],
+        'words': [fake.word() for _ in range(TEXT_POOL_SIZE)],
+        'sentences': [fake.sentence() for _ in range(TEXT_POOL_SIZE)],
+        'paragraphs': [fake.text(max_nb_chars=200) for _ in range(TEXT_POOL_SIZE // 5)],
+    }
+
+
+def seeded_users():
+    return User.objects.filter(username__startswith=SEED_USERNAME_PREFIX)
+
+
+def _raw_delete(queryset):
+    # DELETE ... WHERE ตรงๆ (ไม่โหลดแถวขึ้นมาใน Python และไม่ส่ง signal)
+    return queryset._raw_delete(queryset.db)
+
+
+def clear_seeded(chunk_size=1000):
+    """
+    ลบผู้ใช้ที่สร้างจาก seed_dataset พร้อมข้อมูลทุกตารางที่ผูกกับคนเหล่านั้น คืนค่าจำนวนแถวที่ลบ
+    .delete() ปกติจะให้ Collector โหลดทุกแถวที่ cascade ถึงขึ้นมาใน Python ก่อน (ข้อมูลหลักล้านแถวช้าและกิน memory มาก)
+    จึงลบตาราง core ทีละตารางเอง ทีละ chunk_size คน แล้วค่อยลบตัว user (ตารางที่เหลือ เช่น allauth ให้ Collector จัดการ)
+    """
+    user_ids = list(seeded_users().order_by().values_list('pk', flat=True))
+    Membership = Post.members.through
+    deleted = 0
+    for start in range(0, len(user_ids), chunk_size):
+        ids = user_ids[start:start + chunk_size]
+        posts = Post.objects.filter(owner_id__in=ids).values('pk')
+        with transaction.atomic():
+            # โพสต์ของคนอื่นที่มีสมาชิกจาก seed ต้องนับ member_count ใหม่หลังลบ
+            other_posts = list(
+                Membership.objects.filter(user_id__in=ids).exclude(post_id__in=posts)
+                .values_list('post_id', flat=True).distinct()
+            )
+            for queryset in (
+                Notification.objects.filter(Q(recipient_id__in=ids) | Q(post_id__in=posts)),
+                ChatMessage.objects.filter(Q(user_id__in=ids) | Q(post_id__in=posts)),
+                JoinRequest.objects.filter(Q(user_id__in=ids) | Q(post_id__in=posts)),
+                Membership.objects.filter(Q(user_id__in=ids) | Q(post_id__in=posts)),
+                BillSplit.objects.filter(post_id__in=posts),
+                ProfileComment.objects.filter(Q(profile_owner_id__in=ids) | Q(author_id__in=ids)),
+                Report.objects.filter(reporter_id__in=ids),
+                Post.objects.filter(owner_id__in=ids),
+            ):
+                deleted += _raw_delete(queryset)
+            # on_delete=SET_NULL
+            Notification.objects.filter(sender_id__in=ids).update(sender=None)
+            BillSplit.objects.filter(updated_by_id__in=ids).update(updated_by=None)
+            refresh_member_count(other_posts)
+            deleted += User.objects.filter(pk__in=ids).delete()[0]
+    return deleted
+
+
+def seed_dataset(*, users=1000, posts=2000, members_per_post=4, messages_per_room=20,
+                 notifications_per_user=10, comments_per_user=2, reports=100, seed=42, chunk_size=5000,
+                 progress=None):
+    """
+    สร้างข้อมูลจำลองตามจำนวนที่กำหนด คืนค่า dict ของจำนวนแถวที่สร้างแต่ละตาราง
+    members_per_post คือจำนวนสมาชิกสูงสุดต่อโพสต์ (รวมเจ้าของ) แต่ละโพสต์สุ่มได้ 1 ถึงค่านี้
+    ผู้ใช้คนแรก (seed_0000000) เป็น staff ไว้เปิดหน้า admin
+    """
+    if users < 2:
+        raise SeedError("ต้องมีผู้ใช้อย่างน้อย 2 คน")
+    if seeded_users().exists():
+        raise SeedError("มีข้อมูลจาก seed อยู่แล้ว ลบก่อนด้วย --clear")
+
+    rng = random.Random(seed)
+    pools = _text_pools(seed)
+    categories = [code for code, _ in Post.CATEGORY_CHOICES]
+    members_per_post = max(1, min(members_per_post, users))
+
+    # ---------- users ----------
+    # hash รหัสผ่านครั้งเดียวแล้วใช้ร่วมกัน (PBKDF2 ทีละคนใช้เวลาหลายสิบ ms)
+    password = make_password(SEED_PASSWORD)
+    user_writer = _BulkWriter(User, chunk_size, progress)
+    for i in range(users):
+        username = f'{SEED_USERNAME_PREFIX}{i:07d}'
+        user_writer.add(User(
+            username=username,
+            email=f'{username}@example.com',
+            password=password,
+            first_name=rng.choice(pools['first_names']),
+            last_name=rng.choice(pools['last_names']),
+            bio=rng.choice(pools['sentences']),
+            phone_number=f'08{rng.randint(10000000, 99999999)}',
+            is_staff=i == 0,
+        ))
+    user_writer.flush()
+    # อ่าน id กลับมาทีเดียว เรียงตาม username ให้สุ่มได้ผลเดิมทุกครั้ง
+    user_ids = list(seeded_users().order_by('username').values_list('pk', flat=True))
+
+    # ---------- posts + members + join requests + chat ----------
+    Membership = Post.members.through
+    member_writer = _BulkWriter(Membership, chunk_size, progress)
+    request_writer = _BulkWriter(JoinRequest, chunk_size, progress)
+    message_writer = _BulkWriter(ChatMessage, chunk_size, progress)
+    post_ids = []
+    post_count = 0
+
+    for start in range(0, posts, chunk_size):
+        batch = []
+        batch_members = []
+        for _ in range(min(chunk_size, posts - start)):
+            owner_id = rng.choice(user_ids)
+            member_count = rng.randint(1, members_per_post)
+            others = [pk for pk in rng.sample(user_ids, min(member_count, len(user_ids))) if pk != owner_id]
+            members = [owner_id, *others[:member_count - 1]]
+            category = rng.choice(categories)
+            title = f"หาร {category} - {rng.choice(pools['words'])}"
+            description = rng.choice(pools['paragraphs'])
+            batch.append(Post(
+                title=title,
+                description=description,
+                category=category,
+                member_limit=rng.randint(len(members), members_per_post + 2),
+                full_price=Decimal(rng.choice([50, 100, 299, 450, 1200, 3590])),
+                owner_id=owner_id,
+                member_count=len(members),
+                search_text=normalize_search_text(title, description),
+            ))
+            batch_members.append(members)
+
+        created = Post.objects.bulk_create(batch, batch_size=chunk_size)
+        post_count += len(created)
+        if progress:
+            progress(Post._meta.verbose_name_plural, post_count)
+
+        for post, members in zip(created, batch_members):
+            post_ids.append(post.pk)
+            for user_id in members:
+                member_writer.add(Membership(post_id=post.pk, user_id=user_id))
+            # คนนอกที่ขอเข้าร่วมแล้วรออนุมัติ (หน้าโพสต์ของเจ้าของจะแสดงรายการนี้)
+            if post.member_count < post.member_limit:
+                candidate = rng.choice(user_ids)
+                if candidate not in members:
+                    request_writer.add(JoinRequest(post_id=post.pk, user_id=candidate, status='PENDING'))
+            if len(members) > 1:
+                for _ in range(messages_per_room):
+                    message_writer.add(ChatMessage(
+                        post_id=post.pk,
+                        user_id=rng.choice(members),
+                        message=rng.choice(pools['sentences']),
+                    ))
+
+    for writer in (member_writer, request_writer, message_writer):
+        writer.flush()
+
+    # ---------- notifications + profile comments ----------
+    notification_writer = _BulkWriter(Notification, chunk_size, progress)
+    comment_writer = _BulkWriter(ProfileComment, chunk_size, progress)
+    for user_id in user_ids:
+        for _ in range(notifications_per_user if post_ids else 0):
+            post_id = rng.choice(post_ids)
+            notification_writer.add(Notification(
+                recipient_id=user_id,
+                sender_id=rng.choice(user_ids),
+                post_id=post_id,
+                message=rng.choice(pools['sentences'])[:255],
+                link=f'/post/{post_id}/',
+                is_read=rng.random() < 0.7,
+            ))
+        for _ in range(comments_per_user):
+            comment_writer.add(ProfileComment(
+                profile_owner_id=user_id,
+                author_id=rng.choice(user_ids),
+                comment=rng.choice(pools['sentences']),
+            ))
+    notification_writer.flush()
+    comment_writer.flush()
+
+    # ---------- reports ----------
+    report_writer = _BulkWriter(Report, chunk_size, progress)
+    report_categories = [code for code, _ in Report.CATEGORY_CHOICES]
+    report_statuses = [code for code, _ in Report.STATUS_CHOICES]
+    for _ in range(reports):
+        report_writer.add(Report(
+            reporter_id=rng.choice(user_ids),
+            title=f"แจ้งปัญหา {rng.choice(pools['words'])}",
+            description=rng.choice(pools['paragraphs']),
+            category=rng.choice(report_categories),
+            status=rng.choice(report_statuses),
+        ))
+    report_writer.flush()
+
+    return {
+        'users': len(user_ids),
+        'posts': post_count,
+        'members': member_writer.count,
+        'join_requests': request_writer.count,
+        'chat_messages': message_writer.count,
+        'notifications': notification_writer.count,
+        'profile_comments': comment_writer.count,
+        'reports': report_writer.count,
+    }
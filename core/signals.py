@@ -0,0 +1,88 @@
+# core/signals.py
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .adminstats import invalidate_admin_stats
+from .fragments import bump_versions
+from .images import IMAGE_VARIANTS, default_variants, is_default_image, needs_variants, variants_field_name
+from .jobs import enqueue
+from .membership import invalidate_membership, refresh_member_count
+from .models import ChatMessage, Notification, Post, ProfileComment, Report, User
+from .notifications import invalidate_unread_count
+
+
+@receiver(m2m_changed, sender=Post.members.through)
+def post_members_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    # ครอบคลุมทุกที่ที่แก้ members: อนุมัติคำขอ, เตะ, ออกจากปาร์ตี้, owner ถูกเพิ่มใน Post.save
+    if action == 'pre_clear':
+        # clear() ไม่ส่ง pk_set มา ต้องดึงรายชื่อเดิมเก็บไว้ก่อน
+        related = instance.joined_posts if reverse else instance.members
+        instance._cleared_member_pks = set(related.values_list('pk', flat=True))
+        return
+    if action == 'post_clear':
+        pk_set = getattr(instance, '_cleared_member_pks', set())
+    elif action not in ('post_add', 'post_remove'):
+        return
+
+    if reverse:
+        # user.joined_posts.add(post) -> instance คือ user, pk_set คือ id ของโพสต์
+        post_ids, user_ids = pk_set, [instance.pk]
+    else:
+        post_ids, user_ids = [instance.pk], pk_set
+    invalidate_membership(post_ids, user_ids)
+    refresh_member_count(post_ids)
+    # การ์ดโพสต์แสดงจำนวนสมาชิก, หน้าโปรไฟล์แสดงปาร์ตี้ที่เข้าร่วม
+    bump_versions('post', post_ids)
+    bump_versions('joined', user_ids)
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, **kwargs):
+    bump_versions('post', [instance.pk])
+    # ชื่อโพสต์แสดงในรายการปาร์ตี้ที่เข้าร่วมของสมาชิกทุกคน
+    bump_versions('joined', instance.members.values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, **kwargs):
+    # ชื่อ/รูปของเจ้าของโพสต์แสดงในการ์ดทุกใบของเขา
+    bump_versions('user', [instance.pk])
+
+
+@receiver([post_save, post_delete], sender=ProfileComment)
+def profile_comment_changed(sender, instance, **kwargs):
+    bump_versions('profile_comments', [instance.profile_owner_id])
+
+
+@receiver([post_save, post_delete], sender=Notification)
+def notification_changed(sender, instance, **kwargs):
+    invalidate_unread_count([instance.recipient_id])
+
+
+@receiver([post_save, post_delete], sender=Report)
+def report_changed(sender, instance, **kwargs):
+    # เรื่องใหม่/เปลี่ยนสถานะ/ลบ -> ตัวเลขสรุปในหน้า admin เปลี่ยน (queryset.update() ไม่ส่ง signal ต้องล้างเอง)
+    invalidate_admin_stats()
+
+
+# เฉพาะ model ที่มีรูปใน IMAGE_VARIANTS (ไม่ผูกกับ post_save ของทุก model)
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=ChatMessage)
+@receiver(post_save, sender=Report)
+def image_uploaded(sender, instance, created=False, update_fields=None, **kwargs):
+    # รูปที่อัปโหลดใหม่/เปลี่ยนรูป -> สร้างรูปย่อในงานเบื้องหลัง (บันทึกที่ไม่ได้แตะ field รูปข้ามไป)
+    for key in IMAGE_VARIANTS:
+        app_model, field_name = key.rsplit('.', 1)
+        if app_model != sender._meta.label_lower:
+            continue
+        if update_fields is not None and field_name not in update_fields:
+            continue
+        if created and is_default_image(getattr(instance, field_name)):
+            # แถวใหม่ที่ใช้รูปเริ่มต้น: ใช้รูปย่อชุดที่สร้างไว้แล้ว (generate_image_variants) ไม่ต้องมีงานเบื้องหลัง
+            variants = default_variants(sender, field_name)
+            if variants:
+                sender.objects.filter(pk=instance.pk).update(**{variants_field_name(field_name): variants})
+                setattr(instance, variants_field_name(field_name), variants)
+        elif needs_variants(instance, field_name):
+            enqueue('core.generate_image_variants', sender._meta.label_lower, instance.pk, field_name)
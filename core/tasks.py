@@ -0,0 +1,90 @@
+# core/tasks.py
+# งานเบื้องหลังของแอป (ลงทะเบียนผ่าน @task ดู core/jobs.py)
+# ไฟล์ที่ผู้ใช้อัปโหลดจะถูกพักไว้ใน default storage ก่อน (ใต้ TASKS_STAGING_PREFIX) แล้วให้ worker แนบเข้ากับ object ทีหลัง
+# ไม่พักไว้ในดิสก์ของเครื่อง web เพราะ worker อาจรันอยู่คนละเครื่อง
+import logging
+import os
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.mail import EmailMultiAlternatives
+
+from .broker import get_broker
+from .chat import ChatMessageSerializer
+from .fragments import bump_versions
+from .images import needs_variants, update_variants
+from .jobs import task
+from .models import ChatMessage, Report
+from .notifications import deliver
+
+logger = logging.getLogger(__name__)
+
+
+def get_staging_storage():
+    return default_storage
+
+
+def stage_upload(uploaded_file):
+    """พักไฟล์อัปโหลดไว้ คืนชื่อไฟล์สำหรับส่งต่อให้งานเบื้องหลัง"""
+    name = settings.TASKS_STAGING_PREFIX + os.path.basename(uploaded_file.name)
+    return get_staging_storage().save(name, uploaded_file)
+
+
+def _attach_staged(instance, field_name, staged_name):
+    # แนบไฟล์ที่พักไว้เข้ากับ field (บันทึกตาม upload_to ของ field) แล้วลบไฟล์พักทิ้ง
+    staging_storage = get_staging_storage()
+    with staging_storage.open(staged_name) as staged:
+        getattr(instance, field_name).save(os.path.basename(staged_name), File(staged), save=True)
+    staging_storage.delete(staged_name)
+
+
+@task()
+def send_chat_image(post_id, user_id, message, staged_name):
+    # สร้างข้อความหลังอัปโหลดรูปเสร็จ ข้อความจึงไปถึงห้องแชทพร้อมรูปเลย
+    # (TASKS_BACKEND='database' ต้องใช้ RedisBroker ให้ worker ส่งถึง ASGI server ได้ ดู core/checks.py)
+    if not get_staging_storage().exists(staged_name):
+        return
+    chat_message = ChatMessage(post_id=post_id, user_id=user_id, message=message)
+    _attach_staged(chat_message, 'image', staged_name)
+
+    chat_message = ChatMessage.objects.select_related('user').get(pk=chat_message.pk)
+    get_broker().publish(post_id, ChatMessageSerializer().payload(chat_message))
+
+
+@task()
+def attach_report_evidence(report_id, staged_name):
+    if not get_staging_storage().exists(staged_name):
+        return
+    report = Report.objects.get(pk=report_id)
+    _attach_staged(report, 'evidence_image', staged_name)
+
+
+@task()
+def send_email_message(subject, body, from_email, to, alternatives=(), content_subtype='plain'):
+    message = EmailMultiAlternatives(subject, body, from_email, to)
+    message.content_subtype = content_subtype
+    for content, mimetype in alternatives:
+        message.attach_alternative(content, mimetype)
+    message.send()
+
+
+@task()
+def deliver_notifications(recipient_ids, **kwargs):
+    deliver(recipient_ids, **kwargs)
+
+
+@task()
+def generate_image_variants(model_label, pk, field_name):
+    instance = apps.get_model(model_label).objects.filter(pk=pk).first()
+    # ถูกลบไปแล้ว หรือเปลี่ยนรูปอีกรอบและมีงานใหม่มาแทนแล้ว
+    if instance is None or not needs_variants(instance, field_name):
+        return
+    try:
+        update_variants(instance, field_name)
+        # ให้การ์ด/หน้าที่ cache ไว้เปลี่ยนไปใช้รูปย่อ (update() ไม่ส่ง post_save)
+        bump_versions(instance._meta.model_name, [pk])
+    except OSError:
+        # ไฟล์ต้นฉบับหาย/ไม่ใช่รูปที่ Pillow อ่านได้ -> ใช้รูปต้นฉบับแสดงแทนไปก่อน
+        logger.warning("สร้างรูปย่อไม่สำเร็จ: %s #%s (%s)", model_label, pk, field_name, exc_info=True)
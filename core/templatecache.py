@@ -0,0 +1,58 @@
+# core/templatecache.py
+# compile template ล่วงหน้าตอน worker เริ่มทำงาน (เรียกจาก config/wsgi.py และ config/asgi.py)
+# ใช้คู่กับ cached loader (settings.TEMPLATES) template ที่ compile แล้วจะอยู่ในหน่วยความจำของ worker
+import logging
+import os
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.template import TemplateDoesNotExist, TemplateSyntaxError, engines
+
+logger = logging.getLogger(__name__)
+
+
+def warmup_dirs():
+    # โฟลเดอร์ template ของโปรเจกต์ (template ของ admin/allauth ตัวที่ใช้จริงจะถูก compile ตอนถูก include/extends)
+    dirs = [settings.BASE_DIR / 'core' / 'templates', settings.BASE_DIR / 'templates']
+    # theme/templates ใช้ tag ของ django-tailwind ซึ่งโหลดเฉพาะตอน dev
+    if apps.is_installed('tailwind'):
+        dirs.append(settings.BASE_DIR / 'theme' / 'templates')
+    return dirs
+
+
+def iter_template_names(dirs=None):
+    for directory in dirs or warmup_dirs():
+        for root, _, files in os.walk(directory):
+            for filename in sorted(files):
+                if filename.endswith(('.html', '.txt')):
+                    yield os.path.relpath(os.path.join(root, filename), directory).replace(os.sep, '/')
+
+
+def reset_template_cache():
+    """ล้าง template ที่ cached loader เก็บไว้ (ใช้ใน benchmark เพื่อจำลอง worker ใหม่)"""
+    for loader in engines['django'].engine.template_loaders:
+        loader.reset()
+
+
+def warm_templates(dirs=None):
+    """compile template ทุกไฟล์ คืนค่า (จำนวนที่สำเร็จ, list ของไฟล์ที่ compile ไม่ผ่าน)"""
+    engine = engines['django']
+    loaded, failed = 0, []
+    for name in dict.fromkeys(iter_template_names(dirs)):
+        try:
+            engine.get_template(name)
+            loaded += 1
+        except (TemplateDoesNotExist, TemplateSyntaxError) as e:
+            failed.append((name, e))
+    return loaded, failed
+
+
+def warm_templates_on_boot():
+    if not settings.TEMPLATE_WARMUP:
+        return
+    started = time.perf_counter()
+    loaded, failed = warm_templates()
+    for name, error in failed:
+        logger.warning("warm-up template %s ไม่สำเร็จ: %s", name, error)
+    logger.info("warm-up template %d ไฟล์ ใช้เวลา %.0f ms", loaded, (time.perf_counter() - started) * 1000)
@@ -0,0 +1,23 @@
+# core/templatetags/fragments.py
+from django import template
+
+from ..fragments import attach_card_versions, get_versions
+
+register = template.Library()
+
+
+@register.filter
+def card_version(post):
+    """
+    เวอร์ชันของการ์ดโพสต์ ใช้ใน {% cache ... post.pk post|card_version %}
+    view ควรเรียก attach_card_versions() ไว้ก่อน (ดึงทีเดียวทั้งหน้า) ถ้าไม่ได้เรียกจะดึงทีละโพสต์แทน
+    """
+    if getattr(post, 'card_version', None) is None:
+        attach_card_versions([post])
+    return post.card_version
+
+
+@register.filter
+def fragment_version(obj, kind):
+    # เช่น {% cache 3600 profile_joined profile_user.pk profile_user|fragment_version:'joined' %}
+    return get_versions(kind, [obj.pk])[obj.pk]
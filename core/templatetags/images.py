@@ -0,0 +1,21 @@
+# core/templatetags/images.py
+from django import template
+
+from ..images import variants_field_name
+
+register = template.Library()
+
+
+@register.filter
+def variant(fieldfile, width):
+    """
+    URL ของรูปย่อตามความกว้าง เช่น {{ post.owner.profile_picture|variant:64 }}
+    ถ้ายังไม่มีรูปย่อ (ยังประมวลผลไม่เสร็จ/รูปเก่า) จะใช้รูปต้นฉบับแทน
+    """
+    if not fieldfile:
+        return ''
+    variants = getattr(fieldfile.instance, variants_field_name(fieldfile.field.name), None) or {}
+    name = variants.get(str(width))
+    if name and variants.get('source') == fieldfile.name:
+        return fieldfile.storage.url(name)
+    return fieldfile.url
@@ -1,3 +1,964 @@
-from django.test import TestCase
+import asyncio
+import io
+import json
+import os
+import re
+import shutil
+import tempfile
+import zipfile
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.management import CommandError, call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import DatabaseError, connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from . import urls
+from .adminstats import compute_report_stats, daily_series, get_admin_stats, rollup_daily_stats
+from .benchmarking import SKIPPED_URLS, build_fixture, case_url_name, client_for, measure, run_url_benchmark, url_cases
+from .billsplit import parse_bill, split_bill
+from .broker import InMemoryBroker, get_broker
+from .checks import check_chat_broker
+from .dbhealth import pool_metrics
+from .facets import compute_facets, get_post_facets
+from .feed import FEED_PAGE_SIZE
+from .images import needs_variants, update_variants
+from .instrumentation import LATENCY_BUCKETS_MS, percentile, query_budget, registry
+from .membership import is_member
+from .jobs import claim_jobs, enqueue, run_pending
+from .models import Post, User, ChatMessage, JoinRequest, Notification, BackgroundJob, DailyStat, Report
+from .notifications import get_unread_count, notify
+from .qr import _get_qr_image, _render
+from .seeding import clear_seeded, seed_dataset
+from .templatecache import warm_templates
+from .templatetags.images import variant
+from .views import CHAT_PAGE_SIZE
+
+
+class CoreTestCase(TestCase):
+    def setUp(self):
+        # cache (locmem) อยู่ข้าม test แต่ id ใน DB ถูกใช้ซ้ำได้ ต้องล้างทุกครั้ง
+        cache.clear()
+
+
+class ChatApiTests(CoreTestCase):
+    def setUp(self):
+        super().setUp()
+        self.owner = User.objects.create_user(username='owner', password='pass')
+        self.post = Post.objects.create(
+            title='Netflix', description='หารกัน', category='APP',
+            member_limit=4, full_price=400, owner=self.owner,
+        )
+        self.client.force_login(self.owner)
+        self.url = reverse('chat-api-get', kwargs={'pk': self.post.pk})
+
+    def create_messages(self, count):
+        ChatMessage.objects.bulk_create(
+            ChatMessage(post=self.post, user=self.owner, message=f'msg {i}') for i in range(count)
+        )
+        return list(ChatMessage.objects.filter(post=self.post).order_by('id').values_list('id', flat=True))
+
+    def test_initial_load_returns_latest_page(self):
+        ids = self.create_messages(CHAT_PAGE_SIZE + 5)
+        data = self.client.get(self.url).json()
+        self.assertTrue(data['has_more'])
+        self.assertEqual([m['id'] for m in data['messages']], ids[-CHAT_PAGE_SIZE:])
+
+    def test_since_id_returns_only_newer_messages(self):
+        ids = self.create_messages(10)
+        data = self.client.get(self.url, {'since_id': ids[6]}).json()
+        self.assertFalse(data['has_more'])
+        self.assertEqual([m['id'] for m in data['messages']], ids[7:])
+
+    def test_before_id_pages_backwards(self):
+        ids = self.create_messages(CHAT_PAGE_SIZE + 5)
+        data = self.client.get(self.url, {'before_id': ids[-CHAT_PAGE_SIZE]}).json()
+        self.assertFalse(data['has_more'])
+        self.assertEqual([m['id'] for m in data['messages']], ids[:5])
+
+    def count_poll_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_poll_query_count_does_not_grow_with_room_size(self):
+        self.create_messages(1)
+        baseline = self.count_poll_queries()
+
+        # ผู้ส่งหลายคน และข้อความเต็มหน้า ต้องใช้จำนวน query เท่าเดิม
+        authors = [User.objects.create_user(username=f'member{i}') for i in range(10)]
+        ChatMessage.objects.bulk_create(
+            ChatMessage(post=self.post, user=authors[i % len(authors)], message=f'hi {i}')
+            for i in range(CHAT_PAGE_SIZE * 2)
+        )
+        self.assertEqual(self.count_poll_queries(), baseline)
+
+
+class ChatBrokerTests(CoreTestCase):
+    async def test_publish_fans_out_to_room_subscribers_only(self):
+        broker = InMemoryBroker()
+        first, second, other = await broker.subscribe(1), await broker.subscribe(1), await broker.subscribe(2)
+        broker.publish(1, {'id': 10})
+        self.assertEqual(await first.get(timeout=1), {'id': 10})
+        self.assertEqual(await second.get(timeout=1), {'id': 10})
+        self.assertIsNone(await other.get(timeout=0.05))
+
+        # ปิดแล้วต้องไม่ได้รับต่อ และห้องที่ไม่มีใครฟังถูกลบทิ้ง
+        await first.close()
+        await second.close()
+        broker.publish(1, {'id': 11})
+        self.assertIsNone(await first.get(timeout=0.05))
+        self.assertNotIn(1, broker._subscriptions)
+
+    def test_database_tasks_need_shared_broker(self):
+        # worker อยู่คนละ process กับ SSE: InMemoryBroker ส่งไม่ถึง ต้องไม่ผ่าน system check
+        with self.settings(TASKS_BACKEND='database', CHAT_BROKER='core.broker.InMemoryBroker'):
+            self.assertEqual([e.id for e in check_chat_broker(None)], ['core.E001'])
+        with self.settings(TASKS_BACKEND='database', CHAT_BROKER='core.broker.RedisBroker'):
+            self.assertEqual(check_chat_broker(None), [])
+        with self.settings(TASKS_BACKEND='immediate', CHAT_BROKER='core.broker.InMemoryBroker'):
+            self.assertEqual(check_chat_broker(None), [])
+
+
+class ChatStreamTests(CoreTestCase):
+    def setUp(self):
+        super().setUp()
+        self.owner = User.objects.create_user(username='owner', password='pass')
+        self.outsider = User.objects.create_user(username='outsider', password='pass')
+        self.post = Post.objects.create(
+            title='Netflix', description='หารกัน', category='APP',
+            member_limit=4, full_price=400, owner=self.owner,
+        )
+        self.url = reverse('chat-api-stream', kwargs={'pk': self.post.pk})
+
+    def test_send_publishes_to_broker(self):
+        self.client.force_login(self.owner)
+        with mock.patch('core.views.get_broker') as broker:
+            self.client.post(reverse('chat-api-send', kwargs={'pk': self.post.pk}), {'message': 'สวัสดี'})
+        post_id, payload = broker.return_value.publish.call_args.args
+        self.assertEqual(post_id, self.post.pk)
+        self.assertEqual(payload['message'], 'สวัสดี')
+
+    async def test_stream_rejects_non_members(self):
+        await self.async_client.aforce_login(self.outsider)
+        response = await self.async_client.get(self.url)
+        self.assertEqual(response.status_code, 403)
+
+    async def test_stream_delivers_published_message(self):
+        await self.async_client.aforce_login(self.owner)
+        response = await self.async_client.get(self.url)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        events = aiter(response.streaming_content)
+        self.assertEqual(await asyncio.wait_for(anext(events), 1), b'retry: 3000\n\n')
+
+        # subscribe เกิดก่อน chunk แรก ข้อความที่ publish หลังจากนี้ต้องมาถึง
+        get_broker().publish(self.post.pk, {'id': 7, 'user_id': self.owner.pk, 'message': 'hi'})
+        event = (await asyncio.wait_for(anext(events), 1)).decode()
+        await events.aclose()
+        self.assertTrue(event.startswith('id: 7\nevent: message\n'))
+        self.assertEqual(json.loads(event.split('data: ', 1)[1])['is_me'], True)
+
+
+class MembershipTests(CoreTestCase):
+    def setUp(self):
+        super().setUp()
+        self.owner = User.objects.create_user(username='owner', password='pass')
+        self.member = User.objects.create_user(username='member', password='pass')
+        self.post = Post.objects.create(
+            title='Spotify', description='หารกัน', category='MUSIC',
+            member_limit=4, full_price=200, owner=self.owner,
+        )
+
+    def test_membership_is_cached_until_members_change(self):
+        with self.assertNumQueries(1):
+            self.assertFalse(is_member(self.post, self.member))
+        with self.assertNumQueries(0):
+            self.assertFalse(is_member(self.post, self.member))
+            self.assertTrue(is_member(self.post, self.owner))
+
+        # ทุกทางที่แก้ members (add/remove ทั้งสองฝั่ง, clear) ต้องล้าง cache ของคู่นั้น
+        self.post.members.add(self.member)
+        with self.assertNumQueries(1):
+            self.assertTrue(is_member(self.post, self.member))
+        with self.assertNumQueries(0):
+            self.assertTrue(is_member(self.post, self.member))
+
+        self.member.joined_posts.remove(self.post)
+        self.assertFalse(is_member(self.post, self.member))
+        self.post.members.add(self.member)
+        self.assertTrue(is_member(self.post, self.member))
+        self.post.members.clear()
+        self.assertFalse(is_member(self.post, self.member))
+        self.assertEqual(cache.get(f'member:{self.post.pk}:{self.member.pk}'), False)
+
+    def test_kicked_member_loses_chat_access(self):
+        self.post.members.add(self.member)
+        self.client.force_login(self.member)
+        chat_url = reverse('chat-api-get', kwargs={'pk': self.post.pk})
+        self.assertEqual(self.client.get(chat_url).status_code, 200)
+
+        self.client.force_login(self.owner)
+        self.client.get(reverse('kick-member', kwargs={'pk': self.post.pk, 'user_id': self.member.pk}))
+        self.client.force_login(self.member)
+        self.assertEqual(self.client.get(chat_url).status_code, 403)
+
+
+class MemberCountTests(CoreTestCase):
+    def setUp(self):
+        super().setUp()
+        self.owner = User.objects.create_user(username='owner', password='pass')
+        self.post = Post.objects.create(
+            title='YouTube Premium', description='หารกัน', category='APP',
+            member_limit=2, full_price=300, owner=self.owner,
+        )
+        self.client.force_login(self.owner)
+
+    def approve(self, user):
+        join_request = JoinRequest.objects.create(post=self.post, user=user)
+        self.client.get(reverse('manage-request', kwargs={'request_id': join_request.pk, 'action': 'approve'}))
+        return JoinRequest.objects.get(pk=join_request.pk)
+
+    def test_member_count_tracks_membership_changes(self):
+        self.assertEqual(self.post.member_count, 1)
+        member = User.objects.create_user(username='member')
+        self.post.members.add(member)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.member_count, 2)
+
+        self.post.members.remove(member)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.member_count, 1)
+
+    def test_approval_stops_at_member_limit(self):
+        first = self.approve(User.objects.create_user(username='first'))
+        second = self.approve(User.objects.create_user(username='second'))
+
+        self.assertEqual(first.status, 'APPROVED')
+        self.assertEqual(second.status, 'PENDING')
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.member_count, 2)
+        self.assertEqual(self.post.members.count(), 2)
+
+    def test_save_keeps_member_count_and_inserts_explicit_pk(self):
+        stale = Post.objects.get(pk=self.post.pk)
+        self.post.members.add(User.objects.create_user(username='member'))
+        stale.title = 'YouTube Family'
+        stale.save()
+        self.assertEqual(Post.objects.get(pk=self.post.pk).member_count, 2)
+
+        # โพสต์ที่กำหนด pk มาเอง (เช่นจาก fixture) ต้อง insert ได้
+        post = Post(pk=self.post.pk + 100, title='Disney+', description='-', category='APP',
+                    member_limit=4, full_price=100, owner=self.owner)
+        post.save()
+        self.assertEqual(Post.objects.get(pk=post.pk).member_count, 1)
+
+
+class HomepageFeedTests(CoreTestCase):
+    def setUp(self):
+        super().setUp()
+        owners = [User.objects.create_user(username=f'owner{i}') for i in range(5)]
+        for i in range(FEED_PAGE_SIZE * 2 + 3):
+            Post.objects.create(
+                title=f'Party {i}', description='หารกัน', category='APP',
+                member_limit=3, full_price=100, owner=owners[i % len(owners)],
+            )
+
+    def test_feed_pages_through_every_post_once(self):
+        seen = []
+        cursor = None
+        while True:
+            params = {'cursor': cursor} if cursor else {}
+            data = self.client.get(reverse('home-feed'), params).json()
+            seen.extend(re.findall(r'href="/post/(\d+)/"', data['html']))
+            cursor = data['next_cursor']
+            if not cursor:
+                break
+        expected = Post.objects.order_by('-created_at', '-id').values_list('pk', flat=True)
+        self.assertEqual([int(pk) for pk in seen], list(expected))
+
+    def test_homepage_query_count_is_constant(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(reverse('home'))
+        baseline = len(ctx.captured_queries)
+
+        owner = User.objects.create_user(username='another')
+        Post.objects.create(
+            title='Late party', description='หารกัน', category='GAME',
+            member_limit=3, full_price=100, owner=owner,
+        )
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(reverse('home'))
+        self.assertEqual(len(ctx.captured_queries), baseline)
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get(reverse('home-feed'), {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 400)
+
+
+class PostSearchTests(CoreTestCase):
+    def setUp(self):
+        super().setUp()
+        owner = User.objects.create_user(username='owner')
+        self.netflix = Post.objects.create(
+            title='หาร Netflix Premium', description='จอ 4K ดูได้ 4 เครื่อง', category='APP',
+            member_limit=4, full_price=419, owner=owner,
+        )
+        self.youtube = Post.objects.create(
+            title='YouTube Family', description='แชร์กับเพื่อน ดู Netflix ไม่ได้นะ', category='APP',
+            member_limit=6, full_price=299, owner=owner,
+        )
+        Post.objects.create(
+            title='ชาบูบุฟเฟ่ต์', description='หารค่าอาหาร', category='FOOD',
+            member_limit=4, full_price=1200, owner=owner,
+        )
+
+    def search(self, query):
+        response = self.client.get(reverse('post-list'), {'q': query})
+        return list(response.context['posts'])
+
+    def test_title_matches_rank_first(self):
+        self.assertEqual(self.search('netflix'), [self.netflix, self.youtube])
+
+    def test_thai_substring_and_multiple_terms(self):
+        self.assertEqual(len(self.search('บุฟเฟ่ต์')), 1)
+        self.assertEqual(self.search('netflix\u200b 4K'), [self.netflix])
+
+    def test_search_text_follows_edits(self):
+        self.youtube.title = 'Spotify Family'
+        self.youtube.description = 'ฟังเพลง'
+        self.youtube.save()
+        self.assertEqual(self.search('spotify'), [self.youtube])
+        self.assertEqual(self.search('youtube'), [])
+
+
+class NotificationBadgeTests(CoreTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='user')
+        self.sender = User.objects.create_user(username='sender')
+        self.client.force_login(self.user)
+
+    def notify(self, message='สวัสดี'):
+        return Notification.objects.create(recipient=self.user, sender=self.sender, message=message)
+
+    def notification_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        queries = [q['sql'] for q in ctx.captured_queries if 'core_notification' in q['sql']]
+        return response, queries
+
+    def test_badge_is_served_from_cache(self):
+        self.notify()
+        self.notify()
+        response, _ = self.notification_queries(reverse('bill-calculator'))
+        self.assertEqual(str(response.context['noti_count']), '2')
+
+        response, queries = self.notification_queries(reverse('bill-calculator'))
+        self.assertEqual(queries, [])
+        self.assertEqual(str(response.context['noti_count']), '2')
+
+    def test_badge_follows_reads_and_new_notifications(self):
+        first = self.notify()
+        self.notify()
+        self.client.get(reverse('bill-calculator'))
+
+        self.client.get(reverse('notification-read', kwargs={'pk': first.pk}))
+        self.client.get(reverse('notification-read', kwargs={'pk': first.pk}))
+        self.assertEqual(get_unread_count(self.user), 1)
+
+        self.notify()
+        self.assertEqual(get_unread_count(self.user), 2)
+
+        self.client.get(reverse('notification-read-all'))
+        self.assertEqual(get_unread_count(self.user), 0)
+
+    def test_badge_is_recounted_after_changes(self):
+        # ค่าใน cache ที่ไม่ตรงกับ DB (เช่นจาก process อื่น) ต้องไม่ถูกบวกต่อ แต่ถูกลบแล้วนับใหม่
+        self.notify()
+        cache.set(f'noti-unread:{self.user.pk}', 99)
+        self.notify()
+        self.assertEqual(get_unread_count(self.user), 2)
+
+
+class NotificationServiceTests(CoreTestCase):
+    def setUp(self):
+        super().setUp()
+        self.owner = User.objects.create_user(username='owner')
+        self.post = Post.objects.create(
+            title='Disney+', description='หารกัน', category='MOVIE',
+            member_limit=5, full_price=289, owner=self.owner,
+        )
+
+    def test_fan_out_uses_one_insert(self):
+        members = [User.objects.create_user(username=f'member{i}') for i in range(20)]
+        with CaptureQueriesContext(connection) as ctx:
+            notify(members + members[:5], 'ประกาศจากเจ้าของปาร์ตี้', sender=self.owner, post=self.post)
+        inserts = [q for q in ctx.captured_queries if q['sql'].startswith('INSERT')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(Notification.objects.filter(post=self.post).count(), 20)
+
+    def test_repeated_unread_events_are_coalesced(self):
+        for i in range(3):
+            requester = User.objects.create_user(username=f'requester{i}')
+            self.client.force_login(requester)
+            self.client.get(reverse('post-join', kwargs={'pk': self.post.pk}))
+
+        notification = Notification.objects.get(recipient=self.owner)
+        self.assertEqual(notification.event_count, 3)
+        self.assertIn('3', notification.message)
+        self.assertEqual(get_unread_count(self.owner), 1)
+
+
+@override_settings(TASKS_BACKEND='database')
+class BackgroundJobTests(CoreTestCase):
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        self.enterContext(override_settings(MEDIA_ROOT=self.media_root))
+
+    def test_failed_job_is_retried_with_backoff(self):
+        job = enqueue('core.send_email_message', 'หัวข้อ', 'เนื้อหา', 'noreply@example.com', ['a@example.com'])
+        with mock.patch('core.tasks.EmailMultiAlternatives.send', side_effect=OSError('smtp down')), \
+                self.assertLogs('core.jobs', level='ERROR'):
+            self.assertEqual(run_pending(), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('PENDING', 1))
+        self.assertGreater(job.run_at, timezone.now())
+        self.assertIn('smtp down', job.last_error)
+
+        # ยังไม่ถึงเวลา retry จึงไม่ถูกหยิบมาทำ
+        self.assertEqual(run_pending(), 0)
+
+        BackgroundJob.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        self.assertEqual(run_pending(), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('DONE', 2))
+
+    def test_stuck_job_is_reclaimed_after_visibility_timeout(self):
+        job = enqueue('core.send_email_message', 'หัวข้อ', 'เนื้อหา', 'noreply@example.com', ['a@example.com'])
+        self.assertEqual(len(claim_jobs()), 1)
+        self.assertEqual(claim_jobs(), [])
+
+        BackgroundJob.objects.filter(pk=job.pk).update(locked_until=timezone.now() - timedelta(seconds=1))
+        self.assertEqual([claimed.pk for claimed in claim_jobs()], [job.pk])
+
+        # ค้างจนครบจำนวนครั้งแล้ว -> FAILED ไม่ถูกหยิบมาทำอีก
+        BackgroundJob.objects.filter(pk=job.pk).update(
+            locked_until=timezone.now() - timedelta(seconds=1), attempts=job.max_attempts,
+        )
+        self.assertEqual(claim_jobs(), [])
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'FAILED')
+
+    @override_settings(TASKS_BACKEND='immediate')
+    def test_immediate_task_failure_is_logged_not_raised(self):
+        with mock.patch('core.tasks.EmailMultiAlternatives.send', side_effect=OSError('smtp down')), \
+                self.assertLogs('core.jobs', level='ERROR'), self.captureOnCommitCallbacks(execute=True):
+            enqueue('core.send_email_message', 'หัวข้อ', 'เนื้อหา', 'noreply@example.com', ['a@example.com'])
+        self.assertFalse(BackgroundJob.objects.exists())
+
+    def test_chat_image_is_uploaded_by_worker(self):
+        owner = User.objects.create_user(username='owner')
+        post = Post.objects.create(
+            title='Party', description='หารกัน', category='APP',
+            member_limit=3, full_price=100, owner=owner,
+        )
+        self.client.force_login(owner)
+        image = SimpleUploadedFile('slip.gif', b'GIF89a\x01\x00\x01\x00\x00\x00\x00;', content_type='image/gif')
+        response = self.client.post(reverse('chat-api-send', kwargs={'pk': post.pk}), {'message': 'โอนแล้ว', 'image': image})
+
+        self.assertEqual(response.json()['status'], 'queued')
+        self.assertFalse(ChatMessage.objects.exists())
+
+        run_pending()
+        chat_message = ChatMessage.objects.get()
+        self.assertEqual(chat_message.message, 'โอนแล้ว')
+        self.assertTrue(chat_message.image.name.startswith('chat_images/'))
+        # ไฟล์พักอยู่ใน default storage ที่ worker เครื่องอื่นอ่านได้ และถูกลบหลังแนบเสร็จ
+        self.assertEqual(os.listdir(os.path.join(self.media_root, 'upload_staging')), [])
+
+
+class ImageVariantTests(CoreTestCase):
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        self.enterContext(override_settings(MEDIA_ROOT=self.media_root, IMAGE_VARIANT_FORMAT='WEBP'))
+
+    def test_avatar_variants_are_small_square_webp(self):
+        buffer = io.BytesIO()
+        Image.new('RGB', (1200, 800), 'skyblue').save(buffer, format='JPEG')
+        user = User.objects.create_user(username='pic')
+        user.profile_picture.save('big.jpg', ContentFile(buffer.getvalue()))
+        self.assertTrue(needs_variants(user, 'profile_picture'))
+        # ยังไม่มีรูปย่อ -> ใช้รูปต้นฉบับ
+        self.assertEqual(variant(user.profile_picture, 64), user.profile_picture.url)
+
+        update_variants(user, 'profile_picture')
+        user.refresh_from_db()
+        self.assertFalse(needs_variants(user, 'profile_picture'))
+        self.assertTrue(variant(user.profile_picture, 64).endswith('__64.webp'))
+        with user.profile_picture.storage.open(user.profile_picture_variants['64']) as f:
+            thumb = Image.open(f)
+            self.assertEqual((thumb.format, thumb.size), ('WEBP', (64, 64)))
+
+    def test_default_avatar_variants_are_generated_once_and_shared(self):
+        buffer = io.BytesIO()
+        Image.new('RGB', (300, 300), 'gray').save(buffer, format='JPEG')
+        pics_dir = os.path.join(self.media_root, 'profile_pics')
+        os.makedirs(pics_dir)
+        with open(os.path.join(pics_dir, 'default.jpg'), 'wb') as f:
+            f.write(buffer.getvalue())
+        first = User.objects.create_user(username='first')
+        self.assertEqual(variant(first.profile_picture, 64), first.profile_picture.url)
+
+        call_command('generate_image_variants', stdout=io.StringIO())
+        first.refresh_from_db()
+        self.assertTrue(variant(first.profile_picture, 64).endswith('default__64.webp'))
+
+        # สมัครทีหลัง: ได้รูปย่อชุดเดิมทันที ไม่มีงานเบื้องหลัง/ไม่สร้างไฟล์ใหม่
+        with mock.patch('core.signals.enqueue') as enqueue_job, mock.patch('core.images._encode') as encode:
+            later = User.objects.create_user(username='later')
+        enqueue_job.assert_not_called()
+        encode.assert_not_called()
+        self.assertEqual(later.profile_picture_variants, first.profile_picture_variants)
+        self.assertEqual(variant(later.profile_picture, 128), variant(first.profile_picture, 128))
+
+    def test_variant_job_only_for_changed_uploaded_images(self):
+        with mock.patch('core.signals.enqueue') as enqueue_job:
+            # ยังใช้รูปเริ่มต้น -> ไม่ต้องสร้างรูปย่อ
+            user = User.objects.create_user(username='plain')
+            user.save()
+            user.profile_picture.name = 'profile_pics/me.jpg'
+            # บันทึกที่ไม่ได้แตะ field รูป
+            user.save(update_fields=['bio'])
+            self.assertFalse(enqueue_job.called)
+
+            user.save(update_fields=['profile_picture'])
+            enqueue_job.assert_called_once_with('core.generate_image_variants', 'core.user', user.pk, 'profile_picture')
+
+
+class PromptPayQRTests(CoreTestCase):
+    def setUp(self):
+        super().setUp()
+        _get_qr_image.cache_clear()
+        self.client.force_login(User.objects.create_user(username='payer'))
+        self.url = reverse('generate-qr')
+
+    def test_qr_is_cached_and_revalidated_with_etag(self):
+        response = self.client.get(self.url, {'id': '080-123-4567', 'amount': '50'})
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertIn('immutable', response['Cache-Control'])
+        etag = response['ETag']
+
+        # ค่าเดียวกันที่เขียนต่างรูปแบบ ใช้รูป/ETag เดียวกัน และไม่วาดใหม่
+        with mock.patch('core.qr._render') as render:
+            same = self.client.get(self.url, {'id': '0801234567', 'amount': '50.00'})
+            not_modified = self.client.get(self.url, {'id': '0801234567', 'amount': '50'}, HTTP_IF_NONE_MATCH=etag)
+        render.assert_not_called()
+        self.assertEqual((same['ETag'], same.content), (etag, response.content))
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_svg_and_invalid_input(self):
+        response = self.client.get(self.url, {'id': '0801234567', 'amount': '99.5', 'format': 'svg'})
+        self.assertEqual(response['Content-Type'], 'image/svg+xml')
+        self.assertIn(b'<svg', response.content)
+
+        bad = self.client.get(self.url, {'id': '0801234567', 'amount': 'abc'})
+        self.assertEqual(bad.status_code, 400)
+        self.assertNotIn('Cache-Control', bad)
+
+    def test_batch_returns_zip_and_renders_each_pair_once(self):
+        items = [{'label': 'A', 'amount': 120}, {'label': 'B', 'amount': '120.00'}, {'label': 'C', 'amount': 80.5}]
+        with mock.patch('core.qr._render', wraps=_render) as render:
+            response = self.client.post(
+                reverse('generate-qr-batch'),
+                json.dumps({'id': '0801234567', 'items': items}),
+                content_type='application/json',
+            )
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        self.assertEqual(render.call_count, 2)
+        names = zipfile.ZipFile(io.BytesIO(response.content)).namelist()
+        self.assertEqual(names, ['A_120.00.png', 'B_120.00.png', 'C_80.50.png'])
+
+        bad = self.client.post(
+            reverse('generate-qr-batch'),
+            json.dumps({'id': '0801234567', 'items': [{'amount': 'x'}]}),
+            content_type='application/json',
+        )
+        self.assertEqual(bad.status_code, 400)
+
+
+class BillSplitTests(CoreTestCase):
+    def test_remainder_goes_to_largest_fractions_and_totals_reconcile(self):
+        result = split_bill(*parse_bill({
+            'people': ['A', 'B', 'C'],
+            'items': [{'name': 'พิซซ่า', 'price': '100', 'payers': ['A', 'B', 'C']}],
+        }))
+        self.assertEqual([str(amount) for _, amount in result.shares], ['33.34', '33.33', '33.33'])
+
+        result = split_bill(*parse_bill({
+            'people': ['A', 'B'],
+            'items': [{'price': 99.99, 'payers': ['A', 'B']}, {'price': 10, 'payers': ['B']}],
+            'service_charge': True,
+            'vat': True,
+        }))
+        # 109.99 + ค่าบริการ 11.00 + VAT 8.47
+        self.assertEqual((str(result.service_charge), str(result.vat), str(result.total)), ('11.00', '8.47', '129.46'))
+        self.assertEqual(sum(amount for _, amount in result.shares), result.total)
+
+    def test_large_bill_reconciles(self):
+        people = [f'p{i}' for i in range(40)]
+        items = [
+            {'price': f'{i * 7 % 997}.{i % 100:02d}', 'payers': people[i % 13:i % 13 + 1 + i % 29]}
+            for i in range(500)
+        ]
+        result = split_bill(*parse_bill({'people': people, 'items': items, 'service_charge': True, 'vat': True}))
+        self.assertEqual(sum(amount for _, amount in result.shares), result.total)
+
+    def test_owner_saves_bill_and_member_gets_share_with_qr(self):
+        owner = User.objects.create_user(username='owner', phone_number='0801234567')
+        member = User.objects.create_user(username='member')
+        post = Post.objects.create(
+            title='Party', description='หารกัน', category='APP',
+            member_limit=3, full_price=100, owner=owner,
+        )
+        post.members.add(member)
+        bill = {'people': ['owner', 'member'], 'items': [{'price': '90.5', 'payers': ['owner', 'member']}]}
+
+        self.client.force_login(member)
+        forbidden = self.client.post(reverse('post-bill', kwargs={'pk': post.pk}), json.dumps(bill), content_type='application/json')
+        self.assertEqual(forbidden.status_code, 403)
+
+        self.client.force_login(owner)
+        saved = self.client.post(reverse('post-bill', kwargs={'pk': post.pk}), json.dumps(bill), content_type='application/json')
+        self.assertEqual(saved.json()['shares'], {'owner': '45.25', 'member': '45.25'})
+
+        self.client.force_login(member)
+        data = self.client.get(reverse('post-bill', kwargs={'pk': post.pk})).json()
+        self.assertEqual(data['my_share'], '45.25')
+        self.assertIn('amount=45.25', data['qr_url'])
+
+
+class FragmentCacheTests(CoreTestCase):
+    def setUp(self):
+        super().setUp()
+        self.owner = User.objects.create_user(username='owner')
+        self.post = Post.objects.create(
+            title='Netflix', description='หารกัน', category='APP',
+            member_limit=4, full_price=400, owner=self.owner,
+        )
+
+    def test_post_card_is_served_from_cache_until_version_changes(self):
+        self.assertContains(self.client.get(reverse('post-list')), 'Netflix')
+
+        # แก้ตรงๆ ใน DB (ไม่ผ่าน signal) -> การ์ดยังเป็นของเดิมจาก cache
+        Post.objects.filter(pk=self.post.pk).update(title='Spotify')
+        self.assertContains(self.client.get(reverse('post-list')), 'Netflix')
+
+        self.post.refresh_from_db()
+        self.post.save()
+        self.assertContains(self.client.get(reverse('post-list')), 'Spotify')
+
+        self.post.members.add(User.objects.create_user(username='member'))
+        self.assertContains(self.client.get(reverse('post-list')), '2/4')
+
+        User.objects.filter(pk=self.owner.pk).update(username='renamed')
+        self.owner.refresh_from_db()
+        self.owner.save()
+        self.assertContains(self.client.get(reverse('post-list')), 'renamed')
+
+    def test_profile_comments_fragment_refreshes_on_new_comment(self):
+        url = reverse('profile', kwargs={'pk': self.owner.pk})
+        self.assertContains(self.client.get(url), 'Netflix')
+        author = User.objects.create_user(username='friend')
+        self.client.force_login(author)
+        self.client.post(reverse('add-comment', kwargs={'pk': self.owner.pk}), {'comment': 'จ่ายไวมาก'})
+        self.assertContains(self.client.get(url), 'จ่ายไวมาก')
+
+        # คนคอมเมนต์เปลี่ยนชื่อ -> fragment ของโปรไฟล์ที่เขาไปคอมเมนต์ไว้ต้อง render ใหม่
+        author.username = 'best-friend'
+        author.save()
+        self.assertContains(self.client.get(url), 'best-friend')
+
+
+class TemplateWarmupTests(CoreTestCase):
+    def test_every_project_template_compiles(self):
+        loaded, failed = warm_templates()
+        self.assertGreater(loaded, 0)
+        self.assertEqual(failed, [])
+
+
+class DatabaseHealthTests(CoreTestCase):
+    def test_health_endpoint_reports_latency(self):
+        response = self.client.get(reverse('health-db'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'status': 'ok'})
+        self.assertEqual(response['Cache-Control'], 'no-store')
+
+        self.client.force_login(User.objects.create_user(username='staff', is_staff=True))
+        self.assertIn('query_ms', self.client.get(reverse('health-db')).json()['database'])
+
+    def test_health_endpoint_hides_driver_errors(self):
+        error = DatabaseError('could not connect to server at "db.internal" (10.0.0.5), port 5432')
+        self.client.force_login(User.objects.create_user(username='staff', is_staff=True))
+        broken = mock.Mock(vendor='postgresql', settings_dict={}, **{'ensure_connection.side_effect': error})
+        with mock.patch('core.dbhealth.connection', broken), \
+                self.assertLogs('core.dbhealth', level='ERROR'):
+            response = self.client.get(reverse('health-db'))
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()['database']['error'], 'unavailable')
+        self.assertNotContains(response, 'db.internal', status_code=503)
+
+    def test_pool_metrics_saturation(self):
+        pool = mock.Mock()
+        pool.get_stats.return_value = {
+            'pool_min': 2, 'pool_max': 10, 'pool_size': 8, 'pool_available': 0,
+            'requests_waiting': 3, 'requests_num': 40, 'requests_wait_ms': 200,
+        }
+        metrics = pool_metrics(pool)
+        self.assertEqual((metrics['in_use'], metrics['saturation'], metrics['avg_checkout_wait_ms']), (8, 0.8, 5.0))
+
+
+class RequestMetricsTests(CoreTestCase):
+    def setUp(self):
+        super().setUp()
+        registry.reset()
+        self.admin = User.objects.create_user(username='admin', password='pw', is_staff=True)
+
+    def test_server_timing_header_for_staff_only(self):
+        self.assertNotIn('Server-Timing', self.client.get(reverse('post-list')))
+
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('post-list'))
+        timing = response['Server-Timing']
+        self.assertRegex(timing, r'db;dur=[\d.]+;desc="\d+ queries"')
+        self.assertIn('tpl;dur=', timing)
+        self.assertIn('total;dur=', timing)
+        self.assertNotIn('X-Query-Budget', response)
+
+    @override_settings(QUERY_BUDGETS={'post-list': 0}, SERVER_TIMING_PUBLIC=True)
+    def test_query_budget_flagged(self):
+        with self.assertLogs('core.instrumentation', 'WARNING'):
+            response = self.client.get(reverse('post-list'))
+        self.assertTrue(response['X-Query-Budget'].startswith('exceeded'))
+        self.assertEqual(registry.snapshot()['post-list']['budget_exceeded'], 1)
+
+    def test_metrics_page_staff_only(self):
+        self.client.get(reverse('post-list'))
+        user = User.objects.create_user(username='u', password='pw')
+        self.client.force_login(user)
+        self.assertEqual(self.client.get(reverse('admin-request-metrics')).status_code, 403)
+
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('admin-request-metrics'))
+        self.assertContains(response, 'post-list')
+        self.assertEqual(registry.snapshot()['post-list']['count'], 1)
+
+    def test_percentile_from_buckets(self):
+        histogram = {'max': 3000, 'buckets': [5, 3, 0, 0, 1, 0, 0, 0, 0, 1]}
+        self.assertEqual(percentile(histogram, LATENCY_BUCKETS_MS, 0.5), 5)
+        self.assertEqual(percentile(histogram, LATENCY_BUCKETS_MS, 0.9), 100)
+        self.assertEqual(percentile(histogram, LATENCY_BUCKETS_MS, 1), 3000)
+
+
+class SeedingTests(CoreTestCase):
+    def seed(self):
+        return seed_dataset(users=20, posts=30, members_per_post=4, messages_per_room=3,
+                            notifications_per_user=2, comments_per_user=1, seed=7, chunk_size=8)
+
+    def test_seed_counts_are_consistent(self):
+        counts = self.seed()
+        self.assertEqual((counts['users'], counts['posts']), (20, 30))
+        self.assertEqual(Notification.objects.count(), 40)
+        self.assertEqual(Post.members.through.objects.count(), counts['members'])
+        # member_count ที่เขียนตรงๆ ต้องตรงกับตาราง members
+        for post in Post.objects.all():
+            self.assertEqual(post.member_count, post.members.count())
+            self.assertTrue(post.members.filter(pk=post.owner_id).exists())
+            self.assertLessEqual(post.member_count, post.member_limit)
+
+    def test_same_seed_same_data(self):
+        def snapshot():
+            return list(Post.objects.order_by('pk').values_list('title', 'owner__username', 'member_count'))
+        self.seed()
+        first = snapshot()
+        clear_seeded()
+        self.assertFalse(Post.objects.exists())
+        self.seed()
+        self.assertEqual(snapshot(), first)
+
+    def test_clear_removes_dependent_rows_without_collecting_them(self):
+        self.seed()
+        outsider = User.objects.create_user(username='outsider')
+        post = Post.objects.create(title='Max', description='-', category='MOVIE', member_limit=4,
+                                   full_price=100, owner=outsider)
+        seeded = User.objects.filter(username__startswith='seed_').first()
+        post.members.add(seeded)
+        notification = Notification.objects.create(recipient=outsider, sender=seeded, message='hi')
+
+        with mock.patch.object(Notification, 'from_db', wraps=Notification.from_db) as loaded:
+            clear_seeded(chunk_size=8)
+        # ไม่มีแถวของตารางลูกถูกโหลดขึ้นมาเป็น object (Collector ของ .delete() ปกติจะโหลดทุกแถว)
+        self.assertFalse(loaded.called)
+        self.assertEqual(list(User.objects.values_list('username', flat=True)), ['outsider'])
+        self.assertEqual(list(Post.objects.all()), [post])
+        self.assertFalse(ChatMessage.objects.exists() or JoinRequest.objects.exists())
+        notification.refresh_from_db()
+        self.assertIsNone(notification.sender_id)
+        post.refresh_from_db()
+        self.assertEqual(post.member_count, 1)
+
+    def test_measure_counts_queries(self):
+        self.seed()
+        result = measure(client_for(), reverse('post-list'), repeat=2, warmup=0)
+        self.assertEqual(result['status'], 200)
+        self.assertGreater(result['queries'], 0)
+
+
+# นับ INSERT ของงานเบื้องหลังด้วย เหมือนบน production
+@override_settings(TASKS_BACKEND='database')
+class QueryBudgetTests(CoreTestCase):
+    """ทุก URL ใน core/urls.py ต้องไม่เกิน QUERY_BUDGETS (กัน N+1 ที่เผลอใส่ใน template)"""
+
+    def setUp(self):
+        super().setUp()
+        # แจ้งเตือนเกินหนึ่งหน้า (20) และมีสมาชิกหลายคนต่อโพสต์ N+1 จะได้โผล่ให้เห็น
+        seed_dataset(users=30, posts=40, members_per_post=4, messages_per_room=5, notifications_per_user=25,
+                     comments_per_user=3, reports=30, seed=3, chunk_size=50)
+        self.fixture = build_fixture()
+
+    def test_every_url_has_a_case_and_budget(self):
+        names = {pattern.name for pattern in urls.urlpatterns if pattern.name}
+        self.assertEqual({case_url_name(label) for label in url_cases(self.fixture)} | set(SKIPPED_URLS), names)
+        self.assertEqual(names - set(SKIPPED_URLS) - set(settings.QUERY_BUDGETS), set())
+
+    def test_urls_within_query_budget(self):
+        # นับตอน cache ว่าง (measure(cold=True)) query ที่ปกติถูก cache ไว้ก็ต้องอยู่ในงบด้วย
+        for name, result in run_url_benchmark(self.fixture, repeat=1).items():
+            with self.subTest(url=name):
+                self.assertLess(result['status'], 400)
+                self.assertLessEqual(result['queries'], query_budget(case_url_name(name)))
+
+
+class StaticPipelineTests(CoreTestCase):
+    def test_base_uses_compiled_stylesheet(self):
+        response = self.client.get(reverse('bill-calculator'))
+        self.assertContains(response, '/static/css/dist/styles.css')
+        self.assertNotContains(response, 'cdn.tailwindcss.com')
+
+    def test_static_budget(self):
+        call_command('check_static_budget', stdout=io.StringIO())
+        with self.assertRaisesMessage(CommandError, 'เกินงบ'):
+            call_command('check_static_budget', budget=['css/dist/styles.css=1000'], stdout=io.StringIO())
+
+    def test_bundle_has_every_template_class(self):
+        call_command('check_tailwind_classes', stdout=io.StringIO())
+        # bundle ที่ build ก่อนเพิ่ม class ใหม่ใน template ต้องไม่ผ่าน
+        with tempfile.NamedTemporaryFile('w', suffix='.css', delete=False) as stale:
+            stale.write('.flex{display:flex}.hover\\:bg-sky-50:hover{}')
+        self.addCleanup(os.remove, stale.name)
+        with self.assertRaises(CommandError) as raised:
+            call_command('check_tailwind_classes', css=stale.name, stdout=io.StringIO())
+        message = str(raised.exception)
+        self.assertIn('hover:bg-yellow-400: core/templates/core/', message)
+        self.assertNotIn('\nflex:', message)
+        self.assertNotIn('hover:bg-sky-50:', message)
+        self.assertNotIn('payer-checkbox', message)
+
+
+class PostFacetTests(CoreTestCase):
+    def setUp(self):
+        super().setUp()
+        owner = User.objects.create_user(username='owner')
+        for title, category, limit in [
+            ('Netflix Premium', 'MOVIE', 1),  # เจ้าของคนเดียวก็เต็ม
+            ('Netflix มือถือ', 'MOVIE', 4),
+            ('Netflix เกม', 'GAME', 4),
+            ('Spotify Family', 'MUSIC', 6),
+        ]:
+            Post.objects.create(title=title, description='-', category=category, member_limit=limit,
+                                full_price=100, owner=owner)
+
+    def test_counts_in_one_query_excluding_own_filter(self):
+        with self.assertNumQueries(1):
+            facets = compute_facets('netflix', 'MOVIE', 'available')
+        categories = {code: count for code, _, count in facets['categories']}
+        # หมวดนับภายใต้คำค้น + สถานะ (ไม่สนหมวดที่เลือกอยู่)
+        self.assertEqual((categories['MOVIE'], categories['GAME'], categories['MUSIC']), (1, 1, 0))
+        # สถานะนับภายใต้คำค้น + หมวด
+        self.assertEqual(facets['statuses'], {'available': 1, 'full': 1})
+        self.assertEqual((facets['all_categories'], facets['all_statuses'], facets['total']), (2, 2, 1))
+
+    def test_cached_per_query_string(self):
+        get_post_facets('netflix')
+        with self.assertNumQueries(0):
+            self.assertEqual(get_post_facets(' Netflix ')['total'], 3)
+        with self.assertNumQueries(1):
+            self.assertEqual(get_post_facets('spotify')['total'], 1)
+
+    def test_list_page_shows_counts(self):
+        response = self.client.get(reverse('post-list'), {'q': 'netflix'})
+        self.assertEqual(response.context['facets']['total'], 3)
+        self.assertContains(response, 'เต็มแล้ว (1)')
+
+
+class AdminStatsTests(CoreTestCase):
+    def setUp(self):
+        super().setUp()
+        self.staff = User.objects.create_user(username='staff', is_staff=True)
+        for status, category in [('PENDING', 'BUG'), ('PENDING', 'SCAM'), ('RESOLVED', 'BUG'), ('REJECTED', 'USER')]:
+            Report.objects.create(reporter=self.staff, title='-', description='-', category=category, status=status)
+
+    def test_counts_in_one_query(self):
+        with self.assertNumQueries(1):
+            stats = compute_report_stats()
+        self.assertEqual(stats['by_status'], {'PENDING': 2, 'ACKNOWLEDGED': 0, 'RESOLVED': 1, 'REJECTED': 1})
+        self.assertEqual(stats['by_category'], {'BUG': 2, 'USER': 1, 'SCAM': 1, 'OTHER': 0})
+        self.assertEqual(stats['total'], 4)
+
+    def test_cache_cleared_on_status_change(self):
+        report = Report.objects.filter(status='PENDING').first()
+        self.client.force_login(self.staff)
+        self.assertEqual(self.client.get(reverse('admin-report-list')).context['pending_count'], 2)
+        with self.assertNumQueries(0):
+            get_admin_stats()
+
+        self.client.get(reverse('admin-update-report', args=[report.pk, 'RESOLVED']))
+        response = self.client.get(reverse('admin-report-list'))
+        self.assertEqual((response.context['pending_count'], response.context['resolved_count']), (1, 2))
+
+        # action ใน Django admin ใช้ queryset.update() (ไม่มี signal)
+        self.client.force_login(User.objects.create_superuser(username='root', password='x'))
+        self.client.post(reverse('admin:core_report_changelist'), {
+            'action': 'mark_as_resolved', '_selected_action': list(Report.objects.values_list('pk', flat=True)),
+        })
+        self.assertEqual(get_admin_stats()['by_status']['RESOLVED'], 4)
+
+    def test_daily_series_from_rollup(self):
+        today = timezone.localdate()
+        Report.objects.filter(status='REJECTED').update(created_at=timezone.now() - timedelta(days=3))
+        series = daily_series(days=7)
+        self.assertEqual([n for _, n in series['reports']], [0, 0, 0, 1, 0, 0, 3])
+        self.assertEqual(series['reports'][-1][0], today)
+        # วันที่ผ่านไปแล้วถูกสรุปเก็บไว้ รอบต่อไปอ่านจากตาราง + นับวันนี้สด
+        self.assertEqual(DailyStat.objects.filter(metric='reports').count(), 6)
+        with self.assertNumQueries(3):
+            self.assertEqual(daily_series(days=7), series)
+
+    def test_rollup_rerun_overwrites(self):
+        yesterday = timezone.localdate() - timedelta(days=1)
+        rollup_daily_stats(yesterday, yesterday)
+        Report.objects.update(created_at=timezone.now() - timedelta(days=1))
+        self.assertEqual(rollup_daily_stats(yesterday, yesterday)['reports'], {yesterday: 4})
+        self.assertEqual(DailyStat.objects.get(metric='reports', date=yesterday).value, 4)
@@ -14,9 +14,12 @@ from .views import (
     add_profile_comment,
     get_chat_messages,
     send_chat_message,
+    chat_stream,
     kick_member,
     HomepageView,
+    home_feed,
     AdminUserListView,
+    AdminRequestMetricsView,
     admin_ban_user,
     admin_unban_user,
     ReportCreateView,
@@ -26,6 +29,11 @@ from .views import (
     AdminResolveReportView,
     ReportDetailView,
     generate_promptpay_qr,
+    health_db,
+    bill_split_api,
+    post_bill_split,
+    generate_promptpay_qr_batch,
+    post_payment_qr_batch,
     BillCalculatorView,
     NotificationListView, 
     mark_notification_read,
@@ -37,6 +45,7 @@ from .views import (
 urlpatterns = [
     # URLs for Posts
     path('', HomepageView.as_view(), name='home'),
+    path('api/feed/', home_feed, name='home-feed'),
     path('post', PostListView.as_view(), name='post-list'),
     path('post/new/', PostCreateView.as_view(), name='post-create'),
     path('post/<int:pk>/', PostDetailView.as_view(), name='post-detail'),
@@ -53,13 +62,9 @@ urlpatterns = [
     path('post/<int:pk>/chat/api/send/', send_chat_message, name='chat-api-send'),
     
 
-    #สำหรับ Redis
-    # # 1. หน้าห้องแชทหลัก
-    # path('post/<int:pk>/chat/', PostChatView.as_view(), name='post-chat'),
-    # # 2. API ดึงข้อความ
-    # path('post/<int:pk>/chat/api/get/', get_chat_messages, name='chat-api-get'),
-    # # 3. API ส่งข้อความ
-    # path('post/<int:pk>/chat/api/send/', send_chat_message, name='chat-api-send'),
+    # Stream ข้อความแบบ real-time (SSE) ต้องรันผ่าน ASGI
+    # broker เปลี่ยนเป็น Redis ได้ที่ settings.CHAT_BROKER
+    path('post/<int:pk>/chat/api/stream/', chat_stream, name='chat-api-stream'),
 
     # URLs for Profiles
     path('profile/<int:pk>/', ProfileView.as_view(), name='profile'),
@@ -71,6 +76,7 @@ urlpatterns = [
 
     # URL สำหรับระบบ Admin แบบ Custom
     path('system/users/', AdminUserListView.as_view(), name='admin-user-list'),
+    path('system/metrics/', AdminRequestMetricsView.as_view(), name='admin-request-metrics'),
     path('system/users/<int:pk>/ban/', admin_ban_user, name='admin-ban-user'),
     path('system/users/<int:pk>/unban/', admin_unban_user, name='admin-unban-user'),
 
@@ -86,6 +92,11 @@ urlpatterns = [
     
     # URL สำหรับ Generate QR Code PromptPay
     path('api/generate-qr/', generate_promptpay_qr, name='generate-qr'),
+    path('api/generate-qr/batch/', generate_promptpay_qr_batch, name='generate-qr-batch'),
+    path('post/<int:pk>/payment-qr/', post_payment_qr_batch, name='post-payment-qr'),
+    path('post/<int:pk>/bill/', post_bill_split, name='post-bill'),
+    path('api/bill/split/', bill_split_api, name='bill-split-api'),
+    path('health/db/', health_db, name='health-db'),
 
     path('tools/calculator/', BillCalculatorView.as_view(), name='bill-calculator'),
 
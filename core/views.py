@@ -1,7 +1,7 @@
 # core/views.py
-from django.db.models import Q, Count, F
 
 from django.shortcuts import render, get_object_or_404, redirect
+from django.template.loader import render_to_string
 from django.urls import reverse_lazy, reverse
 from django.views.generic import (
     ListView, DetailView, CreateView,
@@ -9,18 +9,36 @@ from django.views.generic import (
 )
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.contrib.auth.decorators import login_required
-from .models import Post, User, JoinRequest, ChatMessage, ProfileComment, Report, Notification
+from .models import Post, User, JoinRequest, ChatMessage, ProfileComment, Report, Notification, BillSplit
 from .forms import PostForm, ChatMessageForm, ProfileCommentForm, ProfileUpdateForm
 from django.http import HttpResponseForbidden
 from django.http import JsonResponse
-from django.views.decorators.http import require_POST
+from django.views.decorators.http import condition, require_POST
+from django.utils.cache import patch_cache_control
 from django.contrib import messages
 from .models import Report
 from .forms import ReportForm, ResolveReportForm
 
-import io
-import qrcode
-from promptpay import qrcode as promptpay_qrcode # หรือใช้ library promptpay ที่ลง
+import json
+from urllib.parse import urlencode
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from .adminstats import chart, get_admin_stats
+from .billsplit import BillSplitError, bill_to_json, parse_bill, split_bill
+from .broker import get_broker
+from .chat import ChatMessageSerializer, chat_messages_queryset
+from .dbhealth import database_health
+from .facets import STATUS_FILTERS, get_post_facets
+from .membership import add_member, is_member
+from .feed import InvalidCursor, get_feed_page
+from .fragments import attach_card_versions, profile_comments_version
+from .instrumentation import LATENCY_BUCKETS_MS, query_budget, registry, summarize
+from .notifications import mark_all_read, mark_read, notify
+from .search import search_posts
+from .jobs import enqueue
+from .qr import InvalidQRRequest, build_qr_batch, get_qr_image, normalize_qr_key, qr_etag
+from .tasks import attach_report_evidence, send_chat_image, stage_upload
 from django.http import HttpResponse
 
 
@@ -29,7 +47,27 @@ class HomepageView(ListView):
     model = Post
     template_name = 'core/new_home.html'
     context_object_name = 'posts'
-    ordering = ['-created_at'] # เรียงโพสต์ใหม่สุดขึ้นก่อน
+
+    def get_queryset(self):
+        # หน้าแรกแสดงแค่หน้าแรกของฟีด ที่เหลือโหลดต่อด้วย infinite scroll (home_feed)
+        self.feed_page = get_feed_page()
+        return attach_card_versions(self.feed_page.posts)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['next_cursor'] = self.feed_page.next_cursor
+        return context
+
+# API สำหรับ infinite scroll ของหน้าแรก (?cursor=... จาก next_cursor ของหน้าก่อน)
+def home_feed(request):
+    try:
+        page = get_feed_page(request.GET.get('cursor'))
+    except InvalidCursor:
+        return JsonResponse({'error': 'Invalid cursor'}, status=400)
+
+    posts = attach_card_versions(page.posts)
+    html = render_to_string('core/partials/post_cards.html', {'posts': posts}, request=request)
+    return JsonResponse({'html': html, 'next_cursor': page.next_cursor})
 
 class PostListView(ListView):
     model = Post
@@ -38,34 +76,34 @@ class PostListView(ListView):
     ordering = ['-created_at']
 
     def get_queryset(self):
-        queryset = super().get_queryset()
+        queryset = super().get_queryset().select_related('owner')
         
         search_query = self.request.GET.get('q')
         category_filter = self.request.GET.get('category')
         status_filter = self.request.GET.get('status') # <--- รับค่าสถานะ
 
-        queryset = queryset.annotate(current_members=Count('members'))
-
         if search_query:
-            queryset = queryset.filter(
-                Q(title__icontains=search_query) | 
-                Q(description__icontains=search_query)
-            )
+            # ค้นหาผ่าน search_text (trigram index) และเรียงตามความเกี่ยวข้อง
+            queryset = search_posts(queryset, search_query)
 
         if category_filter:
             queryset = queryset.filter(category=category_filter)
 
         # ★ กรองสถานะตรงนี้เหมือนกัน ★
-        if status_filter == 'available':
-            queryset = queryset.filter(current_members__lt=F('member_limit'))
-        elif status_filter == 'full':
-            queryset = queryset.filter(current_members__gte=F('member_limit'))
+        if status_filter in STATUS_FILTERS:
+            queryset = queryset.filter(STATUS_FILTERS[status_filter])
 
         return queryset
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['categories'] = Post.CATEGORY_CHOICES 
+        # จำนวนโพสต์ของแต่ละหมวด/สถานะภายใต้คำค้นปัจจุบัน (query เดียว + cache สั้นๆ)
+        context['facets'] = get_post_facets(
+            self.request.GET.get('q', ''), self.request.GET.get('category', ''), self.request.GET.get('status', ''),
+        )
+        context['categories'] = context['facets']['categories']
+        # ดึงเวอร์ชันของการ์ดทุกใบทีเดียว (การ์ดที่ไม่เปลี่ยนจะใช้ HTML จาก cache)
+        context['posts'] = context['object_list'] = attach_card_versions(context['posts'])
         return context
     
 class PostDetailView(DetailView):
@@ -74,13 +112,18 @@ class PostDetailView(DetailView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
+        context['is_member'] = is_member(self.object, self.request.user)
         if self.request.user.is_authenticated:
             # เช็คว่า user คนนี้เคยส่งคำขอเข้าร่วมโพสต์นี้หรือยัง
             existing_request = JoinRequest.objects.filter(post=self.object, user=self.request.user).first()
             context['existing_request'] = existing_request
         # ดึงคำขอที่ยังรออนุมัติสำหรับเจ้าของโพสต์
         if self.request.user == self.object.owner:
-             context['join_requests'] = JoinRequest.objects.filter(post=self.object, status='PENDING')
+             context['join_requests'] = JoinRequest.objects.filter(post=self.object, status='PENDING').select_related('user')
+        # ยอดที่ต้องจ่ายจากบิลที่เจ้าของหารไว้ (ถ้ายังไม่มีบิล ใช้ราคาหารเท่ากัน)
+        bill = BillSplit.objects.filter(post=self.object).first()
+        if bill and context['is_member']:
+            context['bill_share'] = bill.share_for(self.request.user)
         return context
 
 
@@ -113,6 +156,22 @@ class PostDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
         post = self.get_object()
         return self.request.user == post.owner or self.request.user.is_superuser or self.request.user.is_staff
 
+    def form_valid(self, form):
+        # เก็บรายชื่อสมาชิกไว้ก่อนลบ แล้วแจ้งเตือนทุกคนว่าปาร์ตี้ถูกลบ
+        member_ids = list(self.object.members.values_list('pk', flat=True))
+        title = self.object.title
+        response = super().form_valid(form)
+        notify(
+            member_ids,
+            f"ปาร์ตี้ '{title}' ถูกลบแล้ว",
+            sender=self.request.user,
+            link=reverse('post-list'),
+            event='post_deleted',
+            exclude=self.request.user,
+            defer=True,
+        )
+        return response
+
 # ========== ส่วนจัดการการเข้าร่วม ==========
 
 @login_required
@@ -125,58 +184,78 @@ def request_join_post(request, pk):
     join_req, created = JoinRequest.objects.get_or_create(post=post, user=request.user)
 
     # ★ เพิ่ม: ถ้าเพิ่งสร้างใหม่ ให้แจ้งเตือนเจ้าของโพสต์ ★
+    # ถ้าเจ้าของยังไม่ได้อ่านแจ้งเตือนคำขอก่อนหน้า จะรวมเป็นอันเดียว เช่น "มีคำขอใหม่ 3 รายการ"
     if created:
-        Notification.objects.create(
-            recipient=post.owner,
+        notify(
+            [post.owner_id],
+            f"คุณ {request.user.username} ขอเข้าร่วมปาร์ตี้ '{post.title}'",
             sender=request.user,
             post=post,
-            message=f"คุณ {request.user.username} ขอเข้าร่วมปาร์ตี้ '{post.title}'",
-            link=reverse('post-detail', kwargs={'pk': post.pk})
+            link=reverse('post-detail', kwargs={'pk': post.pk}),
+            event='join_request',
+            coalesce_message=f"มีคำขอเข้าร่วมปาร์ตี้ '{post.title}' ใหม่ {{count}} รายการ",
         )
 
     return redirect('post-detail', pk=post.pk)
 
 @login_required
 def manage_join_request(request, request_id, action):
-    join_request = get_object_or_404(JoinRequest, id=request_id)
+    # โหลดโพสต์และผู้ขอมาพร้อมกัน (ใช้ทั้งตอนอนุมัติและแจ้งเตือน)
+    join_request = get_object_or_404(JoinRequest.objects.select_related('post', 'user'), id=request_id)
     post = join_request.post
 
-    # ตรวจสอบสิทธิ์ว่าคนที่จัดการคำขอเป็นเจ้าของโพสต์จริง
-    if request.user != post.owner:
+    # ตรวจสอบสิทธิ์ว่าคนที่จัดการคำขอเป็นเจ้าของโพสต์จริง (เทียบ id ไม่ต้องโหลด owner)
+    if request.user.pk != post.owner_id:
         return HttpResponseForbidden("You are not allowed to manage this request.")
 
     if action == 'approve':
-        if post.members.count() >= post.member_limit:
+        # จองที่ว่างแบบ atomic กันกดอนุมัติพร้อมกันจนสมาชิกเกิน member_limit
+        if not add_member(post, join_request.user):
             messages.error(request, "ไม่สามารถอนุมัติได้ เนื่องจากปาร์ตี้เต็มแล้ว!")
             return redirect('post-detail', pk=post.pk)
 
         join_request.status = 'APPROVED'
-        post.members.add(join_request.user)
         messages.success(request, f"อนุมัติคุณ {join_request.user.username} แล้ว")
         
         # ★ เพิ่ม: แจ้งเตือน user ว่าผ่านแล้ว ★
-        Notification.objects.create(
-            recipient=join_request.user,
+        notify(
+            [join_request.user_id],
+            f"คำขอเข้าร่วมปาร์ตี้ '{post.title}' ได้รับการอนุมัติแล้ว! 🎉",
             sender=request.user,
             post=post,
-            message=f"คำขอเข้าร่วมปาร์ตี้ '{post.title}' ได้รับการอนุมัติแล้ว! 🎉",
-            link=reverse('post-detail', kwargs={'pk': post.pk})
+            link=reverse('post-detail', kwargs={'pk': post.pk}),
+            defer=True,
         )
+
+        # ถ้าคนนี้เป็นคนสุดท้าย แจ้งสมาชิกทุกคนว่าปาร์ตี้ครบแล้ว (ส่งเบื้องหลัง ไม่ให้หน้าเว็บรอ)
+        post.refresh_from_db(fields=['member_count'])
+        if post.member_count >= post.member_limit:
+            notify(
+                post.members.values_list('pk', flat=True),
+                f"ปาร์ตี้ '{post.title}' สมาชิกครบแล้ว! เตรียมโอนเงินได้เลย 💸",
+                sender=request.user,
+                post=post,
+                link=reverse('post-detail', kwargs={'pk': post.pk}),
+                event='party_full',
+                exclude=request.user,
+                defer=True,
+            )
         
     elif action == 'reject':
         join_request.status = 'REJECTED'
         messages.info(request, "ปฏิเสธคำขอแล้ว")
 
         # ★ เพิ่ม: แจ้งเตือน user ว่าไม่ผ่าน ★
-        Notification.objects.create(
-            recipient=join_request.user,
+        notify(
+            [join_request.user_id],
+            f"คำขอเข้าร่วมปาร์ตี้ '{post.title}' ถูกปฏิเสธ 😔",
             sender=request.user,
             post=post,
-            message=f"คำขอเข้าร่วมปาร์ตี้ '{post.title}' ถูกปฏิเสธ 😔",
-            link=reverse('post-detail', kwargs={'pk': post.pk})
+            link=reverse('post-detail', kwargs={'pk': post.pk}),
+            defer=True,
         )
     
-    join_request.save()
+    join_request.save(update_fields=['status'])
     return redirect('post-detail', pk=post.pk)
 
 @login_required
@@ -195,12 +274,12 @@ def kick_member(request, pk, user_id):
     # เพื่อให้สถานะรีเซ็ต เผื่อในอนาคตเขาอยากขอเข้าใหม่ หรือกันความสับสน
     JoinRequest.objects.filter(post=post, user=user_to_kick).delete()
 
-    Notification.objects.create(
-        recipient=user_to_kick, # ต้องแน่ใจว่าตัวแปร user_to_kick มีอยู่จริงจากโค้ดเดิม
+    notify(
+        [user_to_kick],
+        f"คุณถูกเชิญออกจากปาร์ตี้ '{post.title}'",
         sender=request.user,
         post=post,
-        message=f"คุณถูกเชิญออกจากปาร์ตี้ '{post.title}'",
-        link=reverse('home')
+        link=reverse('home'),
     )
 
     return redirect('post-detail', pk=post.pk)
@@ -214,8 +293,7 @@ class PostChatView(LoginRequiredMixin, UserPassesTestMixin, DetailView):
     context_object_name = 'post'
 
     def test_func(self):
-        post = self.get_object()
-        return self.request.user == post.owner or self.request.user in post.members.all()
+        return is_member(self.get_object(), self.request.user)
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -224,30 +302,45 @@ class PostChatView(LoginRequiredMixin, UserPassesTestMixin, DetailView):
         return context
 
 # 2. API สำหรับดึงข้อความ (เรียกทุก 2 วิ)
+# รองรับ cursor 2 แบบ (อ้างอิงจาก id ของข้อความ):
+#   ?since_id=<id>  -> ดึงเฉพาะข้อความที่ใหม่กว่า id นี้ (ใช้ตอน polling)
+#   ?before_id=<id> -> ดึงข้อความที่เก่ากว่า id นี้ (ปุ่ม "โหลดข้อความเก่า")
+# ถ้าไม่ส่งอะไรมาเลย จะได้ข้อความล่าสุด CHAT_PAGE_SIZE รายการ
+CHAT_PAGE_SIZE = 50
+
+def _parse_cursor(value):
+    try:
+        cursor = int(value)
+    except (TypeError, ValueError):
+        return None
+    return cursor if cursor >= 0 else None
+
 @login_required
 def get_chat_messages(request, pk):
     post = get_object_or_404(Post, pk=pk)
     
-    if request.user != post.owner and request.user not in post.members.all():
+    if not is_member(post, request.user):
         return JsonResponse({'error': 'Permission denied'}, status=403)
     
-    messages = ChatMessage.objects.filter(post=post).order_by('timestamp')
-    
-    data = []
-    for msg in messages:
-        data.append({
-            'user': msg.user.username,
-            'profile_url': msg.user.profile_picture.url if msg.user.profile_picture else '',
-            'message': msg.message,
-            
-            # ★ ส่ง URL รูปภาพไปด้วย (ถ้ามี) ★
-            'image_url': msg.image.url if msg.image else None,
-            
-            'timestamp': msg.timestamp.strftime('%H:%M'),
-            'is_me': msg.user == request.user
-        })
+    since_id = _parse_cursor(request.GET.get('since_id'))
+    before_id = _parse_cursor(request.GET.get('before_id'))
+    queryset = chat_messages_queryset(post)
+
+    if since_id is not None:
+        # ดึงเฉพาะข้อความใหม่ เรียงจากเก่าไปใหม่ (ถ้าเกินหน้า client จะเรียกซ้ำทันที)
+        messages = list(queryset.filter(id__gt=since_id).order_by('id')[:CHAT_PAGE_SIZE + 1])
+        has_more = len(messages) > CHAT_PAGE_SIZE
+        messages = messages[:CHAT_PAGE_SIZE]
+    else:
+        # โหลดครั้งแรก หรือย้อนดูประวัติ: ดึงจากใหม่ไปเก่าแล้วกลับลำดับ
+        if before_id is not None:
+            queryset = queryset.filter(id__lt=before_id)
+        messages = list(queryset.order_by('-id')[:CHAT_PAGE_SIZE + 1])
+        has_more = len(messages) > CHAT_PAGE_SIZE
+        messages = messages[:CHAT_PAGE_SIZE][::-1]
     
-    return JsonResponse({'messages': data})
+    data = ChatMessageSerializer(viewer=request.user).serialize(messages)
+    return JsonResponse({'messages': data, 'has_more': has_more})
 
 # 3. API สำหรับส่งข้อความ (Save ลง Database)
 @login_required
@@ -255,26 +348,72 @@ def get_chat_messages(request, pk):
 def send_chat_message(request, pk):
     post = get_object_or_404(Post, pk=pk)
     
-    if request.user != post.owner and request.user not in post.members.all():
+    if not is_member(post, request.user):
         return JsonResponse({'error': 'Permission denied'}, status=403)
     
     # รับข้อมูลทั้งข้อความและไฟล์รูปภาพ
     message_text = request.POST.get('message', '').strip()
     image_file = request.FILES.get('image')
     
-    # ต้องมีอย่างใดอย่างหนึ่ง (ข้อความ หรือ รูป) ถึงจะบันทึก
-    if message_text or image_file:
-        ChatMessage.objects.create(
+    # มีรูปภาพ: พักไฟล์ไว้ก่อนแล้วให้งานเบื้องหลังอัปโหลด (Cloudinary) และสร้างข้อความให้
+    # ข้อความจะเข้าห้องแชท (SSE/polling) เองเมื่ออัปโหลดเสร็จ request จึงไม่ต้องรอการอัปโหลด
+    if image_file:
+        enqueue(send_chat_image, post.pk, request.user.pk, message_text, stage_upload(image_file))
+        return JsonResponse({'status': 'queued'})
+
+    # ข้อความล้วน: บันทึกและกระจายทันที
+    if message_text:
+        chat_message = ChatMessage.objects.create(
             post=post,
             user=request.user,
             message=message_text,
-            image=image_file # บันทึกรูปภาพ
         )
-        return JsonResponse({'status': 'success'})
+        # กระจายข้อความใหม่ไปยังทุกคนที่เปิดห้องแชทนี้อยู่ (ผ่าน SSE)
+        payload = ChatMessageSerializer().payload(chat_message)
+        get_broker().publish(post.pk, payload)
+        return JsonResponse({'status': 'success', 'message': {**payload, 'is_me': True}})
     
     return JsonResponse({'status': 'error', 'message': 'Empty message'}, status=400)
 
 
+# 4. Stream ข้อความแบบ real-time (Server-Sent Events) ใช้ได้เฉพาะตอนรันผ่าน ASGI
+# ถ้ารันผ่าน WSGI จะตอบ 204 กลับไป เพื่อให้หน้าเว็บถอยไปใช้ polling แทน
+CHAT_STREAM_KEEPALIVE = 15  # วินาที
+
+def _can_access_chat(user, pk):
+    return is_member(get_object_or_404(Post, pk=pk), user)
+
+@login_required
+async def chat_stream(request, pk):
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+
+    user = await request.auser()
+    if not await sync_to_async(_can_access_chat)(user, pk):
+        return JsonResponse({'error': 'Permission denied'}, status=403)
+
+    subscription = await get_broker().subscribe(pk)
+
+    async def event_stream():
+        try:
+            yield 'retry: 3000\n\n'
+            while True:
+                payload = await subscription.get(timeout=CHAT_STREAM_KEEPALIVE)
+                if payload is None:
+                    # ส่ง comment เปล่าๆ กัน proxy ตัด connection
+                    yield ': keep-alive\n\n'
+                    continue
+                data = {**payload, 'is_me': payload['user_id'] == user.pk}
+                yield f"id: {payload['id']}\nevent: message\ndata: {json.dumps(data)}\n\n"
+        finally:
+            await subscription.close()
+
+    response = StreamingHttpResponse(event_stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
 # ========== ส่วนโปรไฟล์ผู้ใช้ ==========
 
 class ProfileView(DetailView):
@@ -287,7 +426,10 @@ class ProfileView(DetailView):
         # ดึง User object ของหน้าโปรไฟล์นี้
         profile_user = self.get_object()
         # ดึงคอมเมนต์ทั้งหมดที่โปรไฟล์นี้ได้รับ
-        context['comments'] = ProfileComment.objects.filter(profile_owner=profile_user).order_by('-created_at')
+        context['comments'] = ProfileComment.objects.filter(profile_owner=profile_user).select_related('author').order_by('-created_at')
+        # key ของ fragment คอมเมนต์ต้องเปลี่ยนตามชื่อ/รูปของคนที่มาคอมเมนต์ด้วย
+        author_ids = context['comments'].order_by().values_list('author_id', flat=True).distinct()
+        context['comments_version'] = profile_comments_version(profile_user.pk, author_ids)
         # เพิ่มฟอร์มคอมเมนต์เข้าไปใน context
         context['comment_form'] = ProfileCommentForm()
         return context
@@ -376,8 +518,16 @@ class ReportCreateView(LoginRequiredMixin, CreateView):
     def form_valid(self, form):
         # บันทึกว่าใครเป็นคนแจ้ง (ดึงจาก user ที่ login อยู่)
         form.instance.reporter = self.request.user
+
+        # รูปหลักฐานให้งานเบื้องหลังอัปโหลดทีหลัง ไม่ต้องรอ Cloudinary ตอนกดส่ง
+        evidence_image = form.cleaned_data.get('evidence_image')
+        form.instance.evidence_image = None
+        response = super().form_valid(form)
+        if evidence_image:
+            enqueue(attach_report_evidence, self.object.pk, stage_upload(evidence_image))
+
         messages.success(self.request, "ขอบคุณสำหรับการแจ้งปัญหา ทีมงานจะตรวจสอบโดยเร็วที่สุด")
-        return super().form_valid(form)
+        return response
     
 class UserReportListView(LoginRequiredMixin, ListView):
     model = Report
@@ -393,6 +543,7 @@ class UserReportListView(LoginRequiredMixin, ListView):
 # 1. View สำหรับแสดงรายการแจ้งปัญหาทั้งหมด (เฉพาะ Admin)
 class AdminReportListView(LoginRequiredMixin, UserPassesTestMixin, ListView):
     model = Report
+    queryset = Report.objects.select_related('reporter')
     template_name = 'core/admin_report_list.html'
     context_object_name = 'reports'
     ordering = ['-created_at'] # ใหม่สุดขึ้นก่อน
@@ -402,10 +553,16 @@ class AdminReportListView(LoginRequiredMixin, UserPassesTestMixin, ListView):
         return self.request.user.is_superuser or self.request.user.is_staff
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        # นับจำนวนงานแต่ละสถานะส่งไปที่ Template
-        context['pending_count'] = Report.objects.filter(status='PENDING').count()
-        context['resolved_count'] = Report.objects.filter(status='RESOLVED').count()
-        context['rejected_count'] = Report.objects.filter(status='REJECTED').count()
+        # นับจำนวนงานแต่ละสถานะ/หมวดหมู่ใน query เดียว + กราฟรายวันจากตาราง rollup (cache ไว้ ดู core/adminstats.py)
+        stats = get_admin_stats()
+        context['pending_count'] = stats['by_status']['PENDING']
+        context['resolved_count'] = stats['by_status']['RESOLVED']
+        context['rejected_count'] = stats['by_status']['REJECTED']
+        context['category_counts'] = [
+            (label, stats['by_category'].get(code, 0)) for code, label in Report.CATEGORY_CHOICES
+        ]
+        context['report_chart'] = chart(stats['series']['reports'])
+        context['user_chart'] = chart(stats['series']['users'])
         return context
 
 # 2. ฟังก์ชันอัปเดตสถานะงาน
@@ -453,32 +610,154 @@ class ReportDetailView(LoginRequiredMixin, UserPassesTestMixin, DetailView):
         return self.request.user.is_superuser or self.request.user.is_staff or self.request.user == report.reporter
 
 # สร้าง QR Code PromptPay
+# รูปขึ้นกับ (id, amount) เท่านั้น จึงให้ browser/CDN cache ได้ยาวๆ และตอบ 304 จาก ETag โดยไม่ต้องวาดใหม่
+QR_MAX_AGE = 60 * 60 * 24 * 365
+
+def _promptpay_qr_etag(request):
+    try:
+        return qr_etag(*normalize_qr_key(request.GET.get('id'), request.GET.get('amount'), request.GET.get('format')))
+    except InvalidQRRequest:
+        return None
+
 @login_required
+@condition(etag_func=_promptpay_qr_etag)
 def generate_promptpay_qr(request):
-    # รับค่าจาก Parameter
-    pp_id = request.GET.get('id', '')
-    amount = float(request.GET.get('amount', 0.00))
-    
-    if not pp_id:
+    # รับค่าจาก Parameter (?format=svg จะได้รูป SVG ซึ่งสร้างเร็วกว่า PNG)
+    if not request.GET.get('id'):
         return HttpResponse("Please provide ID", status=400)
 
-    # สร้าง Payload PromptPay (รองรับทั้งเบอร์มือถือและเลขบัตรประชาชน)
     # Library promptpay จะจัดการแปลง 08x เป็น 668x ให้เอง
-    payload = promptpay_qrcode.generate_payload(pp_id, amount)
-
-    # สร้างรูป QR Code
-    img = qrcode.make(payload)
-    
-    # แปลงรูปเป็น Byte เพื่อส่งกลับไปเป็น Response (ไม่ต้องเซฟลงเครื่อง)
-    buffer = io.BytesIO()
-    img.save(buffer, format="PNG")
-    buffer.seek(0)
-
-    return HttpResponse(buffer, content_type="image/png")
+    try:
+        content, content_type = get_qr_image(request.GET['id'], request.GET.get('amount'), request.GET.get('format'))
+    except InvalidQRRequest as e:
+        return HttpResponse(str(e), status=400)
+
+    response = HttpResponse(content, content_type=content_type)
+    patch_cache_control(response, public=True, max_age=QR_MAX_AGE, immutable=True)
+    return response
+
+def _qr_zip_response(items, fmt, filename):
+    try:
+        content = build_qr_batch(items, fmt)
+    except InvalidQRRequest as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+    response = HttpResponse(content, content_type='application/zip')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+# สร้าง QR หลายรูปในครั้งเดียว (เช่นจากหน้าหารบิล) ส่งกลับเป็นไฟล์ zip
+# body: {"id": "08x...", "format": "png", "items": [{"label": "A", "amount": 120.5, "id": "(ไม่ใส่ก็ได้)"}]}
+@login_required
+@require_POST
+def generate_promptpay_qr_batch(request):
+    try:
+        data = json.loads(request.body)
+        default_id = data.get('id', '')
+        items = [(item.get('label', ''), item.get('id', default_id), item.get('amount')) for item in data['items']]
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return JsonResponse({'status': 'error', 'message': 'รูปแบบข้อมูลไม่ถูกต้อง'}, status=400)
+    return _qr_zip_response(items, data.get('format', 'png'), 'promptpay-qr.zip')
+
+# เจ้าของโพสต์ดาวน์โหลด QR ของสมาชิกทุกคน (แต่ละคนจ่ายเข้าเบอร์เจ้าของตามยอดหาร)
+@login_required
+def post_payment_qr_batch(request, pk):
+    post = get_object_or_404(Post.objects.select_related('owner'), pk=pk)
+    if request.user != post.owner:
+        return HttpResponseForbidden("เฉพาะเจ้าของโพสต์เท่านั้น")
+    if not post.owner.phone_number:
+        return JsonResponse({'status': 'error', 'message': 'ยังไม่ได้ระบุเบอร์โทรศัพท์ในโปรไฟล์'}, status=400)
+
+    usernames = post.members.exclude(pk=post.owner_id).order_by('username').values_list('username', flat=True)
+    bill = BillSplit.objects.filter(post=post).first()
+    if bill:
+        # มีบิลที่หารไว้ -> ใช้ยอดของแต่ละคนตามบิล (ข้ามคนที่ไม่มีชื่อในบิล/ยอดเป็น 0)
+        amounts = {username: bill.shares.get(username) for username in usernames}
+        items = [(username, post.owner.phone_number, amount) for username, amount in amounts.items() if amount and amount != '0.00']
+    else:
+        items = [(username, post.owner.phone_number, post.divided_price) for username in usernames]
+    return _qr_zip_response(items, request.GET.get('format', 'png'), f'post-{post.pk}-qr.zip')
 
 class BillCalculatorView(TemplateView):
     template_name = 'core/bill_calculator.html'
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        # ?post=<pk> : เจ้าของโพสต์เปิดมาหารบิลของปาร์ตี้ แล้วบันทึกให้สมาชิกดูได้
+        post_id = self.request.GET.get('post')
+        if post_id and post_id.isdigit() and self.request.user.is_authenticated:
+            post = Post.objects.filter(pk=post_id, owner=self.request.user).first()
+            if post:
+                bill = BillSplit.objects.filter(post=post).first()
+                context['post'] = post
+                context['initial_bill'] = bill.bill if bill else {
+                    'people': list(post.members.order_by('username').values_list('username', flat=True)),
+                    'items': [],
+                }
+        return context
+
+def _load_bill(request):
+    try:
+        data = json.loads(request.body)
+    except ValueError:
+        raise BillSplitError('รูปแบบข้อมูลไม่ถูกต้อง')
+    return parse_bill(data)
+
+# API คำนวณการหารบิล (หน้า "ระบบหาร" เรียกทุกครั้งที่แก้รายการ)
+@require_POST
+def bill_split_api(request):
+    try:
+        result = split_bill(*_load_bill(request))
+    except BillSplitError as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+    return JsonResponse({'status': 'success', **result.to_json()})
+
+# บิลที่บันทึกไว้กับโพสต์: GET = สมาชิกดูยอด, POST = เจ้าของบันทึกบิลใหม่
+@login_required
+def post_bill_split(request, pk):
+    post = get_object_or_404(Post.objects.select_related('owner'), pk=pk)
+    if not is_member(post, request.user):
+        return JsonResponse({'status': 'error', 'message': 'Not a member'}, status=403)
+
+    if request.method == 'POST':
+        if request.user != post.owner:
+            return JsonResponse({'status': 'error', 'message': 'เฉพาะเจ้าของโพสต์เท่านั้น'}, status=403)
+        try:
+            people, items, service_charge, vat = _load_bill(request)
+        except BillSplitError as e:
+            return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+        result = split_bill(people, items, service_charge, vat)
+        bill, _ = BillSplit.objects.update_or_create(post=post, defaults={
+            'bill': bill_to_json(people, items, service_charge, vat),
+            'shares': {name: str(amount) for name, amount in result.shares},
+            'total': result.total,
+            'updated_by': request.user,
+        })
+        notify(
+            post.members.all(),
+            f"'{post.title}' สรุปยอดที่ต้องจ่ายแล้ว",
+            sender=request.user,
+            post=post,
+            link=reverse('post-detail', kwargs={'pk': post.pk}),
+            exclude=request.user,
+            defer=True,
+        )
+    else:
+        bill = BillSplit.objects.filter(post=post).first()
+        if bill is None:
+            return JsonResponse({'status': 'error', 'message': 'ยังไม่มีบิล'}, status=404)
+
+    my_share = bill.share_for(request.user)
+    data = {
+        'status': 'success',
+        'total': str(bill.total),
+        'shares': bill.shares,
+        'my_share': my_share,
+        'qr_url': None,
+    }
+    if my_share and post.owner.phone_number and request.user != post.owner:
+        data['qr_url'] = f"{reverse('generate-qr')}?{urlencode({'id': post.owner.phone_number, 'amount': my_share, 'format': 'svg'})}"
+    return JsonResponse(data)
+
 class NotificationListView(LoginRequiredMixin, ListView):
     model = Notification
     template_name = 'core/notification_list.html'
@@ -486,15 +765,14 @@ class NotificationListView(LoginRequiredMixin, ListView):
     paginate_by = 20
 
     def get_queryset(self):
-        # ดึงแจ้งเตือนของคนนั้นๆ
-        return Notification.objects.filter(recipient=self.request.user)
+        # ดึงแจ้งเตือนของคนนั้นๆ (พร้อมรูปผู้ส่ง ไม่ต้อง query ทีละแถว)
+        return Notification.objects.filter(recipient=self.request.user).select_related('sender')
 
 @login_required
 def mark_notification_read(request, pk):
     noti = get_object_or_404(Notification, pk=pk)
-    if noti.recipient == request.user:
-        noti.is_read = True
-        noti.save()
+    if noti.recipient_id == request.user.pk:
+        mark_read(noti)
         # ถ้ามีลิงก์ ให้เด้งไปลิงก์นั้น
         if noti.link:
             return redirect(noti.link)
@@ -503,7 +781,7 @@ def mark_notification_read(request, pk):
 
 @login_required
 def mark_all_notifications_read(request):
-    Notification.objects.filter(recipient=request.user, is_read=False).update(is_read=True)
+    mark_all_read(request.user)
     return redirect('notification-list')
 
 @login_required
@@ -512,7 +790,7 @@ def leave_party(request, pk):
     post = get_object_or_404(Post, pk=pk)
 
     # ตรวจสอบว่าผู้ใช้เป็นสมาชิก และไม่ใช่เจ้าของ
-    if request.user in post.members.all() and request.user != post.owner:
+    if request.user.pk != post.owner_id and is_member(post, request.user):
         # 1. ลบออกจากสมาชิก
         post.members.remove(request.user)
         
@@ -527,3 +805,46 @@ def leave_party(request, pk):
         messages.error(request, "คุณไม่สามารถออกจากปาร์ตี้นี้ได้")
 
     return redirect('home') # หรือจะกลับไปหน้า post-detail ก็ได้
+
+# ========== สถานะระบบ ==========
+# สำหรับ health check ของ Render/load balancer (ไม่ต้อง login) ตอบแค่สถานะ
+# รายละเอียด (latency, connection pool) แสดงเฉพาะ staff
+def health_db(request):
+    ok, report = database_health()
+    data = {'status': 'ok' if ok else 'error'}
+    if request.user.is_staff:
+        data['database'] = report
+    response = JsonResponse(data, status=200 if ok else 503)
+    response['Cache-Control'] = 'no-store'
+    return response
+
+
+# สถิติ request แยกตามชื่อ URL (เก็บโดย RequestMetricsMiddleware)
+class AdminRequestMetricsView(LoginRequiredMixin, UserPassesTestMixin, TemplateView):
+    template_name = 'core/admin_request_metrics.html'
+
+    def test_func(self):
+        return self.request.user.is_superuser or self.request.user.is_staff
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        rows = []
+        for url_name, stats in registry.snapshot().items():
+            row = summarize(stats)
+            row['url_name'] = url_name
+            row['budget'] = query_budget(url_name)
+            peak = max(row['latency_buckets']) or 1
+            row['histogram'] = [
+                {'label': f'≤{bound}' if bound else f'>{LATENCY_BUCKETS_MS[-1]}', 'count': count, 'percent': round(count / peak * 100)}
+                for bound, count in zip([*LATENCY_BUCKETS_MS, None], row['latency_buckets'])
+            ]
+            rows.append(row)
+        # หน้าที่ช้าสุด (p95) ขึ้นก่อน
+        rows.sort(key=lambda row: (row['p95_ms'], row['count']), reverse=True)
+        context['rows'] = rows
+        return context
+
+    def post(self, request, *args, **kwargs):
+        registry.reset()
+        messages.success(request, "ล้างสถิติแล้ว")
+        return redirect('admin-request-metrics')
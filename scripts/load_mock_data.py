@@ -1,3 +1,5 @@
+# ข้อมูลชุดเล็กแบ่งตามบทบาท ไว้ลองกดตาม flow ต่างๆ
+# ถ้าต้องการข้อมูลปริมาณมากสำหรับวัดความเร็ว ใช้ `python manage.py seed_data` (core/seeding.py) แทน
 import random
 from faker import Faker
 from django.contrib.auth import get_user_model
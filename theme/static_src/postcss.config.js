@@ -1,7 +0,0 @@
-module.exports = {
-  plugins: {
-    "@tailwindcss/postcss": {},
-    "postcss-simple-vars": {},
-    "postcss-nested": {}
-  },
-}